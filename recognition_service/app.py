@@ -1,58 +1,199 @@
 """
 Flask application for HTTP API.
 
-Provides:
-- GET /video_feed: MJPEG video stream
-- GET /health: Service health check
+One app serves all cameras of the service:
+- GET /video_feed/<camera_id>: MJPEG video stream (?profile=thumb|preview|full,
+  ?width=, ?fps=, ?quality=)
+- GET /snapshot/<camera_id>.jpg: Cached still image for thumbnail grids
+- GET /health/<camera_id>: Camera health check
+- GET /health: Service health check (all cameras)
+- GET /metrics: Prometheus metrics (counters, gauges, stage latency histograms)
+- GET /admin/profile/<camera_id>: Time-bounded profile of a camera worker
+- GET /admin/memory: tracemalloc snapshot diff
+
+Admin endpoints require the ADMIN_TOKEN (X-Admin-Token header or
+?token=) and are disabled when no token is configured.
+
+In production the app runs behind server.StreamServer, which serves
+/video_feed natively on its event loop; the Flask route below is the
+fallback for plain WSGI servers.
 """
 
-from flask import Flask, Response, jsonify
+import hmac
+from typing import Optional
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from .config import Config
 from . import streaming
+from . import metrics
+from . import profiling
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
-def create_app(config: Config) -> Flask:
+def create_app(service_name: str = 'recognition', admin_token: str = '') -> Flask:
     """
     Create and configure Flask application.
     
     Args:
-        config: Service configuration
+        service_name: Name reported by health endpoints
+        admin_token: Token for /admin endpoints (empty = disabled)
     
     Returns:
         Configured Flask app
     """
     app = Flask(__name__)
     CORS(app)
-    stream_id = config.camera_id or config.service_name or 'default'
     
-    @app.route('/video_feed')
-    def video_feed():
+    @app.route('/video_feed/<camera_id>')
+    def video_feed(camera_id: str):
         """Stream MJPEG video feed."""
+        if camera_id not in streaming.list_streams():
+            return jsonify({'error': 'Unknown camera'}), 404
+        try:
+            tier = streaming.parse_tier(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         return Response(
-            streaming.generate_mjpeg_frames(stream_id=stream_id),
+            streaming.generate_mjpeg_frames(stream_id=camera_id, tier=tier),
             mimetype='multipart/x-mixed-replace; boundary=frame'
         )
     
+    @app.route('/snapshot/<camera_id>.jpg')
+    def snapshot(camera_id: str):
+        """Single JPEG of the current frame (thumb profile by default)."""
+        if camera_id not in streaming.list_streams():
+            return jsonify({'error': 'Unknown camera'}), 404
+        args = request.args.to_dict()
+        args.setdefault('profile', 'thumb')
+        try:
+            tier = streaming.parse_tier(args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        jpeg = streaming.get_snapshot(camera_id, tier)
+        if jpeg is None:
+            return jsonify({'error': 'No frame available'}), 503
+        
+        response = Response(jpeg, mimetype='image/jpeg')
+        response.headers['Cache-Control'] = f'max-age={int(streaming.SNAPSHOT_MAX_AGE)}'
+        return response
+    
+    @app.route('/health/<camera_id>')
+    def camera_health(camera_id: str):
+        """Camera health check endpoint."""
+        if camera_id not in streaming.list_streams():
+            return jsonify({'error': 'Unknown camera'}), 404
+        return jsonify(_camera_status(camera_id, service_name))
+    
     @app.route('/health')
     def health():
-        """Health check endpoint."""
+        """Service health check endpoint."""
         return jsonify({
             'status': 'ok',
-            'streaming': streaming.is_streaming(stream_id=stream_id),
-            'cameraId': config.camera_id,
-            'service': config.service_name,
+            'service': service_name,
+            'cameras': [
+                _camera_status(camera_id, service_name)
+                for camera_id in sorted(streaming.list_streams())
+            ],
         })
     
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Prometheus scrape endpoint."""
+        return Response(
+            metrics.render_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+    
+    @app.route('/admin/profile/<camera_id>')
+    def admin_profile(camera_id: str):
+        """
+        Profile a camera worker.
+        
+        Query: seconds (default 10), mode=sample|cprofile, top (default 30)
+        """
+        denied = _check_admin(admin_token)
+        if denied is not None:
+            return denied
+        
+        seconds = request.args.get('seconds', 10.0, type=float)
+        top = request.args.get('top', profiling.DEFAULT_TOP, type=int)
+        mode = request.args.get('mode', 'sample')
+        
+        try:
+            if mode == 'sample':
+                report = profiling.sample_stacks(camera_id, seconds, top)
+            elif mode == 'cprofile':
+                report = profiling.profile_iterations(camera_id, seconds, top)
+            else:
+                return jsonify({'error': f'Unknown mode {mode!r} (sample|cprofile)'}), 400
+        except KeyError:
+            return jsonify({'error': 'Camera worker not running'}), 404
+        except profiling.ProfilerBusy as e:
+            return jsonify({'error': str(e)}), 409
+        except TimeoutError as e:
+            return jsonify({'error': str(e)}), 504
+        
+        logger.info(f'Profiled camera {camera_id} ({mode}, {report["seconds"]:.0f}s)')
+        return jsonify(report)
+    
+    @app.route('/admin/memory')
+    def admin_memory():
+        """
+        Diff memory allocations over a time window.
+        
+        Query: seconds (default 10), top (default 30)
+        """
+        denied = _check_admin(admin_token)
+        if denied is not None:
+            return denied
+        
+        seconds = request.args.get('seconds', 10.0, type=float)
+        top = request.args.get('top', profiling.DEFAULT_TOP, type=int)
+        try:
+            return jsonify(profiling.memory_diff(seconds, top))
+        except profiling.ProfilerBusy as e:
+            return jsonify({'error': str(e)}), 409
+    
     return app
 
 
+def _check_admin(admin_token: str) -> Optional[tuple]:
+    """
+    Authorize admin request.
+    
+    Args:
+        admin_token: Configured token
+    
+    Returns:
+        Error response tuple, or None if authorized
+    """
+    if not admin_token:
+        return jsonify({'error': 'Admin endpoints disabled (set ADMIN_TOKEN)'}), 404
+    
+    supplied = request.headers.get('X-Admin-Token') or request.args.get('token', '')
+    if not hmac.compare_digest(supplied.encode(), admin_token.encode()):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
 
 
-
-
-
-
+def _camera_status(camera_id: str, service_name: str) -> dict:
+    """
+    Build health payload for one camera.
+    
+    Args:
+        camera_id: Camera/stream identifier
+        service_name: Service name
+    
+    Returns:
+        Health dict
+    """
+    return {
+        'status': 'ok',
+        'streaming': streaming.is_streaming(stream_id=camera_id),
+        'viewers': streaming.get_subscriber_count(stream_id=camera_id),
+        'cameraId': camera_id,
+        'service': service_name,
+        'stats': metrics.get_stats(camera_id),
+    }
@@ -0,0 +1,6 @@
+"""
+Benchmarks package.
+
+Standalone performance benchmarks, run as modules, e.g.:
+    python -m recognition_service.benchmarks.tiled_detection
+"""
@@ -0,0 +1,162 @@
+"""
+Detection replay benchmark.
+
+Separates the expensive part of the pipeline (detection and embedding)
+from the cheap, frequently tuned part (tracking, matching, presence):
+- record: run the detector once over a video file and store every
+  face (bbox, landmarks, embedding, quality metrics) plus the employee
+  gallery in a .npz recording (see recognition/replay.py)
+- run: replay a recording through the real FaceTracker and
+  PresenceManager with any thresholds, thousands of frames per second
+
+Recordings can also be captured from live cameras with
+RECORD_DETECTIONS=/path/detections-{camera}.npz.
+
+Usage:
+    python -m recognition_service.benchmarks.detection_replay record entrance.mp4 \\
+        --output entrance.npz --backend-url http://localhost:3000
+    python -m recognition_service.benchmarks.detection_replay run entrance.npz \\
+        --env INSIGHTFACE_THRESHOLD=0.45 --env IN_THRESHOLD=2
+
+Prints a JSON report (events, recognized tracks, replay throughput).
+"""
+
+import argparse
+import json
+import os
+import time
+import cv2
+from typing import Any, Dict
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Record and replay detector output')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Service setting override (repeatable)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Run detector over a video file')
+    record.add_argument('video', type=str, help='Video file to process')
+    record.add_argument('--output', type=str, required=True, help='Recording file (.npz)')
+    record.add_argument('--backend-url', type=str, default=None,
+                        help='Backend for the employee gallery (default: BACKEND_URL)')
+    record.add_argument('--stride', type=int, default=1,
+                        help='Process every Nth frame (as the scheduler would)')
+
+    run = commands.add_parser('run', help='Replay recording through tracker and presence')
+    run.add_argument('recording', type=str, help='Recording file (.npz)')
+    run.add_argument('--repeat', type=int, default=1,
+                     help='Replay N times and report the fastest run')
+    run.add_argument('--events', action='store_true', help='Include event list in report')
+    run.add_argument('--output', type=str, default=None, help='Write JSON report to file')
+
+    return parser.parse_args()
+
+
+def record(args: argparse.Namespace) -> None:
+    """Detect faces in every processed video frame and save the recording."""
+    # Import after the environment is set
+    from ..config import load_config
+    from ..employees import load_employees_from_backend
+    from ..face_app import initialize_face_app
+    from ..recognition.detection import FaceDetector
+    from ..recognition.replay import DetectionRecorder
+    from ..tracing import FrameStamp
+
+    if args.backend_url:
+        os.environ['BACKEND_URL'] = args.backend_url
+    config = load_config()
+
+    face_app = initialize_face_app(config)
+    known_embeddings, known_ids = load_employees_from_backend(config, face_app)
+    if not known_ids:
+        raise SystemExit('No employees loaded from backend')
+
+    video_capture = cv2.VideoCapture(args.video)
+    if not video_capture.isOpened():
+        raise SystemExit(f'Cannot open video: {args.video}')
+    fps = video_capture.get(cv2.CAP_PROP_FPS) or 25.0
+
+    detector = FaceDetector(face_app, config)
+    recorder = DetectionRecorder(args.output, known_embeddings, known_ids, config)
+
+    # Frame times follow the video timeline, not processing speed
+    started = time.time()
+    frame_index = 0
+    try:
+        while True:
+            ret, frame = video_capture.read()
+            if not ret or frame is None or recorder.full:
+                break
+            frame_index += 1
+            if (frame_index - 1) % args.stride:
+                continue
+
+            captured_at = started + (frame_index - 1) / fps
+            stamp = FrameStamp(seq=frame_index, captured_at=captured_at, captured_mono=captured_at)
+            recorder.add(stamp, frame, detector.detect(frame))
+    finally:
+        detector.close()
+        video_capture.release()
+
+    recorder.save()
+
+
+def run(args: argparse.Namespace) -> None:
+    """Replay recording and print JSON report."""
+    # Import after the environment is set
+    from ..config import load_config
+    from ..recognition.replay import load_recording, replay_recording
+
+    config = load_config()
+    recording = load_recording(args.recording)
+
+    results = [replay_recording(recording, config) for _ in range(max(1, args.repeat))]
+    best = min(results, key=lambda result: result['replay_seconds'])
+    events = best['events']
+
+    report: Dict[str, Any] = {
+        'recording': args.recording,
+        'env': dict(item.split('=', 1) for item in args.env),
+        'frames': best['frames'],
+        'faces': best['faces'],
+        'employees': len(set(recording.gallery(0)[1])),
+        'tracks_created': best['tracks_created'],
+        'tracks_recognized': best['tracks_recognized'],
+        'events': {
+            'count': len(events),
+            'in': sum(1 for event in events if event['type'] == 'IN'),
+            'out': sum(1 for event in events if event['type'] == 'OUT'),
+            'employees': sorted({event['employeeId'] for event in events}),
+        },
+        'replay': {
+            'seconds': best['replay_seconds'],
+            'frames_per_second': best['frames_per_second'],
+        },
+    }
+    if args.events:
+        report['events']['list'] = events
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+
+
+def main() -> None:
+    """Run selected command."""
+    args = parse_args()
+
+    # Service settings (read by load_config)
+    os.environ.update(item.split('=', 1) for item in args.env)
+
+    if args.command == 'record':
+        record(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,480 @@
+"""
+End-to-end service benchmark.
+
+Runs the real MultiCameraManager (camera threads, video loop, HTTP
+server) against local stand-ins (see stand_in.py):
+- Fake backend serving employees, photos, the camera list and /api/events
+- MJPEG cameras replaying synthetic or recorded video in real time
+
+Synthetic video pastes the faces of the InsightFace sample image (the
+same faces are registered as employees) for a few seconds, then shows
+an empty scene, so every cycle produces IN and OUT events.
+
+Measured over a fixed window after warm-up:
+- Captured / processed FPS per camera
+- Per-stage latency (from the /metrics histograms)
+- CPU usage and RSS of the process
+- Event latency: frame capture → event received by the backend
+
+With --push-check, an employee is changed after the window and
+employee:updated is fired over the stand-in's Socket.IO endpoint; the
+run fails unless every camera re-fetches the employee list (polling is
+disabled for the run, so only EMPLOYEE_PUSH can pick it up).
+
+Usage:
+    python -m recognition_service.benchmarks.end_to_end --cameras 4 --duration 60 \\
+        --env TARGET_FPS=10 --output baseline.json
+
+Prints (or writes) a JSON report; compare two reports to spot regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from .. import metrics
+from .stand_in import FakeBackend, MjpegSource, iso_to_timestamp
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+COMPANY_SLUG = 'bench'
+
+# Presence thresholds used unless overridden with --env
+DEFAULT_ENV = {
+    'IN_THRESHOLD': '1.0',
+    'OUT_THRESHOLD': '3.0',
+}
+
+# Settings for --push-check (polling must not pick the change up)
+PUSH_CHECK_ENV = {
+    'EMPLOYEE_PUSH': 'true',
+    'RELOAD_INTERVAL': '3600',
+}
+
+# Max seconds from employee:updated until every camera reloaded
+PUSH_CHECK_TIMEOUT = 30.0
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='End-to-end recognition service benchmark')
+    parser.add_argument('--cameras', type=int, default=1, help='Number of cameras')
+    parser.add_argument('--duration', type=float, default=60.0, help='Measurement window (seconds)')
+    parser.add_argument('--warmup', type=float, default=5.0,
+                        help='Seconds to wait after all cameras processed their first frame')
+    parser.add_argument('--startup-timeout', type=float, default=600.0,
+                        help='Max seconds for model loading and employee embedding')
+    parser.add_argument('--video', type=str, default=None,
+                        help='Recorded video to replay instead of synthetic frames')
+    parser.add_argument('--image', type=str, default=None,
+                        help='Image with faces for synthetic video and employee photos '
+                             '(default: InsightFace sample t1)')
+    parser.add_argument('--width', type=int, default=1280, help='Synthetic frame width')
+    parser.add_argument('--height', type=int, default=720, help='Synthetic frame height')
+    parser.add_argument('--fps', type=float, default=25.0, help='Source camera FPS')
+    parser.add_argument('--present', type=float, default=4.0, help='Seconds faces are visible per cycle')
+    parser.add_argument('--absent', type=float, default=6.0, help='Seconds of empty scene per cycle')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Service setting override (repeatable)')
+    parser.add_argument('--push-check', action='store_true',
+                        help='Fire employee:updated after the window and require every camera to reload')
+    parser.add_argument('--label', type=str, default='', help='Free-form run label')
+    parser.add_argument('--output', type=str, default=None, help='Write JSON report to file')
+    return parser.parse_args()
+
+
+def load_source_faces(image_path: Optional[str]) -> List[np.ndarray]:
+    """
+    Cut faces (with generous margin) out of the source image.
+
+    Returns:
+        List of BGR face crops
+    """
+    # Import here: InsightFace is only needed to prepare the inputs
+    from insightface.app import FaceAnalysis
+
+    if image_path:
+        image = cv2.imread(image_path)
+    else:
+        from insightface.data import get_image
+        image = get_image('t1')
+
+    # Detection only, released before measuring (keeps RSS numbers honest)
+    detector = FaceAnalysis(allowed_modules=['detection'], providers=['CPUExecutionProvider'])
+    detector.prepare(ctx_id=0, det_size=(640, 640))
+
+    crops = []
+    for face in detector.get(image):
+        x1, y1, x2, y2 = face.bbox.astype(int)
+        margin = int((y2 - y1) * 0.6)
+        crops.append(image[
+            max(0, y1 - margin):min(image.shape[0], y2 + margin),
+            max(0, x1 - margin):min(image.shape[1], x2 + margin)
+        ].copy())
+    return crops
+
+
+def build_synthetic_frames(
+    faces: List[np.ndarray],
+    width: int,
+    height: int,
+    fps: float,
+    present: float,
+    absent: float
+) -> List[np.ndarray]:
+    """
+    Build one presence cycle: faces drifting in a row, then an empty scene.
+
+    Returns:
+        List of BGR frames
+    """
+    rng = np.random.default_rng(0)
+    background = rng.integers(70, 150, size=(height // 16, width // 16, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(cv2.resize(background, (width, height)), (0, 0), 5)
+
+    slot = width // max(1, len(faces))
+    face_height = min(height // 3, int(slot * 1.2))
+    scaled = []
+    for crop in faces:
+        scale = face_height / crop.shape[0]
+        resized = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        scaled.append(resized[:, :slot - 8])
+
+    frames = []
+    for index in range(int(present * fps)):
+        frame = background.copy()
+        drift = int(10 * np.sin(2 * np.pi * index / fps))
+        for slot_index, face in enumerate(scaled):
+            fh, fw = face.shape[:2]
+            x = slot_index * slot + (slot - fw) // 2
+            y = (height - fh) // 2 + drift
+            frame[y:y + fh, x:x + fw] = face
+        frames.append(frame)
+
+    frames.extend([background] * int(absent * fps))
+    return frames
+
+
+def load_video_frames(path: str) -> List[np.ndarray]:
+    """Read all frames of a recorded video."""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise SystemExit(f'No frames read from {path}')
+    return frames
+
+
+def read_rss_mb() -> Optional[float]:
+    """
+    Current resident set size (MB), falling back to peak RSS off Linux.
+
+    Returns:
+        RSS in MB, or None where neither is available (Windows)
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def cpu_seconds() -> float:
+    """User + system CPU time of the process (all threads, any platform)."""
+    return time.process_time()
+
+
+def histogram_quantile(counts: List[int], quantile: float) -> float:
+    """
+    Estimate a quantile from bucket counts (linear within the bucket).
+
+    Returns:
+        Quantile in seconds (upper bound of last finite bucket if beyond it)
+    """
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    rank = quantile * total
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(metrics.LATENCY_BUCKETS, counts):
+        if cumulative + count >= rank and count:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return metrics.LATENCY_BUCKETS[-1]
+
+
+def percentiles_ms(values: List[float]) -> Dict[str, float]:
+    """p50/p95/max of a list of seconds, in milliseconds."""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    return {
+        'p50': float(np.percentile(values, 50) * 1000),
+        'p95': float(np.percentile(values, 95) * 1000),
+        'max': float(max(values) * 1000),
+    }
+
+
+def stage_report(
+    before: Dict[Tuple, Tuple],
+    after: Dict[Tuple, Tuple]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Per-stage latency over the window (all cameras combined).
+
+    Args:
+        before: Histograms at window start
+        after: Histograms at window end
+
+    Returns:
+        Dict stage → count, mean/p50/p95 in ms
+    """
+    combined: Dict[str, Tuple[List[int], float, int]] = {}
+    for key, (counts, total, count) in after.items():
+        name, _, labels = key
+        if name != 'stage_latency_seconds':
+            continue
+        start_counts, start_total, start_count = before.get(key, ([0] * len(counts), 0.0, 0))
+        stage = dict(labels)['stage']
+        acc = combined.setdefault(stage, ([0] * len(counts), 0.0, 0))
+        combined[stage] = (
+            [a + c - s for a, c, s in zip(acc[0], counts, start_counts)],
+            acc[1] + total - start_total,
+            acc[2] + count - start_count,
+        )
+
+    return {
+        stage: {
+            'count': count,
+            'mean_ms': total / count * 1000 if count else 0.0,
+            'p50_ms': histogram_quantile(counts, 0.5) * 1000,
+            'p95_ms': histogram_quantile(counts, 0.95) * 1000,
+        }
+        for stage, (counts, total, count) in sorted(combined.items())
+    }
+
+
+def wait_for_cameras(camera_ids: List[str], timeout: float) -> None:
+    """Block until every camera processed at least one frame."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        counters = metrics.snapshot()['counters']
+        if all(counters.get(('frames_processed', cid), 0) > 0 for cid in camera_ids):
+            return
+        time.sleep(1.0)
+    raise SystemExit(f'Cameras not processing after {timeout:.0f}s')
+
+
+def check_push_reload(backend: FakeBackend, camera_count: int) -> Dict[str, Any]:
+    """
+    Change an employee, fire employee:updated and wait for the reloads.
+
+    Args:
+        backend: Running stand-in backend
+        camera_count: Cameras that must re-fetch the employee list
+
+    Returns:
+        Dict with Socket.IO client count and reload latency (seconds)
+
+    Raises:
+        SystemExit: If no client connected or not every camera reloaded in time
+    """
+    deadline = time.monotonic() + PUSH_CHECK_TIMEOUT
+    while not backend.push_clients:
+        if time.monotonic() > deadline:
+            raise SystemExit('No Socket.IO client connected (EMPLOYEE_PUSH needs python-socketio[client])')
+        time.sleep(0.1)
+
+    fetched_before = backend.list_requests['full']
+    employee = backend.employees[0]
+    employee['name'] = f"{employee['name']} (updated)"
+    started = time.monotonic()
+    backend.emit('employee:updated', employee)
+
+    deadline = started + PUSH_CHECK_TIMEOUT
+    while backend.list_requests['full'] - fetched_before < camera_count:
+        if time.monotonic() > deadline:
+            raise SystemExit(
+                f'employee:updated not picked up by every camera within {PUSH_CHECK_TIMEOUT:.0f}s '
+                f'({backend.list_requests["full"] - fetched_before}/{camera_count} reloads)'
+            )
+        time.sleep(0.05)
+    return {
+        'clients': len(backend.push_clients),
+        'reload_s': time.monotonic() - started,
+    }
+
+
+def main() -> None:
+    """Run benchmark and print JSON report."""
+    args = parse_args()
+
+    # Service settings (read by load_config in every camera thread)
+    overrides = dict(DEFAULT_ENV)
+    if args.push_check:
+        overrides.update(PUSH_CHECK_ENV)
+    overrides.update(item.split('=', 1) for item in args.env)
+    os.environ.update(overrides)
+    os.environ['EVENT_TRACE'] = 'true'
+
+    # Embedding cache and store in a scratch directory, so runs neither
+    # reuse nor overwrite the service's files
+    cache_dir = tempfile.mkdtemp(prefix='recognition-bench-')
+    os.environ['CACHE_FILE'] = os.path.join(cache_dir, 'cache.bin')
+    os.environ['EMBEDDING_STORE'] = os.path.join(cache_dir, 'store.db')
+    try:
+        run_benchmark(args, overrides)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def run_benchmark(args: argparse.Namespace, overrides: Dict[str, str]) -> None:
+    """
+    Start service and stand-ins, measure and print JSON report.
+
+    Args:
+        args: Parsed command line arguments
+        overrides: Service environment overrides (included in the report)
+    """
+    # Import after the environment is set
+    from ..multi_camera_manager import MultiCameraManager
+
+    faces = load_source_faces(args.image)
+    if not faces:
+        raise SystemExit('No faces found in source image')
+
+    if args.video:
+        frames = load_video_frames(args.video)
+    else:
+        frames = build_synthetic_frames(
+            faces, args.width, args.height, args.fps, args.present, args.absent
+        )
+
+    photos = {
+        index + 1: cv2.imencode('.jpg', face)[1].tobytes()
+        for index, face in enumerate(faces)
+    }
+
+    source = MjpegSource(frames, fps=args.fps, cameras=args.cameras)
+    source.start()
+    camera_ids = [str(index) for index in range(1, args.cameras + 1)]
+    backend = FakeBackend(photos, cameras=[
+        {'id': int(cid), 'name': f'Bench {cid}', 'location': 'bench',
+         'streamUrl': source.camera_url(int(cid))}
+        for cid in camera_ids
+    ])
+    backend.start()
+
+    manager = MultiCameraManager(COMPANY_SLUG, backend.url, refresh_interval=3600, video_port=0)
+    manager_thread = threading.Thread(target=manager.run, daemon=True, name='Bench-Manager')
+    manager_thread.start()
+
+    try:
+        wait_for_cameras(camera_ids, args.startup_timeout)
+        time.sleep(args.warmup)
+
+        # Measurement window
+        rss_samples = [read_rss_mb()]
+        before = metrics.snapshot()
+        events_before = len(backend.get_events())
+        cpu_start, wall_start = cpu_seconds(), time.monotonic()
+
+        deadline = wall_start + args.duration
+        while time.monotonic() < deadline:
+            time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+            rss_samples.append(read_rss_mb())
+
+        cpu_used, wall = cpu_seconds() - cpu_start, time.monotonic() - wall_start
+        after = metrics.snapshot()
+        events = backend.get_events()[events_before:]
+
+        push = check_push_reload(backend, args.cameras) if args.push_check else None
+    finally:
+        manager.stop()
+        manager_thread.join(timeout=30)
+        source.stop()
+        backend.stop()
+
+    def rate(name: str, cid: str) -> float:
+        delta = after['counters'].get((name, cid), 0) - before['counters'].get((name, cid), 0)
+        return delta / wall
+
+    event_latencies = [
+        event['receivedAt'] - iso_to_timestamp(event['trace']['capturedAt'])
+        for event in events if 'trace' in event
+    ]
+
+    report: Dict[str, Any] = {
+        'label': args.label,
+        'setup': {
+            'cameras': args.cameras,
+            'duration_s': round(wall, 2),
+            'source': args.video or f'synthetic {args.width}x{args.height}',
+            'source_fps': args.fps,
+            'employees': len(photos),
+            'env': overrides,
+        },
+        'system': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'fps': {
+            'per_camera': {
+                cid: {
+                    'captured': rate('frames_captured', cid),
+                    'processed': rate('frames_processed', cid),
+                    'motion_skipped': rate('frames_motion_skipped', cid),
+                }
+                for cid in camera_ids
+            },
+            'processed_total': sum(rate('frames_processed', cid) for cid in camera_ids),
+        },
+        'stages': stage_report(before['histograms'], after['histograms']),
+        'cpu': {
+            'cores_used': cpu_used / wall,
+            'percent_of_machine': 100.0 * cpu_used / wall / (os.cpu_count() or 1),
+        },
+        'rss_mb': {
+            'start': rss_samples[0],
+            'end': rss_samples[-1],
+            'peak': max(rss_samples),
+        } if None not in rss_samples else None,
+        'push': push,
+        'events': {
+            'count': len(events),
+            'in': sum(1 for event in events if event.get('type') == 'IN'),
+            'out': sum(1 for event in events if event.get('type') == 'OUT'),
+            'latency_ms': percentiles_ms(event_latencies),
+        },
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+"""
+Local stand-ins for the backend and cameras.
+
+Used by benchmarks (and handy for manual testing) to run the real
+recognition service without the Node backend or physical cameras:
+- FakeBackend: /api/employees (with ETag / Last-Modified validation),
+  employee photos, /api/events, the public camera list used by
+  MultiCameraManager and a minimal Socket.IO endpoint (websocket
+  transport only) emitting employee change notifications (EMPLOYEE_PUSH)
+- MjpegSource: MJPEG-over-HTTP cameras replaying pre-encoded frames
+  at a fixed FPS (one endpoint per camera: /camera/<n>)
+
+Both are stdlib HTTP servers running in daemon threads; port 0 picks
+a free port.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+BOUNDARY = b'frame'
+
+# RFC 6455 handshake GUID
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# Engine.IO ping interval / timeout announced to clients (milliseconds)
+PING_INTERVAL_MS = 25000
+PING_TIMEOUT_MS = 20000
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """Request handler without per-request stderr logging."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode(), 'application/json')
+
+
+class _Server:
+    """ThreadingHTTPServer in a daemon thread."""
+
+    def __init__(self, handler: type, host: str, port: int):
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.host = host
+        self.port = self.httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f'http://{self.host}:{self.port}'
+
+    def start(self) -> None:
+        """Serve in background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True, name=type(self).__name__
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Shut down server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeBackend(_Server):
+    """
+    Minimal backend API.
+
+    Employees are served with photoUrl pointing to /photos/<id>.jpg
+    (edit `employees` freely; validators follow the content). Received
+    events are recorded with their arrival time, and employee list
+    requests are counted by outcome in `list_requests`. Change
+    notifications are sent to Socket.IO clients with emit().
+    """
+
+    def __init__(
+        self,
+        photos: Dict[int, bytes],
+        cameras: Optional[List[Dict[str, Any]]] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        socket_path: str = '/ws'
+    ):
+        """
+        Initialize backend.
+
+        Args:
+            photos: Employee ID to JPEG bytes
+            cameras: Camera dicts for /api/cameras/public/<slug>/cameras
+            host: Listen address
+            port: Listen port (0 = any free port)
+            socket_path: Socket.IO path (SOCKET_PATH of the service)
+        """
+        super().__init__(_BackendHandler, host, port)
+        self.photos = photos
+        self.cameras = cameras or []
+        self.socket_path = socket_path.rstrip('/')
+        self.push_clients: List['_SocketIOClient'] = []
+        self.employees = [
+            {'id': emp_id, 'name': f'Employee {emp_id}', 'role': 'bench',
+             'photoUrl': f'/photos/{emp_id}.jpg'}
+            for emp_id in sorted(photos)
+        ]
+        self.events: List[Dict[str, Any]] = []
+        self._events_lock = threading.Lock()
+        self.list_requests = {'full': 0, 'not_modified': 0}
+        self._list_etag = ''
+        self._list_modified = 0
+
+    def record_event(self, payload: Dict[str, Any]) -> None:
+        """Store received event with arrival time (wall clock)."""
+        with self._events_lock:
+            self.events.append({'receivedAt': time.time(), **payload})
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        """Get copy of received events."""
+        with self._events_lock:
+            return list(self.events)
+
+    def emit(self, event: str, payload: Dict[str, Any]) -> int:
+        """
+        Send Socket.IO event to all connected clients.
+
+        Args:
+            event: Event name, e.g. 'employee:updated'
+            payload: Event payload
+
+        Returns:
+            Number of clients the event was sent to
+        """
+        with self._events_lock:
+            clients = list(self.push_clients)
+        packet = '42' + json.dumps([event, payload])
+        return sum(1 for client in clients if client.send_text(packet))
+
+    def employee_list(self) -> Tuple[bytes, str, int]:
+        """
+        Serialize employees with validators.
+
+        Returns:
+            Tuple of (JSON body, ETag, Last-Modified as epoch seconds)
+        """
+        with self._events_lock:
+            body = json.dumps(self.employees).encode()
+            etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+            if etag != self._list_etag:
+                self._list_etag = etag
+                # HTTP dates have 1 s resolution: make every change visible
+                self._list_modified = max(int(time.time()), self._list_modified + 1)
+            return body, etag, self._list_modified
+
+
+class _BackendHandler(_QuietHandler):
+    """Routes of FakeBackend."""
+
+    PHOTO_ROUTE = re.compile(r'^/photos/(\d+)\.jpg$')
+    CAMERAS_ROUTE = re.compile(r'^/api/cameras/public/[^/]+/cameras$')
+
+    def do_GET(self) -> None:
+        backend: FakeBackend = self.server.owner
+        path = self.path.split('?', 1)[0]
+
+        if path == '/api/employees':
+            self._send_employees(backend)
+            return
+
+        if path.rstrip('/') == backend.socket_path:
+            self._serve_socketio(backend)
+            return
+
+        if self.CAMERAS_ROUTE.match(path):
+            self._send_json(backend.cameras)
+            return
+
+        match = self.PHOTO_ROUTE.match(path)
+        if match and int(match.group(1)) in backend.photos:
+            self._send(200, backend.photos[int(match.group(1))], 'image/jpeg')
+            return
+
+        self._send_json({'error': 'Not found'}, 404)
+
+    def _send_employees(self, backend: FakeBackend) -> None:
+        """Employee list, 304 if the client's validators still match."""
+        body, etag, modified = backend.employee_list()
+
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(',')]
+        elif if_modified_since is not None:
+            try:
+                not_modified = parsedate_to_datetime(if_modified_since).timestamp() >= modified
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+
+        with backend._events_lock:
+            backend.list_requests['not_modified' if not_modified else 'full'] += 1
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_socketio(self, backend: FakeBackend) -> None:
+        """Socket.IO session over a websocket (until the client disconnects)."""
+        key = self.headers.get('Sec-WebSocket-Key')
+        if self.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            self._send_json({'error': 'Only the websocket transport is supported'}, 400)
+            return
+
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest())
+        self.send_header('Sec-WebSocket-Accept', accept.decode())
+        self.end_headers()
+        self.close_connection = True
+
+        client = _SocketIOClient(self.wfile)
+        sid = base64.urlsafe_b64encode(hashlib.md5(key.encode()).digest()[:12]).decode()
+        client.send_text('0' + json.dumps({
+            'sid': sid, 'upgrades': [], 'pingInterval': PING_INTERVAL_MS,
+            'pingTimeout': PING_TIMEOUT_MS, 'maxPayload': 1000000,
+        }))
+        threading.Thread(target=client.ping_loop, daemon=True, name='FakeBackend-Ping').start()
+        try:
+            while True:
+                message = client.read_text(self.rfile)
+                if message is None or message in ('1', '41'):
+                    break
+                if message.startswith('40'):
+                    # Namespace connect: from now on the client receives events
+                    client.send_text('40' + json.dumps({'sid': sid}))
+                    with backend._events_lock:
+                        backend.push_clients.append(client)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            client.close()
+            with backend._events_lock:
+                if client in backend.push_clients:
+                    backend.push_clients.remove(client)
+
+    def do_POST(self) -> None:
+        backend: FakeBackend = self.server.owner
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+
+        if self.path.split('?', 1)[0] == '/api/events':
+            backend.record_event(json.loads(body or b'{}'))
+            self._send_json({'ok': True})
+            return
+
+        self._send_json({'error': 'Not found'}, 404)
+
+
+class _SocketIOClient:
+    """Websocket connection of one Socket.IO client (Engine.IO v4 framing)."""
+
+    def __init__(self, wfile: Any):
+        self.wfile = wfile
+        self.closed = threading.Event()
+        self._lock = threading.Lock()
+
+    def send_text(self, text: str) -> bool:
+        """Send text frame (server frames are unmasked); False if closed."""
+        payload = text.encode()
+        if len(payload) < 126:
+            header = struct.pack('!BB', 0x81, len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack('!BBH', 0x81, 126, len(payload))
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, len(payload))
+        with self._lock:
+            if self.closed.is_set():
+                return False
+            try:
+                self.wfile.write(header + payload)
+                self.wfile.flush()
+            except OSError:
+                self.closed.set()
+                return False
+        return True
+
+    def read_text(self, rfile: Any) -> Optional[str]:
+        """
+        Read next text message (answers websocket pings).
+
+        Returns:
+            Message, or None on close or EOF
+        """
+        while True:
+            head = rfile.read(2)
+            if len(head) < 2:
+                return None
+            opcode, length = head[0] & 0x0F, head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', rfile.read(8))[0]
+            mask = rfile.read(4) if head[1] & 0x80 else b'\0\0\0\0'
+            data = bytes(byte ^ mask[i % 4] for i, byte in enumerate(rfile.read(length)))
+
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                with self._lock:
+                    self.wfile.write(struct.pack('!BB', 0x8A, len(data)) + data)
+                    self.wfile.flush()
+            elif opcode == 0x1:
+                return data.decode()
+
+    def ping_loop(self) -> None:
+        """Send Engine.IO pings so the client does not time out."""
+        while not self.closed.wait(PING_INTERVAL_MS / 1000.0):
+            self.send_text('2')
+
+    def close(self) -> None:
+        """Stop sending (the handler closes the socket)."""
+        self.closed.set()
+
+
+class MjpegSource(_Server):
+    """
+    MJPEG cameras replaying a frame sequence in a loop.
+
+    Frames are JPEG-encoded once up front so the source itself costs
+    almost nothing while the service is measured.
+    """
+
+    def __init__(
+        self,
+        frames: Sequence[np.ndarray],
+        fps: float = 25.0,
+        cameras: int = 1,
+        quality: int = 90,
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        """
+        Initialize source.
+
+        Args:
+            frames: BGR frames to replay
+            fps: Playback rate
+            cameras: Number of camera endpoints (/camera/1..N, same content)
+            quality: JPEG quality of the pre-encoded frames
+            host: Listen address
+            port: Listen port (0 = any free port)
+        """
+        super().__init__(_MjpegHandler, host, port)
+        self.fps = fps
+        self.cameras = cameras
+        self.chunks = [
+            b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n\r\n' +
+            cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes() +
+            b'\r\n'
+            for frame in frames
+        ]
+        self.started = time.monotonic()
+
+    def camera_url(self, index: int) -> str:
+        """URL of camera endpoint (1-based)."""
+        return f'{self.url}/camera/{index}'
+
+
+class _MjpegHandler(_QuietHandler):
+    """Streams MjpegSource frames in real time (live-camera semantics)."""
+
+    protocol_version = 'HTTP/1.0'
+    CAMERA_ROUTE = re.compile(r'^/camera/(\d+)$')
+
+    def do_GET(self) -> None:
+        source: MjpegSource = self.server.owner
+        match = self.CAMERA_ROUTE.match(self.path)
+        if not match or not 1 <= int(match.group(1)) <= source.cameras:
+            self._send_json({'error': 'Not found'}, 404)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY.decode()}')
+        self.end_headers()
+
+        interval = 1.0 / source.fps
+        try:
+            while True:
+                # Position follows wall time, as with a live camera
+                elapsed = time.monotonic() - source.started
+                index = int(elapsed * source.fps) % len(source.chunks)
+                self.wfile.write(source.chunks[index])
+                time.sleep(interval - (elapsed % interval))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def iso_to_timestamp(value: str) -> float:
+    """Parse ISO-8601 timestamp (as sent in event traces) to epoch seconds."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
@@ -0,0 +1,188 @@
+"""
+Tiled vs single-pass detection benchmark.
+
+Builds a synthetic high-resolution frame with faces pasted at known
+sizes and positions, then compares single-pass and tiled detection:
+- Recall per face size bucket
+- Detection latency (median / p95)
+
+Usage:
+    python -m recognition_service.benchmarks.tiled_detection \\
+        --width 3840 --height 2160 --sizes 16,24,32,48,64,96
+
+Prints a JSON report to stdout.
+"""
+
+import argparse
+import dataclasses
+import json
+import time
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from ..config import Config, load_config
+from ..face_app import initialize_face_app
+from ..recognition.detection import FaceDetector
+from ..recognition.tracker import compute_iou
+
+# IoU needed for a detection to count as finding a ground-truth face
+MATCH_IOU = 0.3
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Tiled vs single-pass detection benchmark')
+    parser.add_argument('--image', type=str, default=None,
+                        help='Image with faces to paste (default: InsightFace sample t1)')
+    parser.add_argument('--width', type=int, default=3840, help='Frame width')
+    parser.add_argument('--height', type=int, default=2160, help='Frame height')
+    parser.add_argument('--sizes', type=str, default='16,24,32,48,64,96',
+                        help='Comma-separated face heights (pixels)')
+    parser.add_argument('--faces-per-size', type=int, default=8, help='Faces pasted per size')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per mode')
+    parser.add_argument('--overlap', type=int, default=128, help='Tile overlap (pixels)')
+    parser.add_argument('--workers', type=int, default=2, help='Tile worker threads')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    return parser.parse_args()
+
+
+def extract_face_crops(face_app: Any, image: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Cut faces (with margin) out of a source image.
+
+    Returns:
+        List of (crop, face bbox within crop)
+    """
+    crops = []
+    for face in face_app.get(image):
+        x1, y1, x2, y2 = face.bbox.astype(int)
+        margin = int((y2 - y1) * 0.3)
+        cx1, cy1 = max(0, x1 - margin), max(0, y1 - margin)
+        cx2, cy2 = min(image.shape[1], x2 + margin), min(image.shape[0], y2 + margin)
+        crop = image[cy1:cy2, cx1:cx2].copy()
+        bbox = np.array([x1 - cx1, y1 - cy1, x2 - cx1, y2 - cy1], dtype=np.float32)
+        crops.append((crop, bbox))
+    return crops
+
+
+def build_frame(
+    crops: List[Tuple[np.ndarray, np.ndarray]],
+    width: int,
+    height: int,
+    sizes: List[int],
+    faces_per_size: int,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, List[Tuple[int, np.ndarray]]]:
+    """
+    Paste scaled faces onto a textured canvas on a jittered grid.
+
+    Returns:
+        Tuple of (frame, ground truth list of (size, bbox))
+    """
+    frame = rng.integers(80, 140, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(cv2.resize(frame, (width, height)), (0, 0), 3)
+
+    total = len(sizes) * faces_per_size
+    cols = int(np.ceil(np.sqrt(total * width / height)))
+    rows = int(np.ceil(total / cols))
+    cell_w, cell_h = width // cols, height // rows
+
+    ground_truth = []
+    for index in range(total):
+        size = sizes[index % len(sizes)]
+        crop, bbox = crops[index % len(crops)]
+        scale = size / (bbox[3] - bbox[1])
+        scaled = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        sh, sw = scaled.shape[:2]
+        if sw >= cell_w or sh >= cell_h:
+            continue
+
+        row, col = divmod(index, cols)
+        x = col * cell_w + int(rng.integers(0, cell_w - sw))
+        y = row * cell_h + int(rng.integers(0, cell_h - sh))
+        frame[y:y + sh, x:x + sw] = scaled
+        ground_truth.append((size, bbox * scale + np.array([x, y, x, y], dtype=np.float32)))
+
+    return frame, ground_truth
+
+
+def run_mode(
+    face_app: Any,
+    config: Config,
+    frame: np.ndarray,
+    ground_truth: List[Tuple[int, np.ndarray]],
+    runs: int
+) -> Dict[str, Any]:
+    """
+    Benchmark one detector configuration.
+
+    Returns:
+        Dict with latency stats and recall per size
+    """
+    detector = FaceDetector(face_app, config)
+    faces = detector.detect(frame)  # warm-up
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        faces = detector.detect(frame)
+        latencies.append(time.perf_counter() - start)
+    detector.close()
+
+    found: Dict[int, List[bool]] = {}
+    for size, gt_bbox in ground_truth:
+        hit = any(compute_iou(gt_bbox, face.bbox) >= MATCH_IOU for face in faces)
+        found.setdefault(size, []).append(hit)
+
+    return {
+        'latency_ms_median': float(np.median(latencies) * 1000),
+        'latency_ms_p95': float(np.percentile(latencies, 95) * 1000),
+        'detections': len(faces),
+        'recall': float(np.mean([hit for hits in found.values() for hit in hits])),
+        'recall_by_size': {str(size): float(np.mean(hits)) for size, hits in sorted(found.items())},
+    }
+
+
+def main() -> None:
+    """Run benchmark and print JSON report."""
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    base_config = dataclasses.replace(
+        load_config(),
+        detection_roi='',
+        tile_overlap=args.overlap,
+        tile_workers=args.workers,
+    )
+    face_app = initialize_face_app(base_config)
+
+    if args.image:
+        source = cv2.imread(args.image)
+    else:
+        from insightface.data import get_image
+        source = get_image('t1')
+    crops = extract_face_crops(face_app, source)
+    if not crops:
+        raise SystemExit('No faces found in source image')
+
+    frame, ground_truth = build_frame(crops, args.width, args.height, sizes, args.faces_per_size, rng)
+
+    report = {
+        'frame': f'{args.width}x{args.height}',
+        'det_size': list(base_config.insightface_det_size),
+        'faces': len(ground_truth),
+        'single_pass': run_mode(
+            face_app, dataclasses.replace(base_config, tiled_detection=False),
+            frame, ground_truth, args.runs
+        ),
+        'tiled': run_mode(
+            face_app, dataclasses.replace(base_config, tiled_detection=True),
+            frame, ground_truth, args.runs
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
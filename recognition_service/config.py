@@ -24,11 +24,20 @@ class Config:
             - RTSP URL: rtsp://user:pass@ip:port/path
             - HTTP URL: http://camera-gateway:4000/streams/1.mjpg
         camera_id: Logical identifier for this camera (for logging/monitoring)
-        frame_skip: Process every N-th frame (higher = faster, less accurate)
+    
+    Frame Scheduling:
+        target_fps: Processing rate while faces are tracked in the scene
+        idle_fps: Processing rate when the scene is empty
+        cpu_budget: Max share of wall time spent processing (0 = unlimited)
+    
+    Motion Gating:
+        motion_gate_enabled: Skip detection on static scenes without tracks
+        motion_threshold: Fraction of changed pixels counted as motion
+        motion_heartbeat_seconds: Max interval between detections on static scenes
     
     Service Identity:
         service_name: Name of this service instance
-        video_port: Port for Flask HTTP server
+        video_port: Port of the shared HTTP server (all cameras)
     
     Quality Thresholds:
         min_face_height_pixels: Minimum face height in pixels to process
@@ -41,21 +50,48 @@ class Config:
     
     Recognition:
         insightface_threshold: Cosine similarity threshold (lower = stricter)
-        insightface_det_size: Detection size for InsightFace (width, height)
+        insightface_det_size: Detection size for InsightFace (width, height), upper bound when tuned
+        auto_det_size: Shrink detection size per camera when observed faces are large
+        detection_roi: Detection zones spec (empty = full frame, see recognition/roi.py)
+        tiled_detection: Detect on overlapping native-scale tiles (high-res cameras)
+        tile_overlap: Overlap between neighbouring tiles (pixels)
+        tile_workers: Threads running tile detection in parallel
     
     Tracking:
-        min_embeddings_per_track: Minimum embeddings before recognition attempt
+        min_embeddings_per_track: Embeddings before a regular recognition attempt
+        early_accept_threshold: Match confidence that resolves a track from its first embedding (0 = off)
+        recognition_backoff_max: Max new embeddings between attempts on unmatched tracks
+        reverify_interval: Seconds until a recognized track's identity is first re-verified (0 = off)
+        reverify_interval_max: Upper bound of the doubling re-verification interval
+        handoff_window_seconds: How long identities seen on one camera are offered to neighbours (0 = off)
+        handoff_threshold: Cosine similarity required to take over a neighbouring camera's identity
+        camera_adjacency: Neighbouring camera pairs, e.g. "1-2,2-3" (empty = all cameras)
         track_max_age_seconds: Maximum age of track without updates
         iou_threshold: IoU threshold for bbox matching
+        recent_match_size: Recently recognized employees checked before the full gallery (0 = off)
+        recent_match_threshold: Cosine similarity required for a recent match (stricter than insightface_threshold)
+        recent_match_ttl_seconds: Recent match entries expire after this long without a match
     
     Presence Logic:
         in_threshold_seconds: Stable presence time before IN event
         out_threshold_seconds: Absence time before OUT event
+        event_trace: Include frame trace (sequence, capture time, latency) in event payloads
     
     System:
         reload_employees_interval: Seconds between employee list reloads
+        employee_push: Reload on backend employee change notifications (Socket.IO)
+        socket_path: Socket.IO path of the backend realtime layer
+        gallery_download_workers: Concurrent photo downloads during gallery builds
+        gallery_workers: Threads decoding, preprocessing and detecting photos
+        gallery_batch_size: Face crops per recognition model call
         cache_file: Path to embeddings cache file
+        embedding_store: SQLite file of photo embeddings by content hash (empty = disabled)
+        embedding_store_max_entries: Embedding store entries kept (least recently used evicted)
         debug_mode: Enable debug logging
+        admin_token: Token required by /admin endpoints (empty = endpoints disabled)
+        record_detections: Detection recording file for replay, {camera} is
+            replaced by the camera ID (empty = off)
+        record_max_frames: Frames recorded before the recording stops (0 = unlimited)
     """
     
     # Backend
@@ -64,7 +100,16 @@ class Config:
     # Camera
     camera_source: str
     camera_id: str
-    frame_skip: int
+    
+    # Scheduling
+    target_fps: float
+    idle_fps: float
+    cpu_budget: float
+    
+    # Motion gating
+    motion_gate_enabled: bool
+    motion_threshold: float
+    motion_heartbeat_seconds: float
     
     # Service
     service_name: str
@@ -82,20 +127,62 @@ class Config:
     # InsightFace
     insightface_threshold: float
     insightface_det_size: Tuple[int, int]
+    auto_det_size: bool
+    detection_roi: str
+    tiled_detection: bool
+    tile_overlap: int
+    tile_workers: int
     
     # Tracking
     min_embeddings_per_track: int
+    early_accept_threshold: float
+    recognition_backoff_max: int
+    reverify_interval: float
+    reverify_interval_max: float
+    handoff_window_seconds: float
+    handoff_threshold: float
+    camera_adjacency: str
     track_max_age_seconds: float
     iou_threshold: float
+    recent_match_size: int
+    recent_match_threshold: float
+    recent_match_ttl_seconds: float
     
     # Presence
     in_threshold_seconds: float
     out_threshold_seconds: float
+    event_trace: bool
     
     # System
     reload_employees_interval: int
+    employee_push: bool
+    socket_path: str
+    gallery_download_workers: int
+    gallery_workers: int
+    gallery_batch_size: int
     cache_file: str
+    embedding_store: str
+    embedding_store_max_entries: int
     debug_mode: bool
+    admin_token: str
+    record_detections: str
+    record_max_frames: int
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    """
+    Parse size from "640" or "640x480" format.
+    
+    Args:
+        value: Size string
+    
+    Returns:
+        Tuple of (width, height)
+    """
+    if 'x' in value.lower():
+        width, height = value.lower().split('x', 1)
+        return int(width), int(height)
+    return int(value), int(value)
 
 
 def load_config() -> Config:
@@ -115,11 +202,20 @@ def load_config() -> Config:
         # Camera
         camera_source=camera_source_raw,
         camera_id=os.getenv('CAMERA_ID', camera_source_raw),
-        frame_skip=int(os.getenv('FRAME_SKIP', '3')),
+        
+        # Scheduling
+        target_fps=float(os.getenv('TARGET_FPS', '10.0')),
+        idle_fps=float(os.getenv('IDLE_FPS', '2.0')),
+        cpu_budget=float(os.getenv('CPU_BUDGET', '0.75')),
+        
+        # Motion gating
+        motion_gate_enabled=os.getenv('MOTION_GATE', 'true').lower() == 'true',
+        motion_threshold=float(os.getenv('MOTION_THRESHOLD', '0.002')),
+        motion_heartbeat_seconds=float(os.getenv('MOTION_HEARTBEAT', '2.0')),
         
         # Service
         service_name=os.getenv('SERVICE_NAME', 'recognition'),
-        video_port=int(os.getenv('VIDEO_PORT', '5001')),
+        video_port=int(os.getenv('VIDEO_PORT', '5000')),
         
         # Quality
         min_face_height_pixels=int(os.getenv('MIN_FACE_HEIGHT', '20')),
@@ -132,21 +228,47 @@ def load_config() -> Config:
         
         # InsightFace
         insightface_threshold=float(os.getenv('INSIGHTFACE_THRESHOLD', '0.2')),
-        insightface_det_size=(640, 640),
+        insightface_det_size=_parse_size(os.getenv('INSIGHTFACE_DET_SIZE', '640')),
+        auto_det_size=os.getenv('AUTO_DET_SIZE', 'true').lower() == 'true',
+        detection_roi=os.getenv('DETECTION_ROI', ''),
+        tiled_detection=os.getenv('TILED_DETECTION', 'false').lower() == 'true',
+        tile_overlap=int(os.getenv('TILE_OVERLAP', '128')),
+        tile_workers=int(os.getenv('TILE_WORKERS', '2')),
         
         # Tracking
         min_embeddings_per_track=int(os.getenv('MIN_EMBEDDINGS', '2')),
+        early_accept_threshold=float(os.getenv('EARLY_ACCEPT_THRESHOLD', '0.5')),
+        recognition_backoff_max=int(os.getenv('RECOGNITION_BACKOFF_MAX', '16')),
+        reverify_interval=float(os.getenv('REVERIFY_INTERVAL', '1.0')),
+        reverify_interval_max=float(os.getenv('REVERIFY_INTERVAL_MAX', '8.0')),
+        handoff_window_seconds=float(os.getenv('HANDOFF_WINDOW', '10.0')),
+        handoff_threshold=float(os.getenv('HANDOFF_THRESHOLD', '0.5')),
+        camera_adjacency=os.getenv('CAMERA_ADJACENCY', ''),
         track_max_age_seconds=float(os.getenv('TRACK_MAX_AGE', '2.0')),
         iou_threshold=0.3,
+        recent_match_size=int(os.getenv('RECENT_MATCH_SIZE', '32')),
+        recent_match_threshold=float(os.getenv('RECENT_MATCH_THRESHOLD', '0.45')),
+        recent_match_ttl_seconds=float(os.getenv('RECENT_MATCH_TTL', '900')),
         
         # Presence
         in_threshold_seconds=float(os.getenv('IN_THRESHOLD', '1.0')),
         out_threshold_seconds=float(os.getenv('OUT_THRESHOLD', '10.0')),
+        event_trace=os.getenv('EVENT_TRACE', 'false').lower() == 'true',
         
         # System
         reload_employees_interval=int(os.getenv('RELOAD_INTERVAL', '300')),
-        cache_file=os.getenv('CACHE_FILE', 'face_encodings_cache.pkl'),
+        employee_push=os.getenv('EMPLOYEE_PUSH', 'false').lower() == 'true',
+        socket_path=os.getenv('SOCKET_PATH', '/ws'),
+        gallery_download_workers=int(os.getenv('GALLERY_DOWNLOAD_WORKERS', '8')),
+        gallery_workers=int(os.getenv('GALLERY_WORKERS', str(min(4, os.cpu_count() or 1)))),
+        gallery_batch_size=int(os.getenv('GALLERY_BATCH_SIZE', '32')),
+        cache_file=os.getenv('CACHE_FILE', 'face_encodings_cache.bin'),
+        embedding_store=os.getenv('EMBEDDING_STORE', 'embedding_store.db'),
+        embedding_store_max_entries=int(os.getenv('EMBEDDING_STORE_MAX', '100000')),
         debug_mode=os.getenv('DEBUG', 'true').lower() == 'true',
+        admin_token=os.getenv('ADMIN_TOKEN', ''),
+        record_detections=os.getenv('RECORD_DETECTIONS', ''),
+        record_max_frames=int(os.getenv('RECORD_MAX_FRAMES', '36000')),
     )
 
 
@@ -0,0 +1,165 @@
+"""
+Push-based employee change notifications.
+
+Subscribes to the backend's Socket.IO realtime layer (SOCKET_PATH) and
+forwards employee:created / employee:updated / employee:deleted
+notifications to listeners (gallery reloaders), so changes are picked
+up within seconds instead of on the next RELOAD_INTERVAL poll.
+
+One connection per backend is shared by all cameras of the process.
+Requires the optional python-socketio client; without it, polling
+continues unchanged.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .config import Config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+EMPLOYEE_EVENTS = ('employee:created', 'employee:updated', 'employee:deleted')
+
+# Reconnect backoff bounds (seconds)
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 60.0
+
+Listener = Callable[[str, Dict[str, Any]], None]
+
+
+class EmployeeChangeFeed:
+    """Socket.IO subscription to employee change notifications."""
+
+    def __init__(self, backend_url: str, socket_path: str):
+        """
+        Initialize feed.
+
+        Args:
+            backend_url: Backend base URL
+            socket_path: Socket.IO path of the backend (SOCKET_PATH)
+        """
+        self.backend_url = backend_url
+        self.socket_path = socket_path
+        self.listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._client: Any = None
+
+    def add_listener(self, listener: Listener) -> None:
+        """Register listener called with (event, payload)."""
+        with self._lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> int:
+        """
+        Unregister listener.
+
+        Returns:
+            Number of remaining listeners
+        """
+        with self._lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+            return len(self.listeners)
+
+    def handle_event(self, event: str, payload: Optional[Dict[str, Any]]) -> None:
+        """
+        Dispatch notification to all listeners.
+
+        Args:
+            event: Event name (one of EMPLOYEE_EVENTS)
+            payload: Event payload (employee or {id, companyId})
+        """
+        logger.debug(f'Employee change notification: {event} {payload}')
+        with self._lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(event, payload or {})
+            except Exception as e:
+                logger.error(f'Employee change listener failed: {e}')
+
+    def start(self) -> bool:
+        """
+        Connect in the background (retrying with backoff).
+
+        Returns:
+            False if python-socketio is not installed
+        """
+        try:
+            import socketio
+        except ImportError:
+            logger.warning(
+                'EMPLOYEE_PUSH requires python-socketio[client]; '
+                'falling back to polling every RELOAD_INTERVAL'
+            )
+            return False
+
+        client = socketio.Client(reconnection=True, reconnection_delay_max=RECONNECT_DELAY_MAX)
+        for event in EMPLOYEE_EVENTS:
+            client.on(event, lambda payload=None, event=event: self.handle_event(event, payload))
+        client.on('connect', lambda: logger.info(f'Subscribed to employee changes at {self.backend_url}'))
+        self._client = client
+
+        threading.Thread(target=self._connect, daemon=True, name='EmployeeChangeFeed').start()
+        return True
+
+    def stop(self) -> None:
+        """Disconnect."""
+        self._stopped.set()
+        if self._client is not None:
+            try:
+                self._client.disconnect()
+            except Exception as e:
+                logger.debug(f'Socket.IO disconnect failed: {e}')
+
+    def _connect(self) -> None:
+        """Initial connection loop (the client reconnects by itself afterwards)."""
+        delay = RECONNECT_DELAY
+        while not self._stopped.is_set():
+            try:
+                self._client.connect(
+                    self.backend_url,
+                    socketio_path=self.socket_path,
+                    transports=['websocket', 'polling'],
+                    wait_timeout=10
+                )
+                return
+            except Exception as e:
+                logger.warning(f'Employee change feed connection failed ({e}), retrying in {delay:.0f}s')
+                self._stopped.wait(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+
+_feeds: Dict[Tuple[str, str], EmployeeChangeFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def subscribe(config: Config, listener: Listener) -> Optional[Callable[[], None]]:
+    """
+    Subscribe to employee changes of the configured backend.
+
+    Args:
+        config: Service configuration (backend_url, socket_path)
+        listener: Called with (event, payload) on every notification
+
+    Returns:
+        Unsubscribe function, or None if push is unavailable
+    """
+    key = (config.backend_url, config.socket_path)
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None:
+            feed = EmployeeChangeFeed(*key)
+            if not feed.start():
+                return None
+            _feeds[key] = feed
+        feed.add_listener(listener)
+
+    def unsubscribe() -> None:
+        with _feeds_lock:
+            if feed.remove_listener(listener) == 0 and _feeds.get(key) is feed:
+                del _feeds[key]
+                feed.stop()
+
+    return unsubscribe
@@ -2,89 +2,210 @@
 Employee management module.
 
 Handles loading employee data from backend and building face embeddings.
+Galleries are synced incrementally: only new or changed photos are
+embedded, and callers receive the change as a GalleryDelta. Periodic
+reloads run on a background GalleryReloader thread; the employee list
+is fetched conditionally (ETag / Last-Modified), and with EMPLOYEE_PUSH
+backend change notifications trigger reloads immediately.
 """
 
+import threading
 import requests
 import numpy as np
-import cv2
-from typing import List, Tuple, Dict, Any
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple, Dict, Any
 from .config import Config
 from .logging_config import get_logger
-from .utils.cache import load_cache, save_cache, get_employees_hash
+from .gallery_builder import GalleryBuilder, PhotoJob, embedding_dim, model_version
+from .metrics import inc_counter
+from .utils.cache import load_cache_entries, read_cache_header, save_cache, get_employees_hash, get_employee_key
 
 logger = get_logger(__name__)
 
+# Delay between a reload request and the reload (coalesces notifications)
+RELOAD_DEBOUNCE_SECONDS = 1.0
 
-def load_employees_from_backend(
+
+@dataclass
+class EmployeeGallery:
+    """
+    Known employee embeddings (parallel lists) and their photo keys.
+    
+    etag / last_modified are the validators of the employee list the
+    gallery was built from (for conditional reloads).
+    """
+    embeddings: List[np.ndarray] = field(default_factory=list)
+    ids: List[int] = field(default_factory=list)
+    keys: Dict[int, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    def add(self, emp_id: int, key: str, embedding: np.ndarray) -> None:
+        """Append employee embedding."""
+        self.embeddings.append(embedding)
+        self.ids.append(emp_id)
+        self.keys[emp_id] = key
+
+
+@dataclass
+class GalleryDelta:
+    """Difference between two galleries."""
+    added: List[int] = field(default_factory=list)
+    updated: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    embedded: int = 0
+    
+    @property
+    def empty(self) -> bool:
+        """True if no employee was added, updated or removed."""
+        return not (self.added or self.updated or self.removed)
+    
+    def __str__(self) -> str:
+        return (
+            f'+{len(self.added)} ~{len(self.updated)} -{len(self.removed)} '
+            f'({self.embedded} photos embedded)'
+        )
+
+
+def diff_galleries(old: Optional[EmployeeGallery], new: EmployeeGallery) -> GalleryDelta:
+    """
+    Compute employee-level difference between galleries.
+    
+    Args:
+        old: Previous gallery (None = empty)
+        new: Current gallery
+    
+    Returns:
+        GalleryDelta (embedded count left at 0)
+    """
+    old_keys = old.keys if old is not None else {}
+    return GalleryDelta(
+        added=[emp_id for emp_id in new.ids if emp_id not in old_keys],
+        updated=[
+            emp_id for emp_id in new.ids
+            if emp_id in old_keys and old_keys[emp_id] != new.keys[emp_id]
+        ],
+        removed=[emp_id for emp_id in old_keys if emp_id not in new.keys],
+    )
+
+
+def fetch_employees(
     config: Config,
-    face_app: Any
-) -> Tuple[List[np.ndarray], List[int]]:
+    current: Optional[EmployeeGallery] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str], Optional[str]]:
     """
-    Load employees from backend and build face embeddings.
+    Fetch employee list from backend (conditional if current is given).
+    
+    Args:
+        config: Service configuration
+        current: Gallery whose list validators are sent
+            (If-None-Match / If-Modified-Since)
+    
+    Returns:
+        Tuple of (employee dicts or None if not modified, ETag, Last-Modified)
+    """
+    headers = {}
+    if current is not None:
+        if current.etag:
+            headers['If-None-Match'] = current.etag
+        if current.last_modified:
+            headers['If-Modified-Since'] = current.last_modified
+    
+    url = f'{config.backend_url}/api/employees'
+    response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code == 304 and current is not None:
+        return None, current.etag, current.last_modified
+    response.raise_for_status()
+    return response.json(), response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def sync_employee_gallery(
+    config: Config,
+    face_app: Any,
+    current: Optional[EmployeeGallery] = None
+) -> Tuple[EmployeeGallery, GalleryDelta]:
+    """
+    Build employee gallery, embedding only new or changed photos.
+    
+    Embeddings are reused from the cache by photo key (employee ID +
+    photo URL); employees no longer returned by the backend drop out.
+    The cache is rewritten only when its content changed.
     
     Args:
         config: Service configuration
         face_app: InsightFace FaceAnalysis instance
+        current: Gallery currently in use (for the delta)
     
     Returns:
-        Tuple of (embeddings list, employee IDs list)
+        Tuple of (new gallery, delta against current); current itself
+        with an empty delta if the employee list was not modified
     """
     logger.info('Loading employees from backend...')
     
     try:
-        # Fetch employees from backend
-        url = f'{config.backend_url}/api/employees'
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        employees = response.json()
-        
+        stream_id = config.camera_id or config.service_name
+        employees, etag, last_modified = fetch_employees(config, current)
+        if employees is None:
+            inc_counter('employee_list_not_modified', stream_id)
+            logger.info('Employee list not modified')
+            return current, GalleryDelta()
         logger.info(f'Fetched {len(employees)} employees from backend')
         
-        # Check cache
-        current_hash = get_employees_hash(employees)
-        cached_encodings, cached_ids, cached_hash = load_cache(config.cache_file)
-        
-        if cached_encodings and cached_hash == current_hash:
-            logger.info(f'✅ Using cached encodings for {len(cached_ids)} employees')
-            return cached_encodings, cached_ids
-        
-        logger.info('Cache miss or outdated, processing photos...')
-        
-        # Build embeddings
-        known_embeddings: List[np.ndarray] = []
-        known_ids: List[int] = []
+        # Cached rows are reused by photo key (only if written by the current models)
+        model = model_version(face_app, config)
+        cached = load_cache_entries(config.cache_file, model=model, dim=embedding_dim(face_app))
+        header = read_cache_header(config.cache_file) if cached else None
+        emp_hash = get_employees_hash(employees)
         
+        # Photos not in the cache yet
+        photo_keys: Dict[int, str] = {}
+        jobs: List[PhotoJob] = []
         for emp in employees:
             photo_url = emp.get('photoUrl')
             if not photo_url:
                 logger.warning(f"Employee {emp.get('id')} has no photo, skipping")
                 continue
             
+            key = photo_keys[emp['id']] = get_employee_key(emp)
+            if key in cached:
+                continue
+            
             # Build full URL
             if photo_url.startswith('http'):
                 full_url = photo_url
             else:
                 full_url = config.backend_url + photo_url
             
-            try:
-                embedding = _process_employee_photo(
-                    emp, full_url, face_app, config
-                )
-                
-                if embedding is not None:
-                    known_embeddings.append(embedding)
-                    known_ids.append(emp['id'])
-                    
-            except Exception as e:
-                logger.error(f"Failed to process employee {emp.get('id')}: {e}")
-                continue
+            jobs.append(PhotoJob(
+                emp_id=emp['id'], name=emp.get('name', 'Unknown'), key=key, url=full_url
+            ))
         
-        # Save cache
-        if known_embeddings:
-            save_cache(known_embeddings, known_ids, current_hash, config.cache_file)
+        embeddings = GalleryBuilder(face_app, config, stream_id=stream_id).build(jobs)
+        embedded = len(embeddings)
+        
+        # Assemble in backend order
+        gallery = EmployeeGallery(etag=etag, last_modified=last_modified)
+        for emp_id, key in photo_keys.items():
+            embedding = cached[key][1] if key in cached else embeddings.get(key)
+            if embedding is not None:
+                gallery.add(emp_id, key, embedding)
+        
+        # Save cache (new embeddings, removed employees or other employee list)
+        changed = embedded or len(gallery.ids) != len(cached)
+        if gallery.embeddings and (changed or header is None or header.get('hash') != emp_hash):
+            save_cache(
+                gallery.embeddings,
+                gallery.ids,
+                emp_hash,
+                config.cache_file,
+                keys=[gallery.keys[emp_id] for emp_id in gallery.ids],
+                model=model
+            )
         
-        logger.info(f'✅ Loaded {len(known_ids)} employees with valid photos')
-        return known_embeddings, known_ids
+        delta = diff_galleries(current, gallery)
+        delta.embedded = embedded
+        logger.info(f'✅ Loaded {len(gallery.ids)} employees with valid photos ({delta})')
+        return gallery, delta
         
     except requests.exceptions.RequestException as e:
         logger.error(f'Failed to fetch employees from backend: {e}')
@@ -94,82 +215,102 @@ def load_employees_from_backend(
         raise
 
 
-def _process_employee_photo(
-    emp: Dict[str, Any],
-    photo_url: str,
-    face_app: Any,
-    config: Config
-) -> np.ndarray | None:
+def load_employees_from_backend(
+    config: Config,
+    face_app: Any
+) -> Tuple[List[np.ndarray], List[int]]:
     """
-    Process single employee photo and extract embedding.
+    Load employees from backend and build face embeddings.
     
     Args:
-        emp: Employee data dict
-        photo_url: Full URL to photo
-        face_app: InsightFace instance
         config: Service configuration
+        face_app: InsightFace FaceAnalysis instance
     
     Returns:
-        Face embedding or None if processing failed
+        Tuple of (embeddings list, employee IDs list)
+    """
+    gallery, _ = sync_employee_gallery(config, face_app)
+    return gallery.embeddings, gallery.ids
+
+
+class GalleryReloader:
     """
-    emp_id = emp.get('id')
-    emp_name = emp.get('name', 'Unknown')
+    Reloads the employee gallery on a background thread.
     
-    logger.info(f"Processing photo for {emp_name} (ID: {emp_id})...")
+    The camera loop never blocks on the backend or on photo processing:
+    a new gallery is published by replacing the `gallery` reference
+    (atomic), and the loop picks it up on its next frame.
     
-    try:
-        # Download photo
-        img_response = requests.get(photo_url, timeout=10)
-        img_response.raise_for_status()
-        
-        # Decode image
-        nparr = np.frombuffer(img_response.content, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if image is None:
-            logger.warning(f"Failed to decode image for {emp_name}")
-            return None
-        
-        # Import here to avoid circular dependency
-        from .recognition.preprocessing import preprocess_face_for_insightface
-        from .recognition.quality import is_face_acceptable
-        
-        # Preprocess
-        preprocessed = preprocess_face_for_insightface(image, config)
-        
-        # Detect faces
-        faces = face_app.get(preprocessed)
-        
-        if not faces:
-            logger.warning(f"No face found for {emp_name}")
-            return None
-        
-        # Use first face
-        face = faces[0]
-        
-        # Quality check
-        acceptable, quality = is_face_acceptable(image, face.bbox, config)
-        
-        if not acceptable:
-            logger.warning(
-                f"Face quality too low for {emp_name}: "
-                f"height={quality.get('height')}px, "
-                f"blur={quality.get('blur_score', 0):.1f}"
-            )
-            return None
-        
-        # Extract embedding
-        embedding = face.normed_embedding
-        
-        logger.info(
-            f"✅ {emp_name} - embedding created "
-            f"(quality: h={quality.get('height')}px, "
-            f"blur={quality.get('blur_score', 0):.1f})"
-        )
+    Reloads run every reload_employees_interval, and (with
+    employee_push) shortly after backend change notifications.
+    """
+    
+    def __init__(self, config: Config, face_app: Any, gallery: EmployeeGallery):
+        """
+        Initialize reloader.
         
-        return embedding
+        Args:
+            config: Service configuration (reload_employees_interval)
+            face_app: InsightFace FaceAnalysis instance
+            gallery: Gallery currently in use
+        """
+        self.config = config
+        self.face_app = face_app
+        self.gallery = gallery
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+    
+    def start(self) -> None:
+        """Start background reload thread (and push subscription if enabled)."""
+        name = f'GalleryReload-{self.config.camera_id or self.config.service_name}'
+        self._thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self._thread.start()
         
-    except Exception as e:
-        logger.error(f"Error processing photo for {emp_name}: {e}")
-        return None
-
+        if self.config.employee_push:
+            # Import here so python-socketio stays optional
+            from .employee_push import subscribe
+            self._unsubscribe = subscribe(self.config, self._on_employee_change)
+    
+    def stop(self) -> None:
+        """Stop reload thread (an in-flight reload finishes in the background)."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self._stopped.set()
+        self._wake.set()
+    
+    def request_reload(self) -> None:
+        """Reload now instead of waiting for the next interval."""
+        self._wake.set()
+    
+    def _on_employee_change(self, event: str, payload: Dict[str, Any]) -> None:
+        """Push notification from the backend."""
+        logger.debug(f'{event} (employee {payload.get("id")}), reloading')
+        self.request_reload()
+    
+    def _run(self) -> None:
+        """Reload loop."""
+        while not self._stopped.is_set():
+            if self._wake.wait(self.config.reload_employees_interval):
+                # Coalesce bursts of notifications (e.g. bulk imports)
+                self._stopped.wait(RELOAD_DEBOUNCE_SECONDS)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            
+            logger.info('Reloading employees...')
+            try:
+                gallery, delta = sync_employee_gallery(self.config, self.face_app, self.gallery)
+                if not delta.empty and gallery.ids:
+                    # Publish new lists
+                    self.gallery = gallery
+                    logger.info(f'Reloaded {len(gallery.ids)} employees ({delta})')
+                elif gallery is not self.gallery:
+                    # Same employees: keep the published lists (per-camera caches
+                    # keyed on them stay valid), only adopt the new list validators
+                    self.gallery.etag = gallery.etag
+                    self.gallery.last_modified = gallery.last_modified
+            except Exception as e:
+                logger.error(f'Employee reload failed: {e}')
@@ -5,16 +5,22 @@ Sends presence events (IN/OUT) to backend API.
 """
 
 import requests
-from typing import Literal
+from typing import Literal, Optional
 from .config import Config
 from .logging_config import get_logger
+from .tracing import FrameStamp
 
 logger = get_logger(__name__)
 
 EventType = Literal['IN', 'OUT']
 
 
-def send_event(employee_id: int, event_type: EventType, config: Config) -> bool:
+def send_event(
+    employee_id: int,
+    event_type: EventType,
+    config: Config,
+    stamp: Optional[FrameStamp] = None
+) -> bool:
     """
     Send presence event to backend.
     
@@ -22,6 +28,7 @@ def send_event(employee_id: int, event_type: EventType, config: Config) -> bool:
         employee_id: Employee ID
         event_type: Event type ('IN' or 'OUT')
         config: Service configuration
+        stamp: Frame that triggered the event (sent as 'trace' if EVENT_TRACE)
     
     Returns:
         True if event sent successfully
@@ -33,6 +40,8 @@ def send_event(employee_id: int, event_type: EventType, config: Config) -> bool:
         'type': event_type,
         'cameraId': int(config.camera_id) if config.camera_id.isdigit() else None,
     }
+    if config.event_trace and stamp is not None:
+        payload['trace'] = stamp.to_payload()
     
     try:
         camera_info = f' from camera {config.camera_id}' if config.camera_id else ''
@@ -0,0 +1,473 @@
+"""
+Parallel gallery build pipeline.
+
+Turns employee photos into embeddings in overlapping stages:
+- Download: pooled keep-alive HTTP session, GALLERY_DOWNLOAD_WORKERS threads
+- Prepare: decode, preprocessing, detection and quality check on
+  GALLERY_WORKERS threads (OpenCV and ONNX Runtime release the GIL)
+- Embedding: aligned face crops batched through the recognition model,
+  up to GALLERY_BATCH_SIZE crops per inference call
+
+Downloaded photos are looked up by content hash in the embedding store
+(EMBEDDING_STORE) first, and identical bytes within one build are
+processed once; results are written back for later builds.
+
+Progress, per-stage latency and throughput are exported as metrics.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import Config
+from .logging_config import get_logger
+from .metrics import inc_counter, observe_latency, set_gauge
+from .utils.embedding_store import EmbeddingStore, StoredEmbedding
+
+logger = get_logger(__name__)
+
+# Seconds between progress log lines
+PROGRESS_LOG_INTERVAL = 5.0
+
+# Max wait for more prepared photos before running a partial batch
+BATCH_WAIT_SECONDS = 0.05
+
+
+@dataclass
+class PhotoJob:
+    """Employee photo to embed."""
+    emp_id: int
+    name: str
+    key: str
+    url: str
+    content_hash: str = ''
+
+
+@dataclass
+class _Prepared:
+    """
+    Outcome of the prepare stage (or of an embedding store hit).
+
+    Accepted photos carry either the aligned-crop inputs (image, kps)
+    for the batched embedding stage or the finished embedding.
+    """
+    job: PhotoJob
+    accepted: bool
+    image: Optional[np.ndarray] = None
+    kps: Optional[np.ndarray] = None
+    embedding: Optional[np.ndarray] = None
+    quality: Optional[Dict[str, float]] = None
+    stored: bool = False
+
+
+def create_photo_session(pool_size: int) -> requests.Session:
+    """
+    Create HTTP session with a connection pool sized for the download workers.
+
+    Args:
+        pool_size: Max concurrent connections per host
+
+    Returns:
+        requests.Session (retries transient 5xx/connection errors)
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class GalleryBuilder:
+    """
+    Builds embeddings for many employee photos concurrently.
+
+    Uses the detector and recognition model of the FaceAnalysis
+    instance directly so recognition can run batched; face apps
+    without separate models fall back to face_app.get per photo.
+    """
+
+    def __init__(self, face_app: Any, config: Config, stream_id: str = 'gallery'):
+        """
+        Initialize builder.
+
+        Args:
+            face_app: InsightFace FaceAnalysis instance
+            config: Service configuration
+            stream_id: Metrics series (camera) the build is reported under
+        """
+        self.face_app = face_app
+        self.config = config
+        self.stream_id = stream_id
+        self.det_model = getattr(face_app, 'det_model', None)
+        self.rec_model = getattr(face_app, 'models', {}).get('recognition')
+        self.batched = self.det_model is not None and self.rec_model is not None
+        self.store: Optional[EmbeddingStore] = None
+        if config.embedding_store:
+            try:
+                self.store = EmbeddingStore(
+                    config.embedding_store,
+                    model_version(face_app, config),
+                    max_entries=config.embedding_store_max_entries
+                )
+            except Exception as e:
+                logger.error(f'Embedding store unavailable ({e}), computing all photos')
+
+    def build(self, jobs: List[PhotoJob]) -> Dict[str, np.ndarray]:
+        """
+        Embed photos.
+
+        Failed photos (download error, no face, low quality) are logged
+        and left out of the result.
+
+        Args:
+            jobs: Photos to embed
+
+        Returns:
+            Dict of photo key to normed embedding
+        """
+        results: Dict[str, np.ndarray] = {}
+        if not jobs:
+            return results
+
+        config = self.config
+        total = len(jobs)
+        started = time.monotonic()
+        last_log = started
+        done = failed = 0
+        set_gauge('gallery_build_total', self.stream_id, total)
+        set_gauge('gallery_build_done', self.stream_id, 0)
+        logger.info(
+            f'Embedding {total} photos (download={config.gallery_download_workers}, '
+            f'workers={config.gallery_workers}, batch={config.gallery_batch_size})'
+        )
+
+        # Every leader job puts exactly one (job, _Prepared or None = failed) item;
+        # jobs with bytes identical to an in-flight job wait for its result
+        outcomes: 'queue.Queue[Tuple[PhotoJob, Optional[_Prepared]]]' = queue.Queue()
+        followers: Dict[str, List[PhotoJob]] = {}
+        followers_lock = threading.Lock()
+        session = create_photo_session(config.gallery_download_workers)
+        downloads = ThreadPoolExecutor(config.gallery_download_workers, 'gallery-download')
+        workers = ThreadPoolExecutor(config.gallery_workers, 'gallery-prepare')
+
+        def download(job: PhotoJob) -> None:
+            try:
+                content = self._download(session, job)
+            except Exception as e:
+                logger.error(f'Failed to download photo for {job.name} (ID: {job.emp_id}): {e}')
+                outcomes.put((job, None))
+                return
+
+            job.content_hash = hashlib.sha256(content).hexdigest()
+            with followers_lock:
+                if job.content_hash in followers:
+                    followers[job.content_hash].append(job)
+                    return
+                followers[job.content_hash] = []
+
+            stored = self._lookup(job)
+            if stored is not None:
+                outcomes.put((job, stored))
+                return
+            workers.submit(prepare, job, content)
+
+        def prepare(job: PhotoJob, content: bytes) -> None:
+            try:
+                outcomes.put((job, self._prepare(job, content)))
+            except Exception as e:
+                logger.error(f'Error processing photo for {job.name}: {e}')
+                outcomes.put((job, None))
+
+        def finish(job: PhotoJob, embedding: Optional[np.ndarray]) -> int:
+            """Record result for job and its followers; returns finished job count."""
+            with followers_lock:
+                finished = [job] + followers.pop(job.content_hash, [])
+            if embedding is not None:
+                for finished_job in finished:
+                    results[finished_job.key] = embedding
+            return len(finished)
+
+        def embed(batch: List[_Prepared]) -> int:
+            count = 0
+            for item, embedding in zip(batch, self._embed_batch(batch)):
+                self._remember(item.job, embedding, item.quality)
+                count += finish(item.job, embedding)
+            return count
+
+        try:
+            for job in jobs:
+                downloads.submit(download, job)
+
+            batch: List[_Prepared] = []
+            while done < total:
+                try:
+                    job, item = outcomes.get(timeout=BATCH_WAIT_SECONDS)
+                except queue.Empty:
+                    # Producers are slower than inference: run what we have
+                    if batch:
+                        done += embed(batch)
+                        batch = []
+                        set_gauge('gallery_build_done', self.stream_id, done)
+                    continue
+
+                if item is None:
+                    failed += 1
+                    done += finish(job, None)
+                elif not item.accepted:
+                    if not item.stored:
+                        self._remember(job, None, item.quality)
+                    done += finish(job, None)
+                elif item.embedding is not None:
+                    if not item.stored:
+                        self._remember(job, item.embedding, item.quality)
+                    done += finish(job, item.embedding)
+                else:
+                    batch.append(item)
+                    if len(batch) >= config.gallery_batch_size:
+                        done += embed(batch)
+                        batch = []
+
+                set_gauge('gallery_build_done', self.stream_id, done)
+                now = time.monotonic()
+                if now - last_log >= PROGRESS_LOG_INTERVAL:
+                    last_log = now
+                    logger.info(
+                        f'Gallery build: {done}/{total} photos '
+                        f'({done / (now - started):.1f} photos/s)'
+                    )
+        finally:
+            downloads.shutdown(wait=True)
+            workers.shutdown(wait=True)
+            session.close()
+
+        if self.store is not None:
+            try:
+                self.store.evict()
+            except Exception as e:
+                logger.error(f'Embedding store eviction failed: {e}')
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed > 0 else 0.0
+        inc_counter('gallery_photos_embedded', self.stream_id, len(results))
+        inc_counter('gallery_photos_failed', self.stream_id, total - len(results))
+        set_gauge('gallery_build_seconds', self.stream_id, elapsed)
+        set_gauge('gallery_build_photos_per_second', self.stream_id, rate)
+        logger.info(
+            f'Gallery build finished: {len(results)}/{total} embedded in {elapsed:.1f}s '
+            f'({rate:.1f} photos/s, {failed} download/processing errors)'
+        )
+        return results
+
+    def _lookup(self, job: PhotoJob) -> Optional[_Prepared]:
+        """
+        Look up photo in the embedding store.
+
+        Stored quality metrics are re-checked against the current
+        thresholds; a face rejected earlier that passes now is recomputed.
+
+        Args:
+            job: Photo job with content_hash
+
+        Returns:
+            _Prepared from the store, or None if the photo must be processed
+        """
+        from .recognition.quality import passes_quality_thresholds
+
+        if self.store is None:
+            return None
+        try:
+            stored: Optional[StoredEmbedding] = self.store.get(job.content_hash)
+        except Exception as e:
+            logger.error(f'Embedding store lookup failed: {e}')
+            return None
+
+        if stored is None:
+            inc_counter('embedding_store_misses', self.stream_id)
+            return None
+
+        acceptable = stored.quality is not None and passes_quality_thresholds(stored.quality, self.config)
+        if stored.embedding is None and acceptable:
+            inc_counter('embedding_store_misses', self.stream_id)
+            return None
+
+        inc_counter('embedding_store_hits', self.stream_id)
+        if not acceptable:
+            logger.warning(f'No usable face for {job.name} (stored result)')
+        return _Prepared(
+            job=job,
+            accepted=acceptable,
+            embedding=stored.embedding if acceptable else None,
+            quality=stored.quality,
+            stored=True
+        )
+
+    def _remember(
+        self,
+        job: PhotoJob,
+        embedding: Optional[np.ndarray],
+        quality: Optional[Dict[str, float]]
+    ) -> None:
+        """Write photo result to the embedding store."""
+        if self.store is None or not job.content_hash:
+            return
+        try:
+            self.store.put(job.content_hash, embedding, quality)
+        except Exception as e:
+            logger.error(f'Embedding store write failed: {e}')
+
+    def _download(self, session: requests.Session, job: PhotoJob) -> bytes:
+        """Download photo bytes."""
+        start = time.perf_counter()
+        response = session.get(job.url, timeout=10)
+        response.raise_for_status()
+        observe_latency('gallery_stage_seconds', self.stream_id,
+                        time.perf_counter() - start, stage='download')
+        return response.content
+
+    def _prepare(self, job: PhotoJob, content: bytes) -> _Prepared:
+        """
+        Decode, preprocess, detect and quality-check one photo.
+
+        Args:
+            job: Photo job
+            content: Downloaded image bytes
+
+        Returns:
+            _Prepared (with embedding if not batched; not accepted if unusable)
+        """
+        # Import here to avoid circular dependency
+        from .recognition.preprocessing import preprocess_face_for_insightface
+        from .recognition.quality import is_face_acceptable
+
+        start = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning(f'Failed to decode image for {job.name}')
+            return _Prepared(job=job, accepted=False)
+
+        preprocessed = preprocess_face_for_insightface(image, self.config)
+
+        # Detect faces (first = highest score)
+        if self.batched:
+            bboxes, kpss = self.det_model.detect(preprocessed, max_num=0, metric='default')
+            if len(bboxes) == 0:
+                logger.warning(f'No face found for {job.name}')
+                return _Prepared(job=job, accepted=False)
+            bbox, kps, embedding = bboxes[0, 0:4], (kpss[0] if kpss is not None else None), None
+        else:
+            faces = self.face_app.get(preprocessed)
+            if not faces:
+                logger.warning(f'No face found for {job.name}')
+                return _Prepared(job=job, accepted=False)
+            bbox, kps, embedding = faces[0].bbox, None, faces[0].normed_embedding
+
+        # Quality check
+        acceptable, quality = is_face_acceptable(image, bbox, self.config)
+        observe_latency('gallery_stage_seconds', self.stream_id,
+                        time.perf_counter() - start, stage='prepare')
+
+        if not acceptable:
+            logger.warning(
+                f'Face quality too low for {job.name}: '
+                f"height={quality.get('height')}px, "
+                f"blur={quality.get('blur_score', 0):.1f}"
+            )
+            return _Prepared(job=job, accepted=False, quality=quality if 'error' not in quality else None)
+
+        logger.debug(
+            f'{job.name} - face accepted '
+            f"(quality: h={quality.get('height')}px, "
+            f"blur={quality.get('blur_score', 0):.1f})"
+        )
+        return _Prepared(
+            job=job, accepted=True, image=preprocessed, kps=kps, embedding=embedding, quality=quality
+        )
+
+    def _embed_batch(self, batch: List[_Prepared]) -> List[np.ndarray]:
+        """
+        Run recognition model on a batch of aligned crops.
+
+        Args:
+            batch: Prepared photos with landmarks
+
+        Returns:
+            Normed embeddings in batch order
+        """
+        from insightface.utils import face_align
+
+        start = time.perf_counter()
+        size = self.rec_model.input_size[0]
+        crops = [face_align.norm_crop(item.image, landmark=item.kps, image_size=size) for item in batch]
+        try:
+            features = np.asarray(self.rec_model.get_feat(crops)).reshape(len(batch), -1)
+        except Exception as e:
+            # Models exported with a fixed batch size of 1
+            logger.debug(f'Batched recognition failed ({e}), embedding one by one')
+            features = np.vstack([self.rec_model.get_feat(crop).reshape(1, -1) for crop in crops])
+
+        normed = features / np.linalg.norm(features, axis=1, keepdims=True)
+        observe_latency('gallery_stage_seconds', self.stream_id,
+                        time.perf_counter() - start, stage='embedding')
+        return list(normed)
+
+
+def model_version(face_app: Any, config: Config) -> str:
+    """
+    Describe everything that determines a photo's embedding.
+
+    Covers the detection/recognition model files, the detector input
+    size and the preprocessing settings; a change to any of them makes
+    stored embeddings unusable.
+
+    Args:
+        face_app: InsightFace FaceAnalysis instance
+        config: Service configuration
+
+    Returns:
+        Version string (stored with every embedding)
+    """
+    parts = []
+    for taskname, model in sorted(getattr(face_app, 'models', {}).items()):
+        if taskname in ('detection', 'recognition'):
+            parts.append(f"{taskname}={os.path.basename(getattr(model, 'model_file', '') or '')}")
+    if not parts:
+        parts.append(f'app={type(face_app).__name__}')
+
+    det_model = getattr(face_app, 'det_model', None)
+    parts.append(f"det_size={getattr(det_model, 'input_size', None)}")
+    if config.enable_preprocessing:
+        parts.append(f'pre=clahe:{config.clahe_clip_limit},denoise:{config.denoise_strength}')
+    else:
+        parts.append('pre=off')
+    return ';'.join(parts)
+
+
+def embedding_dim(face_app: Any) -> Optional[int]:
+    """
+    Get embedding dimension of the recognition model.
+
+    Args:
+        face_app: InsightFace FaceAnalysis instance
+
+    Returns:
+        Dimension, or None if the model does not report it
+    """
+    rec_model = getattr(face_app, 'models', {}).get('recognition')
+    output_shape = getattr(rec_model, 'output_shape', None)
+    try:
+        return int(output_shape[-1])
+    except (TypeError, ValueError, IndexError):
+        return None
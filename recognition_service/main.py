@@ -40,6 +40,13 @@ def parse_args() -> argparse.Namespace:
         help='Interval to refresh camera list (seconds, default: 60)'
     )
     
+    parser.add_argument(
+        '--video-port',
+        type=int,
+        default=None,
+        help='HTTP port for video streams of all cameras (default: VIDEO_PORT or 5000)'
+    )
+    
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -69,7 +76,8 @@ def main() -> None:
         manager = MultiCameraManager(
             company_slug=args.company_slug,
             backend_url=args.backend_url,
-            refresh_interval=args.refresh_interval
+            refresh_interval=args.refresh_interval,
+            video_port=args.video_port
         )
         
         manager.run()
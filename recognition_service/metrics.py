@@ -0,0 +1,225 @@
+"""
+Runtime metrics module.
+
+Per-camera statistics published by processing threads and read by
+the HTTP API. Thread-safe via a module-level lock.
+
+Besides the flat stats dict, keeps Prometheus-style series rendered
+by GET /metrics:
+- Counters (frames captured/processed/skipped, events, drops)
+- Gauges (viewers, active tracks, queue depths)
+- Latency histograms with fixed buckets (pipeline stages, event latency)
+
+Recording is a dict lookup plus a few integer updates under a lock,
+cheap enough to stay on in production.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Upper bounds (seconds) of latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+METRIC_PREFIX = 'recognition_'
+
+_camera_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+_counters: Dict[Tuple[str, str], float] = {}
+_gauges: Dict[Tuple[str, str], float] = {}
+_histograms: Dict[Tuple[str, str, Labels], 'Histogram'] = {}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe, guarded by _stats_lock)."""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """Add one sample."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def publish_stats(stream_id: str, stats: Dict[str, float]) -> None:
+    """
+    Publish latest statistics for a camera (thread-safe).
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+        stats: Flat dict of metric name to value
+    """
+    with _stats_lock:
+        _camera_stats[stream_id] = dict(stats)
+
+
+def get_stats(stream_id: str) -> Dict[str, float]:
+    """
+    Get latest statistics for a camera (thread-safe).
+
+    Returns:
+        Copy of published stats (empty if none)
+    """
+    with _stats_lock:
+        return dict(_camera_stats.get(stream_id, {}))
+
+
+def observe_stage(stream_id: str, stage: str, seconds: float) -> None:
+    """
+    Record a stage latency sample.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+        stage: Pipeline stage name
+        seconds: Measured latency in seconds
+    """
+    observe_latency('stage_latency_seconds', stream_id, seconds, stage=stage)
+
+
+def observe_latency(name: str, stream_id: str, seconds: float, **labels: str) -> None:
+    """
+    Record a sample in a latency histogram.
+
+    Args:
+        name: Histogram name (without prefix)
+        stream_id: Identifier of the stream (camera/service)
+        seconds: Measured latency in seconds
+        **labels: Extra labels of the series
+    """
+    key = (name, stream_id, tuple(sorted(labels.items())))
+    with _stats_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def inc_counter(name: str, stream_id: str, value: float = 1.0) -> None:
+    """
+    Increment a per-camera counter.
+
+    Args:
+        name: Counter name (rendered with a _total suffix)
+        stream_id: Identifier of the stream (camera/service)
+        value: Increment
+    """
+    key = (name, stream_id)
+    with _stats_lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def set_gauge(name: str, stream_id: str, value: float) -> None:
+    """
+    Set a per-camera gauge.
+
+    Args:
+        name: Gauge name
+        stream_id: Identifier of the stream (camera/service)
+        value: Current value
+    """
+    with _stats_lock:
+        _gauges[(name, stream_id)] = value
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Copy all recorded series (for in-process consumers, e.g. benchmarks).
+
+    Returns:
+        Dict with 'counters' and 'gauges' ({(name, stream_id): value}) and
+        'histograms' ({(name, stream_id, labels): (bucket counts, sum, count)})
+    """
+    with _stats_lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'histograms': {
+                key: (list(h.counts), h.total, h.count)
+                for key, h in _histograms.items()
+            },
+        }
+
+
+def render_prometheus() -> str:
+    """
+    Render all series in Prometheus text exposition format (0.0.4).
+
+    Published stats dicts are exported as gauges next to the
+    explicitly recorded series.
+
+    Returns:
+        Exposition text
+    """
+    with _stats_lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        for stream_id, stats in _camera_stats.items():
+            for name, value in stats.items():
+                gauges.setdefault((name, stream_id), value)
+        histograms = {
+            key: (list(h.counts), h.total, h.count)
+            for key, h in _histograms.items()
+        }
+
+    lines: List[str] = []
+
+    for name in sorted({name for name, _ in counters}):
+        metric = f'{METRIC_PREFIX}{_sanitize(name)}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for (series, stream_id), value in sorted(counters.items()):
+            if series == name:
+                lines.append(f'{metric}{{camera="{_escape(stream_id)}"}} {_format(value)}')
+
+    for name in sorted({name for name, _ in gauges}):
+        metric = f'{METRIC_PREFIX}{_sanitize(name)}'
+        lines.append(f'# TYPE {metric} gauge')
+        for (series, stream_id), value in sorted(gauges.items()):
+            if series == name:
+                lines.append(f'{metric}{{camera="{_escape(stream_id)}"}} {_format(value)}')
+
+    for name in sorted({name for name, _, _ in histograms}):
+        metric = f'{METRIC_PREFIX}{_sanitize(name)}'
+        lines.append(f'# TYPE {metric} histogram')
+        for (series, stream_id, extra), (counts, total, count) in sorted(histograms.items()):
+            if series != name:
+                continue
+            labels = ','.join(
+                [f'camera="{_escape(stream_id)}"'] +
+                [f'{key}="{_escape(value)}"' for key, value in extra]
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{{labels}}} {_format(total)}')
+            lines.append(f'{metric}_count{{{labels}}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _sanitize(name: str) -> str:
+    """Make metric name Prometheus-safe."""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _escape(value: str) -> str:
+    """Escape label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value: float) -> str:
+    """Format sample value (integers without trailing .0)."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
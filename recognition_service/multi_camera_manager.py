@@ -2,15 +2,21 @@
 Multi-camera manager for handling multiple camera streams for a company.
 
 This module manages multiple camera threads, automatically syncing with
-the backend to add/remove cameras as they are configured.
+the backend to add/remove cameras as they are configured, and owns the
+single HTTP server that streams video for all of them as well as the
+cross-camera track hand-off store they share.
 """
 
+import json
 import threading
 import time
 import requests
 from typing import List, Dict, Optional
 from .config import Config, load_config
 from .logging_config import get_logger
+from .app import create_app
+from .server import StreamServer
+from .recognition.handoff import TrackHandoff
 
 logger = get_logger(__name__)
 
@@ -18,11 +24,19 @@ logger = get_logger(__name__)
 class CameraThread:
     """Represents a single camera processing thread."""
     
-    def __init__(self, camera_id: int, camera_data: Dict, backend_url: str, company_slug: str):
+    def __init__(
+        self,
+        camera_id: int,
+        camera_data: Dict,
+        backend_url: str,
+        company_slug: str,
+        handoff: Optional[TrackHandoff] = None
+    ):
         self.camera_id = camera_id
         self.camera_data = camera_data
         self.backend_url = backend_url
         self.company_slug = company_slug
+        self.handoff = handoff
         self.thread: Optional[threading.Thread] = None
         self.stop_flag = threading.Event()
         self.config: Optional[Config] = None
@@ -44,7 +58,13 @@ class CameraThread:
         config_dict['camera_id'] = str(self.camera_id)
         config_dict['backend_url'] = self.backend_url
         config_dict['service_name'] = f"{self.company_slug}-camera-{self.camera_id}"
-        config_dict['video_port'] = 5000 + self.camera_id  # Dynamic port per camera
+        
+        # Per-camera detection zones (backend value overrides DETECTION_ROI)
+        detection_roi = self.camera_data.get('detectionRoi')
+        if detection_roi:
+            config_dict['detection_roi'] = (
+                detection_roi if isinstance(detection_roi, str) else json.dumps(detection_roi)
+            )
         
         # Create new config instance
         self.config = Config(**config_dict)
@@ -69,7 +89,7 @@ class CameraThread:
             face_app = initialize_face_app(self.config)
             
             # Run video loop
-            run_video_loop(face_app, self.config, self.stop_flag)
+            run_video_loop(face_app, self.config, self.stop_flag, handoff=self.handoff)
             
         except Exception as e:
             logger.error(f"Camera {self.camera_id} crashed: {e}", exc_info=True)
@@ -90,7 +110,13 @@ class CameraThread:
 class MultiCameraManager:
     """Manages multiple camera streams for a company."""
     
-    def __init__(self, company_slug: str, backend_url: str, refresh_interval: int = 60):
+    def __init__(
+        self,
+        company_slug: str,
+        backend_url: str,
+        refresh_interval: int = 60,
+        video_port: Optional[int] = None
+    ):
         """
         Initialize the multi-camera manager.
         
@@ -98,12 +124,17 @@ class MultiCameraManager:
             company_slug: Company slug to manage cameras for
             backend_url: Backend API URL
             refresh_interval: Interval to refresh camera list (seconds)
+            video_port: HTTP server port (default: VIDEO_PORT from config)
         """
         self.company_slug = company_slug
         self.backend_url = backend_url
         self.refresh_interval = refresh_interval
+        self.video_port = video_port if video_port is not None else load_config().video_port
         self.camera_threads: Dict[int, CameraThread] = {}
         self.running = True
+        self.server: Optional[StreamServer] = None
+        # Recognized identities shared between neighbouring cameras
+        self.handoff = TrackHandoff(load_config())
         
         logger.info(f"Initialized MultiCameraManager for company: {company_slug}")
     
@@ -152,7 +183,8 @@ class MultiCameraManager:
             camera_id=camera_id,
             camera_data=camera,
             backend_url=self.backend_url,
-            company_slug=self.company_slug
+            company_slug=self.company_slug,
+            handoff=self.handoff
         )
         camera_thread.start()
         self.camera_threads[camera_id] = camera_thread
@@ -195,6 +227,17 @@ class MultiCameraManager:
         logger.info(f"Backend URL: {self.backend_url}")
         logger.info(f"Refresh interval: {self.refresh_interval}s")
         
+        # One HTTP server for all cameras
+        self.server = StreamServer(
+            create_app(
+                service_name=f"{self.company_slug}-recognition",
+                admin_token=load_config().admin_token
+            ),
+            port=self.video_port
+        )
+        self.server.start()
+        logger.info(f"Video streams: http://localhost:{self.video_port}/video_feed/<camera_id>")
+        
         while self.running:
             try:
                 self.sync_cameras()
@@ -217,6 +260,9 @@ class MultiCameraManager:
         for camera_id in list(self.camera_threads.keys()):
             self.stop_camera(camera_id)
         
+        if self.server:
+            self.server.stop()
+        
         logger.info("Multi-camera manager stopped")
     
     def stop(self):
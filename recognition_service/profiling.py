@@ -0,0 +1,343 @@
+"""
+On-demand profiling module.
+
+Time-bounded diagnostics for live camera workers, triggered via the
+admin HTTP endpoints:
+- Sampling profiler: walks the camera thread's stack from outside
+  (sys._current_frames), no instrumentation in the worker. Samples land
+  on GIL switches, so short pure-Python bursts are under-represented;
+  native calls (inference, OpenCV) release the GIL and sample well
+- cProfile: enabled inside the camera thread between video loop iterations
+- tracemalloc: snapshot diff over a time window
+
+Nothing runs while no session is active; the video loop only pays one
+dict lookup per iteration (poll).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bound for a single session (seconds)
+MAX_SESSION_SECONDS = 60.0
+
+# Interval between stack samples (seconds)
+SAMPLE_INTERVAL = 0.005
+
+# Frames tracemalloc keeps per allocation
+TRACEMALLOC_FRAMES = 10
+
+# Rows in reports
+DEFAULT_TOP = 30
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profiling session is already running."""
+
+
+class _CProfileSession:
+    """cProfile run requested for one camera thread."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.profiler = cProfile.Profile()
+        self.started: Optional[float] = None
+        self.iterations = 0
+        # Set by the requester on timeout; the camera thread disables the profiler
+        self.cancelled = False
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+_threads: Dict[str, int] = {}
+_cprofile_sessions: Dict[str, _CProfileSession] = {}
+_session_lock = threading.Lock()
+
+
+def register_thread(stream_id: str) -> None:
+    """
+    Register current thread as the worker of a camera.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+    """
+    _threads[stream_id] = threading.get_ident()
+
+
+def unregister_thread(stream_id: str) -> None:
+    """
+    Forget camera worker thread (on loop exit).
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+    """
+    _threads.pop(stream_id, None)
+    session = _cprofile_sessions.get(stream_id)
+    if session is not None:
+        _finish(stream_id, session)
+
+
+def list_threads() -> List[str]:
+    """
+    Get cameras with a registered worker thread.
+
+    Returns:
+        List of stream IDs
+    """
+    return list(_threads.keys())
+
+
+def poll(stream_id: str) -> None:
+    """
+    Start/stop a requested cProfile session (camera thread, once per iteration).
+
+    Never raises: a profiler error ends the session, not the video loop.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+    """
+    session = _cprofile_sessions.get(stream_id)
+    if session is None:
+        return
+
+    try:
+        now = time.monotonic()
+        if session.cancelled:
+            _finish(stream_id, session)
+            return
+        if session.started is None:
+            session.profiler.enable()
+            session.started = now
+            return
+
+        session.iterations += 1
+        if now - session.started >= session.seconds:
+            _finish(stream_id, session)
+    except Exception as e:
+        # E.g. another profiler already active in this thread (Python 3.12+)
+        logger.error(f'cProfile session on camera {stream_id} failed: {e}')
+        session.error = str(e)
+        _finish(stream_id, session)
+
+
+def _finish(stream_id: str, session: _CProfileSession) -> None:
+    """End cProfile session in the camera thread and release the stream."""
+    if session.started is not None:
+        try:
+            session.profiler.disable()
+        except Exception as e:
+            logger.error(f'Failed to disable cProfile on camera {stream_id}: {e}')
+    _cprofile_sessions.pop(stream_id, None)
+    session.done.set()
+
+
+def sample_stacks(stream_id: str, seconds: float, top: int = DEFAULT_TOP) -> Dict:
+    """
+    Sample a camera thread's stack for a while.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+        seconds: Session length (capped at MAX_SESSION_SECONDS)
+        top: Number of functions in the report
+
+    Returns:
+        Report dict: per-function self/total sample shares and
+        folded stacks (flamegraph.pl / speedscope input)
+
+    Raises:
+        KeyError: If the camera has no running worker
+        ProfilerBusy: If another session is running
+    """
+    ident = _threads[stream_id]
+    seconds = _bound(seconds)
+
+    with _exclusive():
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        folded: Counter = Counter()
+        samples = 0
+
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(ident)
+            if frame is None:
+                break
+
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+
+            samples += 1
+            self_counts[stack[0]] += 1
+            for function in set(stack):
+                total_counts[function] += 1
+            folded[';'.join(reversed(stack))] += 1
+
+            time.sleep(SAMPLE_INTERVAL)
+
+    def share(count: int) -> float:
+        return round(100.0 * count / samples, 1) if samples else 0.0
+
+    return {
+        'camera': stream_id,
+        'mode': 'sample',
+        'seconds': seconds,
+        'samples': samples,
+        'top_self': [
+            {'function': function, 'samples': count, 'percent': share(count)}
+            for function, count in self_counts.most_common(top)
+        ],
+        'top_total': [
+            {'function': function, 'samples': count, 'percent': share(count)}
+            for function, count in total_counts.most_common(top)
+        ],
+        'folded': '\n'.join(f'{stack} {count}' for stack, count in folded.most_common()),
+    }
+
+
+def profile_iterations(stream_id: str, seconds: float, top: int = DEFAULT_TOP) -> Dict:
+    """
+    Run cProfile inside a camera thread for a while.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+        seconds: Session length (capped at MAX_SESSION_SECONDS)
+        top: Number of functions in the report
+
+    Returns:
+        Report dict with pstats output sorted by cumulative time
+
+    Raises:
+        KeyError: If the camera has no running worker
+        ProfilerBusy: If another session is running (or a timed-out one
+            was not stopped by the camera loop yet), or cProfile cannot
+            run in the camera thread
+        TimeoutError: If the camera loop did not complete the session
+    """
+    if stream_id not in _threads:
+        raise KeyError(stream_id)
+    seconds = _bound(seconds)
+
+    with _exclusive():
+        if stream_id in _cprofile_sessions:
+            raise ProfilerBusy(f'Previous profiling session of camera {stream_id} is still being stopped')
+        session = _CProfileSession(seconds)
+        _cprofile_sessions[stream_id] = session
+
+        # Loop may be stalled (e.g. camera reconnect) - allow some slack
+        if not session.done.wait(timeout=seconds + 10.0):
+            # Profiling hooks are per thread: the camera thread disables the
+            # profiler on its next iteration; the stream stays busy until then
+            session.cancelled = True
+            raise TimeoutError(f'Camera {stream_id} loop did not finish the profiling session')
+
+    if session.error is not None:
+        raise ProfilerBusy(f'cProfile unavailable in camera {stream_id}: {session.error}')
+
+    output = io.StringIO()
+    stats = pstats.Stats(session.profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(top)
+
+    return {
+        'camera': stream_id,
+        'mode': 'cprofile',
+        'seconds': seconds,
+        'iterations': session.iterations,
+        'report': output.getvalue(),
+    }
+
+
+def memory_diff(seconds: float, top: int = DEFAULT_TOP) -> Dict:
+    """
+    Compare tracemalloc snapshots taken `seconds` apart.
+
+    Tracing is started for the session only (unless it was already on),
+    so allocations made before the session are not attributed.
+
+    Args:
+        seconds: Window length (capped at MAX_SESSION_SECONDS)
+        top: Number of allocation sites in the report
+
+    Returns:
+        Report dict with the largest size changes by source line
+
+    Raises:
+        ProfilerBusy: If another session is running
+    """
+    seconds = _bound(seconds)
+
+    with _exclusive():
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+
+    return {
+        'mode': 'tracemalloc',
+        'seconds': seconds,
+        'traced_bytes': traced,
+        'peak_bytes': peak,
+        'growth_bytes': sum(stat.size_diff for stat in diff),
+        'top': [
+            {
+                'location': f'{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                'size_diff': stat.size_diff,
+                'count_diff': stat.count_diff,
+                'size': stat.size,
+            }
+            for stat in diff[:top]
+        ],
+    }
+
+
+@contextmanager
+def _exclusive() -> Iterator[None]:
+    """Allow one session at a time (fails instead of waiting)."""
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusy('Another profiling session is running')
+    try:
+        yield
+    finally:
+        _session_lock.release()
+
+
+def _bound(seconds: float) -> float:
+    """Clamp session length."""
+    return min(max(float(seconds), 0.1), MAX_SESSION_SECONDS)
+
+
+def _short_path(path: str) -> str:
+    """Shorten file path to package-relative form for reports."""
+    parts: Tuple[str, ...] = tuple(path.replace('\\', '/').split('/'))
+    for marker in ('site-packages', 'recognition_service'):
+        if marker in parts:
+            index = parts.index(marker)
+            start = index + 1 if marker == 'site-packages' else index
+            return '/'.join(parts[start:])
+    return os.path.basename(path)
@@ -7,23 +7,49 @@ Contains modules for:
 - Face tracking
 - Presence management
 - Embedding matching
+- Recent match cache
+- Cross-camera track hand-off
+- Motion gating
+- Detection zones (ROI)
+- Detector input size tuning
+- Detection recording and replay
 """
 
-from .quality import compute_blur_score, is_face_acceptable
+from .quality import compute_blur_score, is_face_acceptable, passes_quality_thresholds, quality_weight
 from .preprocessing import preprocess_face_for_insightface
 from .tracker import FaceTrack, FaceTracker, compute_iou
 from .presence import PresenceManager
 from .matching import match_embedding_to_employee
+from .recent_matches import RecentMatchCache
+from .handoff import TrackHandoff, parse_adjacency
+from .motion import MotionGate
+from .roi import DetectionRoi, parse_roi
+from .det_size import DetSizeTuner
+from .detection import FaceDetector
+from .replay import DetectionRecorder, load_recording, replay_recording
 
 __all__ = [
     'compute_blur_score',
     'is_face_acceptable',
+    'passes_quality_thresholds',
+    'quality_weight',
     'preprocess_face_for_insightface',
     'FaceTrack',
     'FaceTracker',
     'compute_iou',
     'PresenceManager',
     'match_embedding_to_employee',
+    'RecentMatchCache',
+    'TrackHandoff',
+    'parse_adjacency',
+    'MotionGate',
+    'DetectionRoi',
+    'parse_roi',
+    'DetSizeTuner',
+    'FaceDetector',
+    'DetectionRecorder',
+    'load_recording',
+    'replay_recording',
 ]
 
 
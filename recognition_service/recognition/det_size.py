@@ -0,0 +1,148 @@
+"""
+Detector input size tuning module.
+
+Picks the smallest InsightFace detection input size that keeps observed
+faces above min_face_height_pixels at detector scale:
+- Rolling window of face heights seen by the camera (frame pixels)
+- Low percentile of that distribution decides the size
+- Hysteresis: grow immediately, shrink only after a stable cooldown
+- Periodic full-size probe so small faces are not filtered out of the stats
+"""
+
+import time
+import numpy as np
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from ..config import Config
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Square detector sizes to choose from (multiples of 32)
+DET_SIZE_LADDER = (160, 224, 320, 416, 512, 640, 800, 960, 1280)
+
+# Face heights kept in the rolling window
+HISTORY_SIZE = 500
+
+# Samples required before the size is tuned
+MIN_SAMPLES = 50
+
+# Percentile of face heights that must stay detectable
+HEIGHT_PERCENTILE = 10
+
+# Headroom required before shrinking (growing happens below 1.0)
+SHRINK_MARGIN = 1.5
+
+# Seconds a smaller size must keep qualifying before switching to it
+SHRINK_COOLDOWN = 60.0
+
+# Seconds between re-evaluations
+EVALUATE_INTERVAL = 5.0
+
+# Seconds between full-size probe detections
+PROBE_INTERVAL = 30.0
+
+
+class DetSizeTuner:
+    """
+    Per-camera detection input size controller.
+
+    The configured insightface_det_size is the upper bound; sizes
+    only go down for cameras where faces are consistently large.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize tuner.
+
+        Args:
+            config: Service configuration
+        """
+        self.config = config
+        self.max_size: Tuple[int, int] = tuple(config.insightface_det_size)
+        self.current: Tuple[int, int] = self.max_size
+        self.heights: deque = deque(maxlen=HISTORY_SIZE)
+        self._candidates: List[Tuple[int, int]] = [
+            (s, s) for s in DET_SIZE_LADDER if s < min(self.max_size)
+        ] + [self.max_size]
+        self._shrink_candidate: Optional[Tuple[int, int]] = None
+        self._shrink_since = 0.0
+        self._last_evaluate = time.monotonic()
+        self._last_probe = self._last_evaluate
+
+    def input_size(self) -> Tuple[int, int]:
+        """
+        Get detector input size for the next detection.
+
+        Returns:
+            (width, height); the maximum size when a probe is due
+        """
+        if not self.config.auto_det_size:
+            return self.max_size
+
+        now = time.monotonic()
+        if self.current != self.max_size and now - self._last_probe >= PROBE_INTERVAL:
+            self._last_probe = now
+            return self.max_size
+        return self.current
+
+    def observe(self, heights: Iterable[float], region_shape: Tuple[int, ...]) -> None:
+        """
+        Record face heights from a detection and re-tune periodically.
+
+        Args:
+            heights: Detected face heights in frame pixels
+            region_shape: Shape of the analysed region (height, width, ...)
+        """
+        if not self.config.auto_det_size:
+            return
+
+        self.heights.extend(heights)
+
+        now = time.monotonic()
+        if now - self._last_evaluate >= EVALUATE_INTERVAL:
+            self._last_evaluate = now
+            self._evaluate(region_shape, now)
+
+    def _evaluate(self, region_shape: Tuple[int, ...], now: float) -> None:
+        """Choose detector size from the face height distribution."""
+        if len(self.heights) < MIN_SAMPLES:
+            return
+
+        low_height = float(np.percentile(self.heights, HEIGHT_PERCENTILE))
+        region_height, region_width = region_shape[:2]
+        required = self.config.min_face_height_pixels
+
+        def fits(size: Tuple[int, int], margin: float) -> bool:
+            # Letterbox scale applied by the detector
+            scale = min(size[0] / region_width, size[1] / region_height)
+            return low_height * scale >= required * margin
+
+        # Grow immediately if faces got too small at current size
+        if not fits(self.current, 1.0):
+            target = next((s for s in self._candidates if fits(s, 1.0)), self.max_size)
+            if target != self.current:
+                self._switch(target, low_height)
+            self._shrink_candidate = None
+            return
+
+        # Shrink only after the smaller size has qualified for a while
+        target = next((s for s in self._candidates if fits(s, SHRINK_MARGIN)), self.current)
+        if target[0] * target[1] >= self.current[0] * self.current[1]:
+            self._shrink_candidate = None
+            return
+
+        if target != self._shrink_candidate:
+            self._shrink_candidate = target
+            self._shrink_since = now
+        elif now - self._shrink_since >= SHRINK_COOLDOWN:
+            self._switch(target, low_height)
+            self._shrink_candidate = None
+
+    def _switch(self, size: Tuple[int, int], low_height: float) -> None:
+        """Apply new detector size."""
+        logger.info(
+            f'Detector input size {self.current[0]}x{self.current[1]} → '
+            f'{size[0]}x{size[1]} (p{HEIGHT_PERCENTILE} face height {low_height:.0f}px)'
+        )
+        self.current = size
@@ -0,0 +1,408 @@
+"""
+Face detection module.
+
+Wraps InsightFace detection with per-camera settings:
+- Region-of-interest cropping (detector resolution spent on zones only)
+- Tiled detection at native scale for high-resolution cameras
+- Auto-tuned detector input size (see det_size.py)
+- Mapping of detections back to full-frame coordinates
+- Separate timing of detection and embedding (non-detection models)
+"""
+
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..config import Config
+from ..logging_config import get_logger
+from .roi import parse_roi
+from .det_size import DetSizeTuner
+
+logger = get_logger(__name__)
+
+# IoU above which detections from different tiles are the same face
+TILE_NMS_THRESHOLD = 0.4
+
+# Boxes closer than this to an inner tile edge are treated as cut off
+TILE_EDGE_MARGIN = 2
+
+
+class FaceDetector:
+    """
+    Per-camera face detector.
+
+    Returns InsightFace Face objects with bbox/landmarks in full-frame
+    coordinates, regardless of which part of the frame was analysed.
+    """
+
+    def __init__(
+        self,
+        face_app: Any,
+        config: Config,
+        record_stage: Optional[Callable[[str, float], None]] = None
+    ):
+        """
+        Initialize detector.
+
+        Args:
+            face_app: InsightFace FaceAnalysis instance
+            config: Service configuration
+            record_stage: Optional callback receiving ('detection'|'embedding', seconds)
+        """
+        self.face_app = face_app
+        self.config = config
+        self.record_stage = record_stage
+        self._embedding_seconds = 0.0
+        self.roi = parse_roi(config.detection_roi)
+        self.det_size = DetSizeTuner(config)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if self.roi:
+            logger.info(f'Detection limited to {len(self.roi.zones)} ROI zone(s)')
+        if config.tiled_detection:
+            logger.info(
+                f'Tiled detection enabled (tile={config.insightface_det_size}, '
+                f'overlap={config.tile_overlap}px, workers={config.tile_workers})'
+            )
+
+    def detect(self, frame: np.ndarray) -> List:
+        """
+        Detect faces in frame.
+
+        Args:
+            frame: BGR frame
+
+        Returns:
+            List of InsightFace Face objects (full-frame coordinates)
+        """
+        if self.roi is None:
+            x1, y1, x2, y2 = 0, 0, frame.shape[1], frame.shape[0]
+        else:
+            x1, y1, x2, y2 = self.roi.bounds(frame.shape)
+            if x2 <= x1 or y2 <= y1:
+                return []
+
+        # Slicing is a view - no copy of the frame
+        region = frame[y1:y2, x1:x2]
+
+        start = time.perf_counter()
+        self._embedding_seconds = 0.0
+        if self._should_tile(region):
+            faces = self._detect_tiled(frame, region, x1, y1)
+        else:
+            faces = self._detect_single(frame, region, x1, y1)
+
+        if self.record_stage is not None:
+            elapsed = time.perf_counter() - start
+            self.record_stage('detection', elapsed - self._embedding_seconds)
+            self.record_stage('embedding', self._embedding_seconds)
+
+        return faces
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get detector statistics.
+
+        Returns:
+            Dict with current detector input size
+        """
+        return {
+            'det_width': float(self.det_size.current[0]),
+            'det_height': float(self.det_size.current[1]),
+        }
+
+    def _detect_single(
+        self,
+        frame: np.ndarray,
+        region: np.ndarray,
+        x0: int,
+        y0: int
+    ) -> List:
+        """
+        Detect faces in one pass at the tuned detector input size.
+
+        Args:
+            frame: Full BGR frame (for embedding extraction)
+            region: Analysed part of the frame
+            x0: Region origin x in frame
+            y0: Region origin y in frame
+
+        Returns:
+            List of InsightFace Face objects (full-frame coordinates)
+        """
+        bboxes, kpss = self.face_app.det_model.detect(
+            region,
+            input_size=self.det_size.input_size(),
+            max_num=0,
+            metric='default'
+        )
+        if len(bboxes) and (x0 or y0):
+            bboxes = bboxes.copy()
+            bboxes[:, [0, 2]] += x0
+            bboxes[:, [1, 3]] += y0
+            if kpss is not None:
+                kpss = kpss.copy()
+                kpss[:, :, 0] += x0
+                kpss[:, :, 1] += y0
+
+        bboxes, kpss = self._filter_roi(frame.shape, bboxes, kpss)
+        # Only faces inside the zones steer the detector input size
+        self.det_size.observe(bboxes[:, 3] - bboxes[:, 1], region.shape)
+
+        if len(bboxes) == 0:
+            return []
+        return self._build_faces(frame, bboxes, kpss)
+
+    def _filter_roi(
+        self,
+        frame_shape: Tuple[int, ...],
+        bboxes: np.ndarray,
+        kpss: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Drop detections whose center lies outside every ROI zone.
+
+        Runs before faces are built, so no alignment or embedding is
+        computed for them.
+
+        Args:
+            frame_shape: Frame shape (height, width, ...)
+            bboxes: Detections Nx5 in full-frame coordinates
+            kpss: Keypoints Nx5x2 or None
+
+        Returns:
+            Tuple of (bboxes, kpss) inside the zones
+        """
+        if self.roi is None or len(bboxes) == 0:
+            return bboxes, kpss
+
+        keep = np.array([
+            self.roi.contains((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2, frame_shape)
+            for bbox in bboxes
+        ])
+        return bboxes[keep], (kpss[keep] if kpss is not None else None)
+
+    def _should_tile(self, region: np.ndarray) -> bool:
+        """Check if region is larger than one detector input."""
+        if not self.config.tiled_detection:
+            return False
+        tile_width, tile_height = self.config.insightface_det_size
+        return region.shape[1] > tile_width or region.shape[0] > tile_height
+
+    def _detect_tiled(
+        self,
+        frame: np.ndarray,
+        region: np.ndarray,
+        x0: int,
+        y0: int
+    ) -> List:
+        """
+        Detect faces on overlapping native-scale tiles plus one
+        downscaled full-region pass (for faces larger than the overlap),
+        then merge with cross-tile NMS.
+
+        Args:
+            frame: Full BGR frame (for embedding extraction)
+            region: Analysed part of the frame
+            x0: Region origin x in frame
+            y0: Region origin y in frame
+
+        Returns:
+            List of InsightFace Face objects (full-frame coordinates)
+        """
+        height, width = region.shape[:2]
+        tile_width, tile_height = self.config.insightface_det_size
+        tiles = tile_grid(width, height, tile_width, tile_height, self.config.tile_overlap)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.config.tile_workers),
+                thread_name_prefix=f'Tiles-{self.config.camera_id}'
+            )
+
+        # Full-region pass: tile=None
+        jobs = [None] + tiles
+        results = list(self._executor.map(lambda tile: self._detect_tile(region, tile), jobs))
+
+        bboxes = np.concatenate([r[0] for r in results])
+        if len(bboxes) == 0:
+            return []
+        kpss = None
+        if all(r[1] is not None for r in results):
+            kpss = np.concatenate([r[1] for r in results])
+
+        keep = nms(bboxes[:, :4], bboxes[:, 4], TILE_NMS_THRESHOLD)
+        bboxes = bboxes[keep]
+        kpss = kpss[keep] if kpss is not None else None
+
+        bboxes[:, [0, 2]] += x0
+        bboxes[:, [1, 3]] += y0
+        if kpss is not None:
+            kpss[:, :, 0] += x0
+            kpss[:, :, 1] += y0
+
+        bboxes, kpss = self._filter_roi(frame.shape, bboxes, kpss)
+        return self._build_faces(frame, bboxes, kpss)
+
+    def _detect_tile(
+        self,
+        region: np.ndarray,
+        tile: Optional[Tuple[int, int, int, int]]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Run the detection model on one tile.
+
+        Args:
+            region: Analysed part of the frame
+            tile: (x, y, width, height) in region coordinates, None for full region
+
+        Returns:
+            Tuple of (bboxes Nx5 with scores, keypoints Nx5x2 or None) in region coordinates
+        """
+        det_model = self.face_app.det_model
+
+        if tile is None:
+            return det_model.detect(region, max_num=0, metric='default')
+
+        tx, ty, tw, th = tile
+        bboxes, kpss = det_model.detect(region[ty:ty + th, tx:tx + tw], max_num=0, metric='default')
+        if len(bboxes) == 0:
+            return bboxes, kpss
+
+        # Drop faces cut off by inner tile edges (an overlapping tile sees them whole)
+        height, width = region.shape[:2]
+        keep = np.ones(len(bboxes), dtype=bool)
+        if tx > 0:
+            keep &= bboxes[:, 0] > TILE_EDGE_MARGIN
+        if ty > 0:
+            keep &= bboxes[:, 1] > TILE_EDGE_MARGIN
+        if tx + tw < width:
+            keep &= bboxes[:, 2] < tw - TILE_EDGE_MARGIN
+        if ty + th < height:
+            keep &= bboxes[:, 3] < th - TILE_EDGE_MARGIN
+
+        bboxes = bboxes[keep].copy()
+        bboxes[:, [0, 2]] += tx
+        bboxes[:, [1, 3]] += ty
+        if kpss is not None:
+            kpss = kpss[keep].copy()
+            kpss[:, :, 0] += tx
+            kpss[:, :, 1] += ty
+        return bboxes, kpss
+
+    def _build_faces(
+        self,
+        frame: np.ndarray,
+        bboxes: np.ndarray,
+        kpss: Optional[np.ndarray]
+    ) -> List:
+        """
+        Create Face objects and run non-detection models (embedding etc.).
+
+        Mirrors FaceAnalysis.get for detections produced outside of it.
+
+        Args:
+            frame: Full BGR frame
+            bboxes: Nx5 boxes with scores (frame coordinates)
+            kpss: Nx5x2 keypoints or None
+
+        Returns:
+            List of InsightFace Face objects
+        """
+        # Import here so the package works without InsightFace (e.g. replay)
+        from insightface.app.common import Face
+
+        start = time.perf_counter()
+        faces = []
+        for i in range(len(bboxes)):
+            face = Face(
+                bbox=bboxes[i, 0:4],
+                kps=kpss[i] if kpss is not None else None,
+                det_score=bboxes[i, 4]
+            )
+            for taskname, model in self.face_app.models.items():
+                if taskname == 'detection':
+                    continue
+                model.get(frame, face)
+            faces.append(face)
+
+        self._embedding_seconds += time.perf_counter() - start
+        return faces
+
+    def close(self) -> None:
+        """Release tile worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def tile_grid(
+    width: int,
+    height: int,
+    tile_width: int,
+    tile_height: int,
+    overlap: int
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Compute overlapping tiles covering an image.
+
+    Tiles have full size where possible; the last tile in each row or
+    column is shifted back to end exactly at the image edge.
+
+    Args:
+        width: Image width
+        height: Image height
+        tile_width: Tile width
+        tile_height: Tile height
+        overlap: Minimum overlap between neighbouring tiles (pixels)
+
+    Returns:
+        List of (x, y, width, height) tiles
+    """
+    def starts(size: int, tile: int) -> List[int]:
+        if size <= tile:
+            return [0]
+        stride = max(1, tile - overlap)
+        positions = list(range(0, size - tile, stride))
+        positions.append(size - tile)
+        return positions
+
+    tw = min(tile_width, width)
+    th = min(tile_height, height)
+    return [
+        (x, y, tw, th)
+        for y in starts(height, th)
+        for x in starts(width, tw)
+    ]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Args:
+        boxes: Nx4 boxes [x1, y1, x2, y2]
+        scores: N scores
+        threshold: IoU above which the lower-scored box is suppressed
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+
+        inter_w = np.maximum(0.0, np.minimum(x2[i], x2[order[1:]]) - np.maximum(x1[i], x1[order[1:]]))
+        inter_h = np.maximum(0.0, np.minimum(y2[i], y2[order[1:]]) - np.maximum(y1[i], y1[order[1:]]))
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[i] + areas[order[1:]] - inter, 1e-6)
+
+        order = order[1:][iou <= threshold]
+
+    return np.array(keep, dtype=int)
+
@@ -0,0 +1,165 @@
+"""
+Cross-camera track hand-off module.
+
+When a person walks out of one camera's view into a neighbouring one,
+the new camera's tracker would start from scratch (MIN_EMBEDDINGS
+embeddings, full gallery search). Camera threads of one service share
+a TrackHandoff instead: recognized tracks publish their latest
+embedding and identity, and a fresh track on a neighbouring camera is
+compared on its first embedding (before any warm-up) against the
+handful of identities seen there within HANDOFF_WINDOW seconds.
+
+Adjacency spec (CAMERA_ADJACENCY): undirected camera ID pairs separated
+by ',', e.g. "1-2,2-3" (empty = all cameras are neighbours).
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+from ..config import Config
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_adjacency(spec: str) -> Optional[Dict[str, Set[str]]]:
+    """
+    Parse camera adjacency spec.
+
+    Args:
+        spec: Camera ID pairs, e.g. "1-2,2-3"
+
+    Returns:
+        Dict of camera ID to neighbour IDs, or None if every camera
+        neighbours every other (empty spec)
+
+    Raises:
+        ValueError: On malformed pairs
+    """
+    if not spec.strip():
+        return None
+
+    adjacency: Dict[str, Set[str]] = {}
+    for pair in spec.split(','):
+        if not pair.strip():
+            continue
+        cameras = [camera.strip() for camera in pair.split('-')]
+        if len(cameras) != 2 or not all(cameras):
+            raise ValueError(f'invalid camera pair {pair.strip()!r} (expected "A-B")')
+        first, second = cameras
+        adjacency.setdefault(first, set()).add(second)
+        adjacency.setdefault(second, set()).add(first)
+    return adjacency
+
+
+class TrackHandoff:
+    """
+    Short-term store of recognized track embeddings shared by cameras (thread-safe).
+
+    Holds one entry per (camera, employee): the latest embedding of the
+    track and the time it was last seen. Entries older than the window
+    are dropped.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize store.
+
+        Args:
+            config: Service configuration (handoff window, threshold, adjacency)
+        """
+        self.window_seconds = config.handoff_window_seconds
+        self.threshold = config.handoff_threshold
+        try:
+            self.adjacency = parse_adjacency(config.camera_adjacency)
+        except ValueError as e:
+            logger.error(f'Invalid CAMERA_ADJACENCY ({e}), treating all cameras as neighbours')
+            self.adjacency = None
+        # (camera ID, employee ID) -> (embedding, last seen)
+        self.entries: Dict[Tuple[str, int], Tuple[np.ndarray, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """False if disabled (HANDOFF_WINDOW=0)."""
+        return self.window_seconds > 0
+
+    def is_neighbour(self, camera_id: str, other_id: str) -> bool:
+        """
+        Check if a person can walk from one camera's view into the other's.
+
+        Args:
+            camera_id: Camera ID
+            other_id: Other camera ID
+
+        Returns:
+            True if the cameras are different and adjacent
+        """
+        if camera_id == other_id:
+            return False
+        if self.adjacency is None:
+            return True
+        return other_id in self.adjacency.get(camera_id, ())
+
+    def publish(
+        self,
+        camera_id: str,
+        emp_id: int,
+        embedding: np.ndarray,
+        now: Optional[float] = None
+    ) -> None:
+        """
+        Record a recognized track's latest embedding.
+
+        Args:
+            camera_id: Camera that sees the employee
+            emp_id: Recognized employee ID
+            embedding: Latest face embedding of the track
+            now: Frame time (defaults to time.time())
+        """
+        if not self.enabled:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self.entries[(camera_id, emp_id)] = (embedding, now)
+
+    def match(
+        self,
+        camera_id: str,
+        embedding: np.ndarray,
+        now: Optional[float] = None
+    ) -> Tuple[Optional[int], float, int]:
+        """
+        Match a fresh track against employees recently seen on neighbouring cameras.
+
+        Args:
+            camera_id: Camera of the fresh track
+            embedding: Track embedding
+            now: Frame time (defaults to time.time())
+
+        Returns:
+            Tuple of (employee_id, confidence, candidate count);
+            employee_id is None without a match above the threshold
+        """
+        if not self.enabled:
+            return None, 0.0, 0
+
+        now = time.time() if now is None else now
+        candidates: List[Tuple[int, np.ndarray]] = []
+        with self._lock:
+            for key, (stored, last_seen) in list(self.entries.items()):
+                if now - last_seen > self.window_seconds:
+                    del self.entries[key]
+                elif self.is_neighbour(camera_id, key[0]):
+                    candidates.append((key[1], stored))
+
+        if not candidates:
+            return None, 0.0, 0
+
+        similarities = np.vstack([stored for _, stored in candidates]) @ embedding
+        best_idx = int(np.argmax(similarities))
+        best_similarity = float(similarities[best_idx])
+        if best_similarity > self.threshold:
+            return candidates[best_idx][0], best_similarity, len(candidates)
+        return None, 0.0, len(candidates)
@@ -0,0 +1,125 @@
+"""
+Motion gating module.
+
+Cheap pre-stage that decides whether running the face detector is worth it:
+1. Downscale frame and convert to grayscale
+2. Compare against a running-average background model
+3. Skip detection on static scenes without live tracks (with a heartbeat)
+"""
+
+import time
+import cv2
+import numpy as np
+from typing import Dict, Optional
+from ..config import Config
+
+# Width of the downscaled frame used for motion analysis
+MOTION_FRAME_WIDTH = 160
+
+# Per-pixel intensity change counted as motion
+PIXEL_DIFF_THRESHOLD = 25
+
+# Background model adaptation rate
+BACKGROUND_ALPHA = 0.05
+
+
+class MotionGate:
+    """
+    Skips face detection on static scenes.
+
+    Detection always runs while tracks are alive (faces may be
+    standing still) and at least once per heartbeat interval so that
+    nothing is missed for long if motion is too subtle to register.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize motion gate.
+
+        Args:
+            config: Service configuration
+        """
+        self.config = config
+        self.background: Optional[np.ndarray] = None
+        self.last_detection = 0.0
+        self.last_motion_score = 0.0
+        self.checks = 0
+        self.skips = 0
+        self.saved_seconds = 0.0
+
+    def should_detect(
+        self,
+        frame: np.ndarray,
+        has_tracks: bool,
+        detection_cost: float = 0.0
+    ) -> bool:
+        """
+        Decide whether the detector should run on this frame.
+
+        Args:
+            frame: Current BGR frame
+            has_tracks: True if tracker has live tracks
+            detection_cost: Estimated detection latency in seconds
+                (accumulated as saved time when skipping)
+
+        Returns:
+            True if detection should run
+        """
+        if not self.config.motion_gate_enabled:
+            return True
+
+        now = time.monotonic()
+        self.checks += 1
+        motion = self._update_motion(frame)
+
+        if (motion or has_tracks or
+                now - self.last_detection >= self.config.motion_heartbeat_seconds):
+            self.last_detection = now
+            return True
+
+        self.skips += 1
+        self.saved_seconds += detection_cost
+        return False
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get gating statistics.
+
+        Returns:
+            Dict with check/skip counters, skip ratio and saved detector time
+        """
+        return {
+            'motion_checks': float(self.checks),
+            'motion_skips': float(self.skips),
+            'motion_skip_ratio': self.skips / self.checks if self.checks else 0.0,
+            'motion_saved_seconds': self.saved_seconds,
+            'motion_score': self.last_motion_score,
+        }
+
+    def _update_motion(self, frame: np.ndarray) -> bool:
+        """
+        Update background model and check for motion.
+
+        Args:
+            frame: Current BGR frame
+
+        Returns:
+            True if the changed pixel fraction exceeds motion_threshold
+        """
+        height, width = frame.shape[:2]
+        small_height = max(1, int(height * MOTION_FRAME_WIDTH / width))
+        # INTER_LINEAR is ~20x cheaper than INTER_AREA here; blur handles the noise
+        small = cv2.resize(frame, (MOTION_FRAME_WIDTH, small_height), interpolation=cv2.INTER_LINEAR)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.last_motion_score = 1.0
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, BACKGROUND_ALPHA)
+
+        self.last_motion_score = float(np.count_nonzero(diff > PIXEL_DIFF_THRESHOLD)) / diff.size
+        return self.last_motion_score > self.config.motion_threshold
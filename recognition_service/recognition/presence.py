@@ -7,7 +7,7 @@ Manages employee presence state and generates IN/OUT events based on:
 """
 
 import time
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 from ..config import Config
 from ..logging_config import get_logger
 
@@ -40,18 +40,23 @@ class PresenceManager:
                 'last_state_change': 0.0,
             }
     
-    def update(self, recognized_employee_ids: List[int]) -> List[Tuple[int, str]]:
+    def update(
+        self,
+        recognized_employee_ids: List[int],
+        now: Optional[float] = None
+    ) -> List[Tuple[int, str]]:
         """
         Update presence states and generate events.
         
         Args:
             recognized_employee_ids: List of currently recognized employee IDs
+            now: Capture time of the frame (wall clock); defaults to time.time()
         
         Returns:
             List of events as tuples (employee_id, event_type)
             where event_type is 'IN' or 'OUT'
         """
-        now = time.time()
+        now = time.time() if now is None else now
         events: List[Tuple[int, str]] = []
         
         # Update last_seen for recognized employees
@@ -108,6 +113,35 @@ class PresenceManager:
                 'last_state_change': 0.0,
             }
             logger.debug(f'Added employee {emp_id} to presence tracking')
+    
+    def apply_delta(self, added: List[int], removed: List[int]) -> None:
+        """
+        Apply employee gallery changes in one step.
+        
+        Args:
+            added: New employee IDs
+            removed: Employee IDs no longer in the gallery (no OUT event is sent)
+        """
+        for emp_id in added:
+            self.add_employee(emp_id)
+        for emp_id in removed:
+            self.remove_employee(emp_id)
+        
+        if added or removed:
+            logger.debug(
+                f'Presence tracking updated: +{len(added)} -{len(removed)} '
+                f'({len(self.state)} employees)'
+            )
+    
+    def remove_employee(self, emp_id: int) -> None:
+        """
+        Remove employee from tracking (no OUT event is sent).
+        
+        Args:
+            emp_id: Employee ID
+        """
+        if self.state.pop(emp_id, None) is not None:
+            logger.debug(f'Removed employee {emp_id} from presence tracking')
 
 
 
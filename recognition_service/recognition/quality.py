@@ -12,6 +12,15 @@ import numpy as np
 from typing import Dict, Tuple
 from ..config import Config
 
+# Face height at which size stops adding to the quality weight (recognition model input)
+FULL_WEIGHT_HEIGHT = 112.0
+
+# Multiple of min_blur_variance at which sharpness stops adding to the quality weight
+FULL_WEIGHT_BLUR_FACTOR = 4.0
+
+# Lower bound of the quality weight (every accepted face counts a little)
+MIN_QUALITY_WEIGHT = 0.05
+
 
 def compute_blur_score(gray_face: np.ndarray) -> float:
     """
@@ -28,6 +37,46 @@ def compute_blur_score(gray_face: np.ndarray) -> float:
     return cv2.Laplacian(gray_face, cv2.CV_64F).var()
 
 
+def passes_quality_thresholds(metrics: Dict[str, float], config: Config) -> bool:
+    """
+    Check quality metrics against configured thresholds.
+    
+    Args:
+        metrics: Metrics dict as returned by is_face_acceptable
+        config: Service configuration
+    
+    Returns:
+        True if face height and sharpness are sufficient
+    """
+    if metrics['height'] < config.min_face_height_pixels:
+        return False
+    
+    if metrics['blur_score'] < config.min_blur_variance:
+        return False
+    
+    return True
+
+
+def quality_weight(metrics: Dict[str, float], config: Config) -> float:
+    """
+    Compute weight of a face in embedding averages.
+    
+    Larger and sharper faces give more reliable embeddings; the weight
+    saturates at FULL_WEIGHT_HEIGHT pixels and FULL_WEIGHT_BLUR_FACTOR
+    times the blur threshold.
+    
+    Args:
+        metrics: Metrics dict as returned by is_face_acceptable
+        config: Service configuration
+    
+    Returns:
+        Weight in range [MIN_QUALITY_WEIGHT, 1]
+    """
+    size = min(1.0, metrics['height'] / FULL_WEIGHT_HEIGHT)
+    sharpness = min(1.0, metrics['blur_score'] / (FULL_WEIGHT_BLUR_FACTOR * max(config.min_blur_variance, 1.0)))
+    return max(size * sharpness, MIN_QUALITY_WEIGHT)
+
+
 def is_face_acceptable(
     face_img_bgr: np.ndarray,
     bbox: np.ndarray,
@@ -74,14 +123,7 @@ def is_face_acceptable(
             'brightness': mean_brightness,
         }
         
-        # Check thresholds
-        if face_height < config.min_face_height_pixels:
-            return False, metrics
-        
-        if blur_score < config.min_blur_variance:
-            return False, metrics
-        
-        return True, metrics
+        return passes_quality_thresholds(metrics, config), metrics
         
     except Exception as e:
         # Return False on any error
@@ -0,0 +1,156 @@
+"""
+Recent match cache.
+
+At a door the same few dozen people are recognized over and over. The
+templates of the last RECENT_MATCH_SIZE recognized employees are kept
+in a compact matrix that is searched before the full gallery; only a
+strict-threshold hit (RECENT_MATCH_THRESHOLD) skips the full search.
+Entries are evicted least recently used and after RECENT_MATCH_TTL
+seconds without a match.
+"""
+
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from ..config import Config
+
+
+class RecentMatchCache:
+    """
+    Templates of recently recognized employees (one cache per camera).
+
+    The cache is tied to the gallery it was filled from: when a
+    different known_embeddings list is passed (gallery reload), it is
+    cleared so removed or re-photographed employees never match.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize cache.
+
+        Args:
+            config: Service configuration
+        """
+        self.capacity = config.recent_match_size
+        self.threshold = config.recent_match_threshold
+        self.ttl_seconds = config.recent_match_ttl_seconds
+        # Employee ID -> (templates, last match time), least recently used first
+        self.entries: 'OrderedDict[int, Tuple[np.ndarray, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._gallery: Optional[List[np.ndarray]] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._row_ids: List[int] = []
+
+    @property
+    def enabled(self) -> bool:
+        """False if disabled (RECENT_MATCH_SIZE=0)."""
+        return self.capacity > 0
+
+    def match(
+        self,
+        embedding: np.ndarray,
+        known_embeddings: List[np.ndarray],
+        now: Optional[float] = None
+    ) -> Tuple[Optional[int], float]:
+        """
+        Match embedding against recently recognized employees.
+
+        Args:
+            embedding: Face embedding to match
+            known_embeddings: Current gallery (cache is cleared when it changes)
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Tuple of (employee_id, confidence) or (None, 0.0) on a miss
+        """
+        if not self.enabled:
+            return None, 0.0
+
+        now = time.time() if now is None else now
+        self._check_gallery(known_embeddings)
+        self._expire(now)
+
+        if self.entries:
+            if self._matrix is None:
+                self._rebuild()
+            similarities = self._matrix @ embedding
+            best_idx = int(np.argmax(similarities))
+            best_similarity = float(similarities[best_idx])
+            if best_similarity > self.threshold:
+                emp_id = self._row_ids[best_idx]
+                templates, _ = self.entries[emp_id]
+                self.entries[emp_id] = (templates, now)
+                self.entries.move_to_end(emp_id)
+                self.hits += 1
+                return emp_id, best_similarity
+
+        self.misses += 1
+        return None, 0.0
+
+    def remember(
+        self,
+        emp_id: int,
+        templates: np.ndarray,
+        known_embeddings: List[np.ndarray],
+        now: Optional[float] = None
+    ) -> None:
+        """
+        Add employee recognized by the full gallery search.
+
+        Args:
+            emp_id: Recognized employee ID
+            templates: Employee's gallery embeddings (one row per photo)
+            known_embeddings: Gallery the templates come from
+            now: Current time (defaults to time.time())
+        """
+        if not self.enabled:
+            return
+
+        self._check_gallery(known_embeddings)
+        self.entries[emp_id] = (templates.astype(np.float32, copy=False), time.time() if now is None else now)
+        self.entries.move_to_end(emp_id)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        self._matrix = None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with hit/miss counters, hit ratio and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'recent_match_hits': float(self.hits),
+            'recent_match_misses': float(self.misses),
+            'recent_match_hit_ratio': self.hits / lookups if lookups else 0.0,
+            'recent_match_size': float(len(self.entries)),
+        }
+
+    def _check_gallery(self, known_embeddings: List[np.ndarray]) -> None:
+        """Clear cache if the gallery was replaced."""
+        if known_embeddings is not self._gallery:
+            self._gallery = known_embeddings
+            self.entries.clear()
+            self._matrix = None
+
+    def _expire(self, now: float) -> None:
+        """Drop entries not matched within the TTL (oldest first)."""
+        while self.entries:
+            emp_id, (_, last_match) = next(iter(self.entries.items()))
+            if now - last_match < self.ttl_seconds:
+                break
+            del self.entries[emp_id]
+            self._matrix = None
+
+    def _rebuild(self) -> None:
+        """Stack templates of all entries into one matrix."""
+        self._row_ids = [
+            emp_id
+            for emp_id, (templates, _) in self.entries.items()
+            for _ in range(len(templates))
+        ]
+        self._matrix = np.vstack([templates for templates, _ in self.entries.values()])
@@ -0,0 +1,439 @@
+"""
+Detection replay module.
+
+Records detector output per processed frame and replays it through the
+tracker, matcher and presence logic without InsightFace or video:
+- DetectionRecorder: collects bboxes, det scores, landmarks, normed
+  embeddings and face quality metrics into columns
+- load_recording / replay_recording: rebuild faces and drive the
+  pipeline with the recorded frame times (deterministic, thousands of
+  frames per second)
+
+File format: compressed .npz with one row per face and per-frame
+offsets into the face columns; every employee gallery used while
+recording (the initial one and each reload) is stored alongside with
+the frame it applies from, so matching is reproducible.
+
+Recordings are capped at RECORD_MAX_FRAMES frames and checkpointed to
+disk every CHECKPOINT_INTERVAL seconds on a background thread (atomic
+replace), so memory stays bounded, capture never waits for compression
+and a crash loses at most the last interval.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..config import Config
+from ..logging_config import get_logger
+from ..tracing import FrameStamp
+from .quality import is_face_acceptable
+from .tracker import FaceTracker
+from .presence import PresenceManager
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 2
+
+# Column order of the recorded quality metrics
+QUALITY_FIELDS = ('height', 'width', 'blur_score', 'brightness')
+
+# Seconds between checkpoints of a running recording
+CHECKPOINT_INTERVAL = 60.0
+
+
+class ReplayFace(dict):
+    """
+    Recorded face with InsightFace Face-style attribute access.
+
+    Carries precomputed 'quality' metrics, so the tracker skips
+    cropping (there is no frame during replay).
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return self.get(name)
+
+
+@dataclass
+class Recording:
+    """Detection recording loaded into memory."""
+    frame_seq: np.ndarray
+    frame_time: np.ndarray
+    detected: np.ndarray
+    face_offsets: np.ndarray
+    bboxes: np.ndarray
+    det_scores: np.ndarray
+    kps: np.ndarray
+    embeddings: np.ndarray
+    quality: np.ndarray
+    gallery_embeddings: np.ndarray
+    gallery_ids: np.ndarray
+    gallery_offsets: np.ndarray
+    gallery_start: np.ndarray
+
+    @property
+    def frames(self) -> int:
+        """Number of recorded frames."""
+        return len(self.frame_seq)
+
+    @property
+    def galleries(self) -> int:
+        """Number of recorded galleries (1 + reloads while recording)."""
+        return len(self.gallery_start)
+
+    def gallery(self, index: int) -> Tuple[List[np.ndarray], List[int]]:
+        """
+        Get one recorded gallery.
+
+        Args:
+            index: Gallery index (0 = gallery at the start of the recording)
+
+        Returns:
+            Tuple of (known_embeddings, known_ids)
+        """
+        start, end = self.gallery_offsets[index], self.gallery_offsets[index + 1]
+        return (
+            list(self.gallery_embeddings[start:end]),
+            [int(emp_id) for emp_id in self.gallery_ids[start:end]],
+        )
+
+    def iter_frames(self) -> Iterator[Tuple[FrameStamp, bool, List[ReplayFace]]]:
+        """
+        Iterate recorded frames.
+
+        Yields:
+            Tuple of (stamp, detection ran, faces)
+        """
+        for index in range(self.frames):
+            start, end = self.face_offsets[index], self.face_offsets[index + 1]
+            faces = [
+                ReplayFace(
+                    bbox=self.bboxes[i],
+                    kps=self.kps[i],
+                    det_score=self.det_scores[i],
+                    normed_embedding=self.embeddings[i],
+                    quality=dict(zip(QUALITY_FIELDS, self.quality[i].tolist())),
+                )
+                for i in range(start, end)
+            ]
+            # Recorded wall time stands in for both clocks (no live latency here)
+            stamp = FrameStamp(
+                seq=int(self.frame_seq[index]),
+                captured_at=float(self.frame_time[index]),
+                captured_mono=float(self.frame_time[index]),
+            )
+            yield stamp, bool(self.detected[index]), faces
+
+
+class DetectionRecorder:
+    """
+    Accumulates detector output per processed frame and writes it as .npz.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        known_embeddings: List[np.ndarray],
+        known_ids: List[int],
+        config: Config,
+        keep_existing: bool = False
+    ):
+        """
+        Initialize recorder.
+
+        Args:
+            path: Output file (.npz)
+            known_embeddings: Employee gallery at the start of the recording
+            known_ids: Employee IDs of the gallery
+            config: Service configuration
+            keep_existing: Write to a numbered path (name-1.npz, ...) if
+                path exists, e.g. when a restarted camera thread records again
+        """
+        self.path = _unused_path(path) if keep_existing else path
+        self.config = config
+        # (first frame index, embeddings, IDs) per gallery, oldest first
+        self._galleries: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        self._frame_seq: List[int] = []
+        self._frame_time: List[float] = []
+        self._detected: List[bool] = []
+        self._face_counts: List[int] = []
+        self._bboxes: List[np.ndarray] = []
+        self._det_scores: List[float] = []
+        self._kps: List[np.ndarray] = []
+        self._embeddings: List[np.ndarray] = []
+        self._quality: List[List[float]] = []
+        self.max_frames = config.record_max_frames
+        self._dirty = False
+        self._last_checkpoint = time.monotonic()
+        self._writer: Optional[threading.Thread] = None
+        self.set_gallery(known_embeddings, known_ids)
+
+    @property
+    def full(self) -> bool:
+        """True once max_frames frames are recorded (0 = unlimited)."""
+        return 0 < self.max_frames <= len(self._frame_seq)
+
+    def set_gallery(self, known_embeddings: List[np.ndarray], known_ids: List[int]) -> None:
+        """
+        Record a reloaded gallery (applies from the next recorded frame).
+
+        Args:
+            known_embeddings: Employee embeddings
+            known_ids: Employee IDs
+        """
+        entry = (
+            len(self._frame_seq),
+            np.asarray(known_embeddings, dtype=np.float32),
+            np.asarray(known_ids, dtype=np.int64),
+        )
+        if self._galleries and self._galleries[-1][0] == entry[0]:
+            # No frame was recorded with the previous gallery
+            self._galleries[-1] = entry
+        else:
+            self._galleries.append(entry)
+        self._dirty = True
+
+    def add(self, stamp: FrameStamp, frame: Optional[np.ndarray], faces: Optional[List]) -> None:
+        """
+        Record one processed frame.
+
+        Args:
+            stamp: Frame stamp
+            frame: BGR frame (for quality metrics; None if detection was skipped)
+            faces: InsightFace Face objects, or None if detection was skipped
+        """
+        if self.full:
+            return
+
+        self._frame_seq.append(stamp.seq)
+        self._frame_time.append(stamp.captured_at)
+        self._detected.append(faces is not None)
+
+        faces = faces or []
+        self._face_counts.append(len(faces))
+        for face in faces:
+            bbox = np.asarray(face.bbox, dtype=np.float32)
+            x1, y1, x2, y2 = bbox.astype(int)
+            crop = frame[max(0, y1):y2, max(0, x1):x2]
+            _, quality = is_face_acceptable(crop, bbox, self.config)
+
+            self._bboxes.append(bbox)
+            self._det_scores.append(float(face.det_score))
+            self._kps.append(
+                np.asarray(face.kps, dtype=np.float32) if face.kps is not None
+                else np.zeros((5, 2), dtype=np.float32)
+            )
+            self._embeddings.append(np.asarray(face.normed_embedding, dtype=np.float32))
+            self._quality.append([float(quality.get(field, 0.0)) for field in QUALITY_FIELDS])
+        self._dirty = True
+
+        if self.full:
+            logger.info(f'Detection recording reached {self.max_frames} frames, stopped recording')
+            self.checkpoint()
+        elif time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Write recording on a background thread.
+
+        Errors are logged, not raised (the next checkpoint retries); a
+        checkpoint still being written is not waited for.
+        """
+        self._last_checkpoint = time.monotonic()
+        if not self._dirty or (self._writer is not None and self._writer.is_alive()):
+            return
+
+        snapshot = self._snapshot()
+        self._writer = threading.Thread(
+            target=self._checkpoint_worker, args=(snapshot,), daemon=True, name='Recording-Checkpoint'
+        )
+        self._writer.start()
+
+    def save(self) -> None:
+        """
+        Write recording now (waits for a running checkpoint).
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        if self._writer is not None:
+            self._writer.join()
+        self._last_checkpoint = time.monotonic()
+        if self._dirty:
+            self._write_file(self._snapshot())
+
+    def _snapshot(self) -> Tuple[int, int, List[Tuple[int, np.ndarray, np.ndarray]]]:
+        """
+        Capture what to write (columns only grow, so counts suffice).
+
+        Returns:
+            Tuple of (frame count, face count, galleries)
+        """
+        self._dirty = False
+        return len(self._frame_seq), len(self._bboxes), list(self._galleries)
+
+    def _checkpoint_worker(self, snapshot: Tuple[int, int, List[Tuple[int, np.ndarray, np.ndarray]]]) -> None:
+        """Write checkpoint, logging errors."""
+        try:
+            self._write_file(snapshot)
+        except Exception as e:
+            self._dirty = True
+            logger.error(f'Detection recording checkpoint failed ({self.path}): {e}')
+
+    def _write_file(self, snapshot: Tuple[int, int, List[Tuple[int, np.ndarray, np.ndarray]]]) -> None:
+        """Write snapshot (compressed npz, atomic replace of path)."""
+        frames, faces, galleries = snapshot
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.recording-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._write(f, frames, faces, galleries)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        logger.info(f'Saved detection recording: {frames} frames, {faces} faces → {self.path}')
+
+    def _write(
+        self,
+        f: Any,
+        frames: int,
+        faces: int,
+        galleries: List[Tuple[int, np.ndarray, np.ndarray]]
+    ) -> None:
+        """Write the first frames/faces rows of the columns to an open file."""
+        dim = len(self._embeddings[0]) if faces else next(
+            (embeddings.shape[1] for _, embeddings, _ in galleries if embeddings.ndim == 2), 512
+        )
+
+        np.savez_compressed(
+            f,
+            version=np.array([FORMAT_VERSION]),
+            frame_seq=np.asarray(self._frame_seq[:frames], dtype=np.int64),
+            frame_time=np.asarray(self._frame_time[:frames], dtype=np.float64),
+            detected=np.asarray(self._detected[:frames], dtype=bool),
+            face_offsets=np.concatenate([[0], np.cumsum(self._face_counts[:frames], dtype=np.int64)]),
+            bboxes=np.asarray(self._bboxes[:faces], dtype=np.float32).reshape(-1, 4),
+            det_scores=np.asarray(self._det_scores[:faces], dtype=np.float32),
+            kps=np.asarray(self._kps[:faces], dtype=np.float32).reshape(-1, 5, 2),
+            embeddings=np.asarray(self._embeddings[:faces], dtype=np.float32).reshape(-1, dim),
+            quality=np.asarray(self._quality[:faces], dtype=np.float32).reshape(-1, len(QUALITY_FIELDS)),
+            gallery_embeddings=np.concatenate(
+                [embeddings.reshape(-1, dim) for _, embeddings, _ in galleries]
+            ),
+            gallery_ids=np.concatenate([ids for _, _, ids in galleries]),
+            gallery_offsets=np.concatenate(
+                [[0], np.cumsum([len(ids) for _, _, ids in galleries], dtype=np.int64)]
+            ),
+            gallery_start=np.asarray([start for start, _, _ in galleries], dtype=np.int64),
+        )
+
+
+def _unused_path(path: str) -> str:
+    """
+    Get path, or the first free numbered variant if it exists.
+
+    Args:
+        path: Preferred file path
+
+    Returns:
+        path or e.g. "det-1-2.npz" for "det-1.npz"
+    """
+    root, ext = os.path.splitext(path)
+    candidate, number = path, 1
+    while os.path.exists(candidate):
+        number += 1
+        candidate = f'{root}-{number}{ext}'
+    return candidate
+
+
+def load_recording(path: str) -> Recording:
+    """
+    Load detection recording.
+
+    Args:
+        path: Recording file (.npz)
+
+    Returns:
+        Recording
+
+    Raises:
+        ValueError: On unsupported format version
+    """
+    with np.load(path) as data:
+        version = int(data['version'][0])
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f'Unsupported recording version {version} (expected {FORMAT_VERSION})')
+        columns = {name: data[name] for name in data.files if name in Recording.__dataclass_fields__}
+
+    if version == 1:
+        # Single gallery for the whole recording
+        columns['gallery_offsets'] = np.array([0, len(columns['gallery_ids'])], dtype=np.int64)
+        columns['gallery_start'] = np.zeros(1, dtype=np.int64)
+    return Recording(**columns)
+
+
+def replay_recording(recording: Recording, config: Config) -> Dict[str, Any]:
+    """
+    Run tracker, matcher and presence over a recording.
+
+    Time-based logic (track ageing, IN/OUT thresholds) follows the
+    recorded frame times, so results do not depend on replay speed.
+    Galleries reloaded while recording are switched in at the frame
+    the live service picked them up.
+
+    Args:
+        recording: Loaded recording
+        config: Service configuration (thresholds under test)
+
+    Returns:
+        Dict with events, recognition counts and replay throughput
+    """
+    gallery_index = 0
+    known_embeddings, known_ids = recording.gallery(gallery_index)
+
+    tracker = FaceTracker(config)
+    presence_manager = PresenceManager(known_ids, config)
+    events: List[Dict[str, Any]] = []
+    recognized_track_ids = set()
+
+    start = time.perf_counter()
+    for index, (stamp, detected, faces) in enumerate(recording.iter_frames()):
+        # Gallery reloaded at this frame
+        while gallery_index + 1 < recording.galleries and index >= recording.gallery_start[gallery_index + 1]:
+            gallery_index += 1
+            previous_ids = set(known_ids)
+            known_embeddings, known_ids = recording.gallery(gallery_index)
+            presence_manager.apply_delta(
+                sorted(set(known_ids) - previous_ids),
+                sorted(previous_ids - set(known_ids)),
+            )
+
+        recognized_tracks = []
+        if detected:
+            recognized_tracks = tracker.update(faces, None, known_embeddings, known_ids, stamp=stamp)
+            recognized_track_ids.update(t.track_id for t in recognized_tracks)
+
+        recognized_emp_ids = [t.recognized_employee_id for t in recognized_tracks]
+        for emp_id, event_type in presence_manager.update(recognized_emp_ids, now=stamp.captured_at):
+            events.append({
+                'employeeId': emp_id,
+                'type': event_type,
+                'frameSeq': stamp.seq,
+                'time': round(stamp.captured_at - float(recording.frame_time[0]), 3),
+            })
+    elapsed = time.perf_counter() - start
+
+    return {
+        'frames': recording.frames,
+        'faces': int(recording.face_offsets[-1]),
+        'tracks_created': tracker.next_track_id - 1,
+        'tracks_recognized': len(recognized_track_ids),
+        'events': events,
+        'replay_seconds': elapsed,
+        'frames_per_second': recording.frames / elapsed if elapsed > 0 else 0.0,
+    }
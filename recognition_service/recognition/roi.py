@@ -0,0 +1,144 @@
+"""
+Detection region-of-interest module.
+
+Parses per-camera detection zones and maps them onto frames.
+
+Zone spec formats:
+- Compact string: zones separated by '|', points by ';', coordinates by ','
+    "0.3,0.1;0.7,0.9"                  - rectangle (two corners)
+    "100,50;600,40;640,700;90,710"     - polygon (3+ points)
+- JSON list of zones, each a list of [x, y] points
+
+Coordinates that are all within [0, 1] are treated as fractions of
+the frame size, otherwise as pixels.
+"""
+
+import json
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DetectionRoi:
+    """
+    Set of detection zones (rectangles or polygons) for one camera.
+
+    Detection runs on the bounding rectangle of all zones; faces whose
+    center falls outside every zone are discarded.
+    """
+
+    def __init__(self, zones: List[np.ndarray]):
+        """
+        Initialize ROI.
+
+        Args:
+            zones: List of Nx2 point arrays (rectangles as 4-point polygons)
+        """
+        self.zones = zones
+        self.normalized = all(float(zone.max()) <= 1.0 for zone in zones)
+        self._shape: Optional[Tuple[int, int]] = None
+        self._pixel_zones: List[np.ndarray] = []
+        self._bounds: Tuple[int, int, int, int] = (0, 0, 0, 0)
+
+    def resolve(self, frame_shape: Tuple[int, ...]) -> List[np.ndarray]:
+        """
+        Get zones in pixel coordinates for given frame size (cached).
+
+        Args:
+            frame_shape: Frame shape (height, width, ...)
+
+        Returns:
+            List of Nx2 float32 pixel polygons
+        """
+        shape = (int(frame_shape[0]), int(frame_shape[1]))
+        if shape != self._shape:
+            height, width = shape
+            scale = np.array([width, height], dtype=np.float32) if self.normalized else 1.0
+            self._pixel_zones = [(zone * scale).astype(np.float32) for zone in self.zones]
+
+            points = np.concatenate(self._pixel_zones)
+            x1, y1 = np.floor(points.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(points.max(axis=0)).astype(int)
+            self._bounds = (
+                max(0, int(x1)), max(0, int(y1)),
+                min(width, int(x2)), min(height, int(y2)),
+            )
+            self._shape = shape
+        return self._pixel_zones
+
+    def bounds(self, frame_shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """
+        Get bounding rectangle of all zones, clipped to the frame.
+
+        Args:
+            frame_shape: Frame shape (height, width, ...)
+
+        Returns:
+            Rectangle (x1, y1, x2, y2) in pixels
+        """
+        self.resolve(frame_shape)
+        return self._bounds
+
+    def contains(self, x: float, y: float, frame_shape: Tuple[int, ...]) -> bool:
+        """
+        Check if a point lies inside any zone.
+
+        Args:
+            x: Point x in frame pixels
+            y: Point y in frame pixels
+            frame_shape: Frame shape (height, width, ...)
+
+        Returns:
+            True if inside (or on the edge of) any zone
+        """
+        return any(
+            cv2.pointPolygonTest(zone, (float(x), float(y)), False) >= 0
+            for zone in self.resolve(frame_shape)
+        )
+
+
+def parse_roi(spec: str) -> Optional[DetectionRoi]:
+    """
+    Parse detection zone spec.
+
+    Args:
+        spec: Zone spec (compact string or JSON), empty for full frame
+
+    Returns:
+        DetectionRoi or None if spec is empty or invalid
+    """
+    if not spec or not spec.strip():
+        return None
+
+    try:
+        if spec.lstrip().startswith('['):
+            raw_zones = json.loads(spec)
+        else:
+            raw_zones = [
+                [point.split(',') for point in zone.split(';') if point.strip()]
+                for zone in spec.split('|') if zone.strip()
+            ]
+
+        zones: List[np.ndarray] = []
+        for raw_zone in raw_zones:
+            points = np.array(raw_zone, dtype=np.float32).reshape(-1, 2)
+            if len(points) == 2:
+                (x1, y1), (x2, y2) = points
+                points = np.array(
+                    [[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32
+                )
+            elif len(points) < 2:
+                raise ValueError(f'zone needs at least 2 points, got {len(points)}')
+            zones.append(points)
+
+        if not zones:
+            return None
+
+        return DetectionRoi(zones)
+
+    except (ValueError, TypeError) as e:
+        logger.warning(f'Invalid detection ROI "{spec}", using full frame: {e}')
+        return None
@@ -2,14 +2,25 @@
 Face tracking module.
 
 Tracks faces across frames using IoU (Intersection over Union) matching.
-Accumulates embeddings per track for more reliable recognition.
+Accumulates embeddings per track for more reliable recognition:
+- A confident first embedding (EARLY_ACCEPT_THRESHOLD) resolves the track at once
+- Otherwise the quality-weighted average is matched from MIN_EMBEDDINGS on
+- After failed attempts, matching backs off (every 2, 4, 8... new embeddings)
+- A fresh track is first compared with identities just seen on neighbouring
+  cameras (shared TrackHandoff), skipping the full recognition cycle
+- Recognized tracks re-verify their identity against the assigned employee's
+  template after 1, 2, 4... seconds (REVERIFY_INTERVAL), with a full search
+  only if verification fails
 """
 
 import time
 import numpy as np
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Tuple
 from ..config import Config
 from ..logging_config import get_logger
+from ..tracing import FrameStamp
+from .recent_matches import RecentMatchCache
+from .handoff import TrackHandoff
 
 logger = get_logger(__name__)
 
@@ -47,6 +58,19 @@ def compute_iou(bbox1: np.ndarray, bbox2: np.ndarray) -> float:
     return inter_area / union_area
 
 
+def first_attempt_at(config: Config) -> int:
+    """
+    Get embedding count of a fresh track's first recognition attempt.
+    
+    Args:
+        config: Service configuration
+    
+    Returns:
+        1 with early accepts enabled, else min_embeddings_per_track
+    """
+    return 1 if config.early_accept_threshold > 0 else config.min_embeddings_per_track
+
+
 class FaceTrack:
     """
     Represents a single face track across frames.
@@ -54,12 +78,13 @@ class FaceTrack:
     Accumulates embeddings and quality scores for reliable recognition.
     """
     
-    def __init__(self, track_id: int):
+    def __init__(self, track_id: int, first_attempt_at: int = 1):
         """
         Initialize face track.
         
         Args:
             track_id: Unique track identifier
+            first_attempt_at: Embedding count of the first recognition attempt
         """
         self.track_id = track_id
         self.embeddings: List[np.ndarray] = []
@@ -68,12 +93,22 @@ class FaceTrack:
         self.last_update_time: float = time.time()
         self.recognized_employee_id: Optional[int] = None
         self.recognition_confidence: float = 0.0
+        self.first_stamp: Optional[FrameStamp] = None
+        self.last_stamp: Optional[FrameStamp] = None
+        self.next_attempt_at = first_attempt_at
+        self.failed_attempts = 0
+        # Identity verification (assigned employee's templates, source gallery)
+        self.template: Optional[np.ndarray] = None
+        self.template_gallery: Optional[List[np.ndarray]] = None
+        self.verify_interval = 0.0
+        self.next_verify_at = 0.0
     
     def add_embedding(
         self,
         embedding: np.ndarray,
         quality: Dict,
-        bbox: np.ndarray
+        bbox: np.ndarray,
+        stamp: Optional[FrameStamp] = None
     ) -> None:
         """
         Add embedding to track.
@@ -82,48 +117,175 @@ class FaceTrack:
             embedding: Face embedding
             quality: Quality metrics dict
             bbox: Bounding box
+            stamp: Frame the face was seen in (its capture time is the update time)
         """
         self.embeddings.append(embedding)
         self.quality_scores.append(quality)
         self.last_bbox = bbox
-        self.last_update_time = time.time()
+        self.last_update_time = stamp.captured_at if stamp is not None else time.time()
+        if stamp is not None:
+            if self.first_stamp is None:
+                self.first_stamp = stamp
+            self.last_stamp = stamp
     
     def is_ready_for_recognition(self, config: Config) -> bool:
         """
-        Check if track has enough embeddings for recognition.
+        Check if a recognition attempt is due.
+        
+        Args:
+            config: Service configuration
+        
+        Returns:
+            True if unrecognized and the next attempt's embedding count is reached
+        """
+        return self.recognized_employee_id is None and len(self.embeddings) >= self.next_attempt_at
+    
+    def accepts_match(self, confidence: float, config: Config) -> bool:
+        """
+        Check if a match may resolve the track now.
+        
+        Before min_embeddings_per_track embeddings only a confident
+        match (early_accept_threshold) is accepted.
         
         Args:
+            confidence: Match confidence
             config: Service configuration
         
         Returns:
-            True if ready
+            True if accepted
         """
-        return len(self.embeddings) >= config.min_embeddings_per_track
+        if len(self.embeddings) >= config.min_embeddings_per_track:
+            return True
+        return 0 < config.early_accept_threshold <= confidence
     
-    def get_average_embedding(self) -> Optional[np.ndarray]:
+    def attempt_failed(self, config: Config) -> None:
+        """
+        Schedule next recognition attempt after a miss.
+        
+        Early attempts are followed by the regular one at
+        min_embeddings_per_track; after that the gap doubles with every
+        failure, up to recognition_backoff_max embeddings.
+        
+        Args:
+            config: Service configuration
+        """
+        count = len(self.embeddings)
+        if count < config.min_embeddings_per_track:
+            self.next_attempt_at = config.min_embeddings_per_track
+            return
+        self.failed_attempts += 1
+        gap = min(2 ** self.failed_attempts, max(config.recognition_backoff_max, 1))
+        self.next_attempt_at = count + gap
+    
+    def recognize(
+        self,
+        emp_id: int,
+        confidence: float,
+        template: Optional[np.ndarray],
+        gallery: List[np.ndarray],
+        now: float,
+        config: Config
+    ) -> None:
+        """
+        Assign identity and schedule its first re-verification.
+        
+        Args:
+            emp_id: Recognized employee ID
+            confidence: Match confidence
+            template: Employee's gallery embeddings (rows)
+            gallery: Gallery the template was taken from
+            now: Current time
+            config: Service configuration
+        """
+        self.recognized_employee_id = emp_id
+        self.recognition_confidence = confidence
+        self.template = template
+        self.template_gallery = gallery
+        self.verify_interval = config.reverify_interval
+        self.next_verify_at = now + self.verify_interval
+    
+    def is_due_for_verification(self, now: float, config: Config) -> bool:
+        """
+        Check if the assigned identity should be re-verified.
+        
+        Args:
+            now: Current time
+            config: Service configuration
+        
+        Returns:
+            True if recognized, re-verification is enabled and due
+        """
+        return (
+            self.recognized_employee_id is not None and
+            config.reverify_interval > 0 and
+            now >= self.next_verify_at
+        )
+    
+    def verified(self, now: float, config: Config) -> None:
+        """
+        Schedule next re-verification after a successful one (interval doubles).
+        
+        Args:
+            now: Current time
+            config: Service configuration
+        """
+        self.verify_interval = min(self.verify_interval * 2, max(config.reverify_interval_max, config.reverify_interval))
+        self.next_verify_at = now + self.verify_interval
+    
+    def reset_identity(self, config: Config) -> None:
+        """
+        Drop identity after a failed verification.
+        
+        Earlier embeddings may belong to someone else (IoU identity swap),
+        so recognition restarts from the latest embedding.
+        
+        Args:
+            config: Service configuration
+        """
+        self.recognized_employee_id = None
+        self.recognition_confidence = 0.0
+        self.template = None
+        self.template_gallery = None
+        self.embeddings = self.embeddings[-1:]
+        self.quality_scores = self.quality_scores[-1:]
+        self.next_attempt_at = first_attempt_at(config)
+        self.failed_attempts = 0
+    
+    def get_average_embedding(self, config: Optional[Config] = None) -> Optional[np.ndarray]:
         """
         Get average embedding across all frames.
         
-        More reliable than single frame.
+        More reliable than single frame. With config, embeddings are
+        weighted by face quality (size and sharpness).
+        
+        Args:
+            config: Service configuration (None = plain average)
         
         Returns:
             Average embedding or None
         """
+        from .quality import quality_weight
+        
         if not self.embeddings:
             return None
-        return np.mean(self.embeddings, axis=0)
+        if config is None or len(self.embeddings) == 1:
+            return np.mean(self.embeddings, axis=0)
+        weights = [quality_weight(quality, config) for quality in self.quality_scores]
+        return np.average(self.embeddings, axis=0, weights=weights)
     
-    def is_alive(self, config: Config) -> bool:
+    def is_alive(self, config: Config, now: Optional[float] = None) -> bool:
         """
         Check if track is still active.
         
         Args:
             config: Service configuration
+            now: Current time (defaults to time.time())
         
         Returns:
             True if recently updated
         """
-        return (time.time() - self.last_update_time) < config.track_max_age_seconds
+        now = time.time() if now is None else now
+        return (now - self.last_update_time) < config.track_max_age_seconds
 
 
 class FaceTracker:
@@ -133,23 +295,49 @@ class FaceTracker:
     Matches detected faces to existing tracks using IoU.
     """
     
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        record_stage: Optional[Callable[[str, float], None]] = None,
+        handoff: Optional[TrackHandoff] = None,
+        camera_id: str = ''
+    ):
         """
         Initialize face tracker.
         
         Args:
             config: Service configuration
+            record_stage: Optional callback receiving ('tracking'|'matching', seconds)
+            handoff: Cross-camera hand-off store shared with other cameras
+            camera_id: This camera's ID in the hand-off store
         """
         self.config = config
+        self.record_stage = record_stage
+        self.handoff = handoff if handoff is not None and handoff.enabled else None
+        self.camera_id = camera_id
         self.tracks: List[FaceTrack] = []
         self.next_track_id = 1
+        self.recent_matches = RecentMatchCache(config)
+        # Per-gallery template index: employee ID -> gallery rows / stacked templates
+        self._index_gallery: Optional[List[np.ndarray]] = None
+        self._template_rows: Dict[int, List[int]] = {}
+        self._templates: Dict[int, np.ndarray] = {}
+        self.recognition_attempts = 0
+        self.early_accepts = 0
+        self.backoff_skips = 0
+        self.verifications = 0
+        self.verification_failures = 0
+        self.identity_swaps = 0
+        self.handoff_hits = 0
+        self.handoff_misses = 0
     
     def update(
         self,
         faces: List,
         frame: np.ndarray,
         known_embeddings: List[np.ndarray],
-        known_ids: List[int]
+        known_ids: List[int],
+        stamp: Optional[FrameStamp] = None
     ) -> List[FaceTrack]:
         """
         Update tracks with newly detected faces.
@@ -159,16 +347,22 @@ class FaceTracker:
             frame: Current frame for face cropping
             known_embeddings: Known employee embeddings
             known_ids: Known employee IDs
+            stamp: Sequence number and capture time of the frame
         
         Returns:
             List of tracks with recognized employees
         """
-        from .matching import match_embedding_to_employee
-        from .quality import is_face_acceptable
+        from .quality import is_face_acceptable, passes_quality_thresholds
         from .preprocessing import preprocess_face_for_insightface
         
+        start = time.perf_counter()
+        matching_seconds = 0.0
+        
+        # Frame time drives track ageing (capture time when stamped)
+        now = stamp.captured_at if stamp is not None else None
+        
         # Remove dead tracks
-        self.tracks = [t for t in self.tracks if t.is_alive(self.config)]
+        self.tracks = [t for t in self.tracks if t.is_alive(self.config, now)]
         
         matched_track_ids = set()
         
@@ -176,15 +370,21 @@ class FaceTracker:
             bbox = face.bbox
             embedding = face.normed_embedding
             
-            # Crop face from frame
-            x1, y1, x2, y2 = bbox.astype(int)
-            face_crop = frame[y1:y2, x1:x2] if frame is not None else None
-            
-            if face_crop is None or face_crop.size == 0:
-                continue
-            
-            # Quality check
-            acceptable, quality = is_face_acceptable(face_crop, bbox, self.config)
+            quality = face.get('quality')
+            if quality is not None:
+                # Recorded metrics (detection replay): only re-check thresholds
+                face_crop = None
+                acceptable = passes_quality_thresholds(quality, self.config)
+            else:
+                # Crop face from frame
+                x1, y1, x2, y2 = bbox.astype(int)
+                face_crop = frame[y1:y2, x1:x2] if frame is not None else None
+                
+                if face_crop is None or face_crop.size == 0:
+                    continue
+                
+                # Quality check
+                acceptable, quality = is_face_acceptable(face_crop, bbox, self.config)
             
             if not acceptable:
                 # Bad quality - skip
@@ -195,44 +395,277 @@ class FaceTracker:
             
             if best_track:
                 # Preprocessing (as in original code)
-                preprocessed = preprocess_face_for_insightface(face_crop, self.config)
+                if face_crop is not None:
+                    preprocessed = preprocess_face_for_insightface(face_crop, self.config)
                 
                 # Update existing track
-                best_track.add_embedding(embedding, quality, bbox)
+                best_track.add_embedding(embedding, quality, bbox, stamp)
                 matched_track_ids.add(best_track.track_id)
                 
-                # Try recognition if ready
-                if (best_track.is_ready_for_recognition(self.config) and
-                    not best_track.recognized_employee_id):
-                    
-                    avg_embedding = best_track.get_average_embedding()
-                    if avg_embedding is not None:
-                        emp_id, confidence = match_embedding_to_employee(
-                            avg_embedding, known_embeddings, known_ids, self.config
-                        )
-                        
-                        if emp_id:
-                            best_track.recognized_employee_id = emp_id
-                            best_track.recognition_confidence = confidence
-                            logger.info(
-                                f'Track {best_track.track_id} → Employee {emp_id} '
-                                f'(confidence: {confidence:.3f}, '
-                                f'embeddings: {len(best_track.embeddings)})'
-                            )
+                # Try recognition if due (re-verify recognized tracks)
+                matching_seconds += self._try_recognition(
+                    best_track, known_embeddings, known_ids, now
+                )
+                self._publish_handoff(best_track, now)
             else:
                 # Preprocessing (as in original code)
-                preprocessed = preprocess_face_for_insightface(face_crop, self.config)
+                if face_crop is not None:
+                    preprocessed = preprocess_face_for_insightface(face_crop, self.config)
                 
-                # Create new track
-                new_track = FaceTrack(self.next_track_id)
+                # Create new track (first attempt only if early accepts are on)
+                new_track = FaceTrack(self.next_track_id, first_attempt_at(self.config))
                 self.next_track_id += 1
-                new_track.add_embedding(embedding, quality, bbox)
+                new_track.add_embedding(embedding, quality, bbox, stamp)
                 self.tracks.append(new_track)
                 logger.debug(f'Created new track {new_track.track_id}')
+                
+                matching_seconds += self._try_recognition(
+                    new_track, known_embeddings, known_ids, now
+                )
+                self._publish_handoff(new_track, now)
+        
+        if self.record_stage is not None:
+            self.record_stage('tracking', time.perf_counter() - start - matching_seconds)
+            if matching_seconds:
+                self.record_stage('matching', matching_seconds)
         
         # Return recognized tracks
         return [t for t in self.tracks if t.recognized_employee_id is not None]
     
+    def _try_recognition(
+        self,
+        track: FaceTrack,
+        known_embeddings: List[np.ndarray],
+        known_ids: List[int],
+        now: Optional[float]
+    ) -> float:
+        """
+        Match track against employees if an attempt is due.
+        
+        Recognized tracks are re-verified instead (see _verify_identity).
+        
+        Args:
+            track: Updated track
+            known_embeddings: Known employee embeddings
+            known_ids: Known employee IDs
+            now: Frame time (None = wall clock)
+        
+        Returns:
+            Seconds spent matching
+        """
+        from .matching import match_embedding_to_employee
+        
+        if track.recognized_employee_id is not None:
+            return self._verify_identity(track, known_embeddings, known_ids, now)
+        # A fresh track is always tried against the hand-off store on its
+        # first embedding, even when the first attempt waits for the warm-up
+        # (EARLY_ACCEPT_THRESHOLD=0)
+        ready = track.is_ready_for_recognition(self.config)
+        handoff_only = not ready and self.handoff is not None and len(track.embeddings) == 1
+        if not ready and not handoff_only:
+            self.backoff_skips += 1
+            return 0.0
+        
+        avg_embedding = track.get_average_embedding(self.config)
+        if avg_embedding is None:
+            return 0.0
+        
+        match_start = time.perf_counter()
+        # Identities just seen on neighbouring cameras first (strict threshold)
+        emp_id, confidence, templates = self._match_handoff(avg_embedding, known_embeddings, known_ids, now)
+        handed_off = emp_id is not None
+        if handoff_only and not handed_off:
+            # Not an attempt: no backoff, full search after the warm-up
+            return time.perf_counter() - match_start
+        self.recognition_attempts += 1
+        
+        # Then recently recognized employees (strict threshold), then the full gallery
+        recent = False
+        if not handed_off:
+            emp_id, confidence = self.recent_matches.match(avg_embedding, known_embeddings, now)
+            recent = emp_id is not None
+        if not handed_off and not recent:
+            emp_id, confidence = match_embedding_to_employee(
+                avg_embedding, known_embeddings, known_ids, self.config
+            )
+        
+        if emp_id and (handed_off or track.accepts_match(confidence, self.config)):
+            if templates is None:
+                templates = self._employee_templates(emp_id, known_embeddings, known_ids)
+            if not handed_off and not recent and templates is not None:
+                self.recent_matches.remember(emp_id, templates, known_embeddings, now)
+            track.recognize(
+                emp_id, confidence, templates, known_embeddings,
+                time.time() if now is None else now, self.config
+            )
+            if not handed_off and len(track.embeddings) < self.config.min_embeddings_per_track:
+                self.early_accepts += 1
+            logger.info(
+                f'Track {track.track_id} → Employee {emp_id} '
+                f'(confidence: {confidence:.3f}, '
+                f'embeddings: {len(track.embeddings)}'
+                f'{", hand-off" if handed_off else ""})'
+            )
+        else:
+            track.attempt_failed(self.config)
+        
+        return time.perf_counter() - match_start
+    
+    def _match_handoff(
+        self,
+        embedding: np.ndarray,
+        known_embeddings: List[np.ndarray],
+        known_ids: List[int],
+        now: Optional[float]
+    ) -> Tuple[Optional[int], float, Optional[np.ndarray]]:
+        """
+        Match embedding against identities recently seen on neighbouring cameras.
+        
+        Args:
+            embedding: Track embedding
+            known_embeddings: Known employee embeddings
+            known_ids: Known employee IDs
+            now: Frame time (None = wall clock)
+        
+        Returns:
+            Tuple of (employee_id, confidence, employee templates) or
+            (None, 0.0, None) without a match
+        """
+        if self.handoff is None:
+            return None, 0.0, None
+        
+        emp_id, confidence, candidates = self.handoff.match(self.camera_id, embedding, now)
+        if emp_id is not None:
+            # Employee must still be in this camera's gallery
+            templates = self._employee_templates(emp_id, known_embeddings, known_ids)
+            if templates is not None:
+                self.handoff_hits += 1
+                return emp_id, confidence, templates
+        if candidates:
+            self.handoff_misses += 1
+        return None, 0.0, None
+    
+    def _publish_handoff(self, track: FaceTrack, now: Optional[float]) -> None:
+        """
+        Share a recognized track's latest embedding with neighbouring cameras.
+        
+        Args:
+            track: Updated track
+            now: Frame time (None = wall clock)
+        """
+        if self.handoff is not None and track.recognized_employee_id is not None:
+            self.handoff.publish(self.camera_id, track.recognized_employee_id, track.embeddings[-1], now)
+    
+    def _verify_identity(
+        self,
+        track: FaceTrack,
+        known_embeddings: List[np.ndarray],
+        known_ids: List[int],
+        now: Optional[float]
+    ) -> float:
+        """
+        Re-verify a recognized track's identity if due.
+        
+        Compares the latest embedding with the assigned employee's
+        template only; on failure the identity is dropped and the
+        track is matched against the full gallery again.
+        
+        Args:
+            track: Recognized track
+            known_embeddings: Known employee embeddings
+            known_ids: Known employee IDs
+            now: Frame time (None = wall clock)
+        
+        Returns:
+            Seconds spent verifying and matching
+        """
+        current = time.time() if now is None else now
+        if not track.is_due_for_verification(current, self.config):
+            return 0.0
+        
+        start = time.perf_counter()
+        self.verifications += 1
+        emp_id = track.recognized_employee_id
+        if track.template_gallery is not known_embeddings:
+            # Gallery reloaded: employee may be gone or have a new photo
+            track.template = self._employee_templates(emp_id, known_embeddings, known_ids)
+            track.template_gallery = known_embeddings
+        
+        similarity = float(np.max(track.template @ track.embeddings[-1])) if track.template is not None else 0.0
+        if similarity > self.config.insightface_threshold:
+            track.verified(current, self.config)
+            return time.perf_counter() - start
+        
+        self.verification_failures += 1
+        logger.warning(
+            f'Track {track.track_id}: Employee {emp_id} not confirmed '
+            f'(similarity: {similarity:.3f}), searching gallery'
+        )
+        track.reset_identity(self.config)
+        seconds = time.perf_counter() - start + self._try_recognition(
+            track, known_embeddings, known_ids, now
+        )
+        if track.recognized_employee_id not in (None, emp_id):
+            self.identity_swaps += 1
+        return seconds
+    
+    def stats(self) -> Dict[str, float]:
+        """
+        Get tracker statistics.
+        
+        Returns:
+            Dict with recognition attempt, re-verification, hand-off and
+            recent match cache counters
+        """
+        return {
+            'recognition_attempts': float(self.recognition_attempts),
+            'recognition_early_accepts': float(self.early_accepts),
+            'recognition_backoff_skips': float(self.backoff_skips),
+            'identity_verifications': float(self.verifications),
+            'identity_verification_failures': float(self.verification_failures),
+            'identity_swaps': float(self.identity_swaps),
+            'handoff_hits': float(self.handoff_hits),
+            'handoff_misses': float(self.handoff_misses),
+            **self.recent_matches.stats(),
+        }
+    
+    def _employee_templates(
+        self,
+        emp_id: int,
+        known_embeddings: List[np.ndarray],
+        known_ids: List[int]
+    ) -> Optional[np.ndarray]:
+        """
+        Get gallery embeddings of one employee.
+        
+        The employee ID -> row index is built once per gallery (it is
+        rebuilt only when a different known_embeddings list is passed),
+        and each employee's matrix is stacked on first use.
+        
+        Args:
+            emp_id: Employee ID
+            known_embeddings: Known employee embeddings
+            known_ids: Known employee IDs
+        
+        Returns:
+            Matrix with one row per photo, or None if not in the gallery
+        """
+        if known_embeddings is not self._index_gallery:
+            self._index_gallery = known_embeddings
+            self._template_rows = {}
+            self._templates = {}
+            for row, known_id in enumerate(known_ids):
+                self._template_rows.setdefault(known_id, []).append(row)
+        
+        templates = self._templates.get(emp_id)
+        if templates is None:
+            rows = self._template_rows.get(emp_id)
+            if not rows:
+                return None
+            templates = np.vstack([known_embeddings[row] for row in rows])
+            self._templates[emp_id] = templates
+        return templates
+    
     def _find_matching_track(
         self,
         bbox: np.ndarray,
@@ -263,4 +696,3 @@ class FaceTracker:
                 best_track = track
         
         return best_track
-
@@ -0,0 +1,172 @@
+"""
+Adaptive frame scheduling module.
+
+Decides which camera frames go through the detection pipeline:
+- Targets a processing FPS (higher while tracks are active, lower on empty scenes)
+- Caps the share of wall time spent in processing (CPU budget)
+- Measures per-stage latency for logging, tuning and /metrics
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from .config import Config
+from .logging_config import get_logger
+from . import metrics
+
+logger = get_logger(__name__)
+
+# Smoothing factor for latency moving averages
+EWMA_ALPHA = 0.2
+
+# Interval between stage latency log lines (seconds)
+STATS_LOG_INTERVAL = 60.0
+
+
+class FrameScheduler:
+    """
+    Per-camera scheduler for detection cadence.
+
+    The video loop keeps reading frames at camera speed (so buffers
+    never go stale) and asks the scheduler whether the current frame
+    should be processed. After each processed frame the scheduler
+    computes when the next one is due from the scene activity and the
+    measured processing cost.
+    """
+
+    def __init__(self, config: Config, stream_id: str = 'default'):
+        """
+        Initialize scheduler.
+
+        Args:
+            config: Service configuration
+            stream_id: Camera label for exported metrics
+        """
+        self.config = config
+        self.stream_id = stream_id
+        self.active = False
+        self.next_due = 0.0
+        self.stage_latency: Dict[str, float] = {}
+        self.processed_frames = 0
+        self.skipped_frames = 0
+        self._window_start = time.monotonic()
+        self._window_processed = 0
+        self._last_stats_log = self._window_start
+        self.effective_fps = 0.0
+
+    def should_process(self, now: float | None = None) -> bool:
+        """
+        Check whether the current frame should go through detection.
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if processing is due
+        """
+        now = time.monotonic() if now is None else now
+        if now >= self.next_due:
+            return True
+        self.skipped_frames += 1
+        metrics.inc_counter('frames_skipped', self.stream_id)
+        return False
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """
+        Measure latency of a pipeline stage.
+
+        Usage:
+            with scheduler.measure('detection'):
+                faces = face_app.get(frame)
+
+        Args:
+            stage: Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record a stage latency sample (exponential moving average
+        plus the exported latency histogram).
+
+        Args:
+            stage: Stage name
+            seconds: Measured latency in seconds
+        """
+        metrics.observe_stage(self.stream_id, stage, seconds)
+        previous = self.stage_latency.get(stage)
+        if previous is None:
+            self.stage_latency[stage] = seconds
+        else:
+            self.stage_latency[stage] = previous + EWMA_ALPHA * (seconds - previous)
+
+    def frame_processed(self, started: float, active: bool) -> None:
+        """
+        Update cadence after a processed frame.
+
+        Interval is 1 / target FPS while the scene is active and
+        1 / idle FPS when empty, stretched so that processing time
+        stays within the CPU budget.
+
+        Args:
+            started: Monotonic time processing of the frame started
+            active: True if there are live tracks in the scene
+        """
+        now = time.monotonic()
+        busy = now - started
+
+        if active != self.active:
+            logger.debug(f'Scene {"active" if active else "idle"}, adjusting detection cadence')
+            self.active = active
+
+        fps = self.config.target_fps if active else self.config.idle_fps
+        interval = 1.0 / fps if fps > 0 else 0.0
+
+        if self.config.cpu_budget > 0:
+            interval = max(interval, busy / self.config.cpu_budget)
+
+        self.next_due = started + interval
+        self.processed_frames += 1
+        self._window_processed += 1
+        metrics.inc_counter('frames_processed', self.stream_id)
+        self._update_stats(now)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dict with effective FPS, frame counters and stage latencies (ms)
+        """
+        stats = {
+            'effective_fps': self.effective_fps,
+            'processed_frames': float(self.processed_frames),
+            'skipped_frames': float(self.skipped_frames),
+        }
+        for stage, seconds in self.stage_latency.items():
+            stats[f'{stage}_ms'] = seconds * 1000.0
+        return stats
+
+    def _update_stats(self, now: float) -> None:
+        """Refresh effective FPS and periodically log stage latencies."""
+        elapsed = now - self._window_start
+        if elapsed >= 5.0:
+            self.effective_fps = self._window_processed / elapsed
+            self._window_start = now
+            self._window_processed = 0
+
+        if now - self._last_stats_log >= STATS_LOG_INTERVAL:
+            self._last_stats_log = now
+            latencies = ', '.join(
+                f'{stage}={seconds * 1000:.1f}ms'
+                for stage, seconds in self.stage_latency.items()
+            )
+            logger.info(
+                f'Processing {self.effective_fps:.1f} FPS '
+                f'({"active" if self.active else "idle"}) | {latencies}'
+            )
@@ -0,0 +1,432 @@
+"""
+HTTP server module.
+
+Single event-driven HTTP server shared by all cameras:
+- GET /video_feed/<camera_id> is served natively from one asyncio loop,
+  so hundreds of MJPEG viewers need no thread each
+- All other routes are delegated to the Flask app (WSGI) on a small
+  thread pool; they must return finite responses. /admin/ routes
+  (profiling sessions of up to a minute) get their own pool so they
+  never hold up /health or /metrics
+
+Each camera stream has one channel per viewer tier (?profile=, ?width=,
+?fps=, ?quality=): on a new frame it encodes once (on a worker thread,
+via streaming's encode-once cache) and writes the same bytes to every
+viewer of the tier, at most tier.fps times per second. Slow viewers
+drop frames instead of buffering without bound.
+"""
+
+import asyncio
+import io
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote
+from . import metrics, streaming
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MJPEG_ROUTE = re.compile(r'^/video_feed/([^/]+)/?$')
+
+# Routes served on the admin pool (long-running profiling sessions)
+ADMIN_PREFIX = '/admin/'
+
+# Threads for admin requests
+ADMIN_WORKERS = 2
+
+# Bytes a viewer may have pending before frames are dropped for it
+MAX_CLIENT_BUFFER = 2 * 1024 * 1024
+
+# Max accepted request body (bytes)
+MAX_BODY_SIZE = 1024 * 1024
+
+MJPEG_RESPONSE_HEADERS = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: multipart/x-mixed-replace; boundary=frame\r\n'
+    b'Cache-Control: no-cache, no-store\r\n'
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Connection: close\r\n\r\n'
+)
+
+
+class _BadRequest(Exception):
+    """Request rejected before routing (answered with a plain-text error)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Request:
+    """Parsed HTTP request."""
+
+    def __init__(self, method: str, path: str, query: str, version: str,
+                 headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+
+class _MjpegChannel:
+    """
+    Fan-out of one camera stream to its viewers (event loop thread only).
+    """
+
+    def __init__(self, stream_id: str, tier: streaming.StreamTier, server: 'StreamServer'):
+        self.stream_id = stream_id
+        self.tier = tier
+        self.server = server
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.sending = False
+        self.pending = False
+        self.last_sent = 0.0
+        self.last_version = -1
+        self._interval = 1.0 / tier.fps if tier.fps else 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._listener: Optional[Callable[[], None]] = None
+
+    def add(self, writer: asyncio.StreamWriter) -> None:
+        """Attach viewer (first one registers frame listener)."""
+        self.clients.add(writer)
+        streaming.subscribe(self.stream_id)
+
+        if self._listener is None:
+            self._listener = self._notify
+            streaming.add_listener(self.stream_id, self._listener)
+
+        # Send current frame to the new viewer right away if there is one
+        asyncio.ensure_future(self._send_current(writer))
+
+    def remove(self, writer: asyncio.StreamWriter) -> None:
+        """Detach viewer (last one unregisters frame listener)."""
+        if writer not in self.clients:
+            return
+        self.clients.discard(writer)
+        streaming.unsubscribe(self.stream_id)
+
+        if not self.clients and self._listener is not None:
+            streaming.remove_listener(self.stream_id, self._listener)
+            self._listener = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _notify(self) -> None:
+        """Frame listener (called in the camera thread): wake the loop."""
+        try:
+            self.server.loop.call_soon_threadsafe(self.on_frame)
+        except RuntimeError:
+            # Loop already closed (server stopping)
+            pass
+
+    def on_frame(self) -> None:
+        """New frame published: encode once and broadcast (coalesced, FPS-limited)."""
+        if not self.clients or self._timer is not None:
+            return
+        if self.sending:
+            self.pending = True
+            return
+
+        wait = self.last_sent + self._interval - self.server.loop.time()
+        if wait > 0:
+            # Too early for this tier: send whatever is current once due
+            self._timer = self.server.loop.call_later(wait, self._on_timer)
+            return
+
+        self.sending = True
+        asyncio.ensure_future(self._broadcast())
+
+    def _on_timer(self) -> None:
+        """FPS interval elapsed."""
+        self._timer = None
+        self.on_frame()
+
+    async def _send_current(self, writer: asyncio.StreamWriter) -> None:
+        """Write the current frame to one viewer (channel state untouched)."""
+        try:
+            part, _ = await self.server.loop.run_in_executor(
+                self.server.encode_pool, streaming.get_jpeg_part, self.stream_id, self.tier
+            )
+            if part is not None and writer in self.clients and not writer.is_closing():
+                writer.write(part)
+        except Exception as e:
+            logger.error(f'MJPEG send failed for camera {self.stream_id}: {e}')
+
+    async def _broadcast(self) -> None:
+        """Encode on a worker thread, write the shared bytes to all viewers."""
+        try:
+            self.pending = False
+            part, version = await self.server.loop.run_in_executor(
+                self.server.encode_pool, streaming.get_jpeg_part, self.stream_id, self.tier
+            )
+            if part is not None and version != self.last_version:
+                self.last_version = version
+                self.last_sent = self.server.loop.time()
+                dropped = backlog = 0
+                for writer in list(self.clients):
+                    if writer.is_closing():
+                        self.remove(writer)
+                        continue
+                    pending = writer.transport.get_write_buffer_size()
+                    backlog = max(backlog, pending)
+                    if pending < MAX_CLIENT_BUFFER:
+                        writer.write(part)
+                    else:
+                        dropped += 1
+                if dropped:
+                    metrics.inc_counter('stream_frames_dropped', self.stream_id, dropped)
+                metrics.set_gauge('stream_send_queue_bytes', self.stream_id, backlog)
+        except Exception as e:
+            logger.error(f'MJPEG broadcast failed for camera {self.stream_id}: {e}')
+        finally:
+            self.sending = False
+
+        if self.pending:
+            self.on_frame()
+
+
+class StreamServer:
+    """
+    One HTTP server for all cameras, running an asyncio loop in a thread.
+    """
+
+    def __init__(self, app: Any, host: str = '0.0.0.0', port: int = 5000, workers: int = 4):
+        """
+        Initialize server.
+
+        Args:
+            app: WSGI application (Flask app from create_app)
+            host: Listen address
+            port: Listen port
+            workers: Threads for WSGI requests and JPEG encoding
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wsgi_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='HTTP-WSGI')
+        self.admin_pool = ThreadPoolExecutor(max_workers=ADMIN_WORKERS, thread_name_prefix='HTTP-Admin')
+        self.encode_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='HTTP-Encode')
+        self.channels: Dict[Tuple[str, streaming.StreamTier], _MjpegChannel] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        """Start server thread and wait until it is listening."""
+        self._thread = threading.Thread(target=self._run, daemon=True, name='HTTP-Server')
+        self._thread.start()
+        self._ready.wait(timeout=10)
+        logger.info(f'HTTP server listening on {self.host}:{self.port}')
+
+    def stop(self) -> None:
+        """Stop accepting connections and shut the loop down."""
+        if self.loop is not None and self._server is not None:
+            self.loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.wsgi_pool.shutdown(wait=False)
+        self.admin_pool.shutdown(wait=False)
+        self.encode_pool.shutdown(wait=False)
+
+    def _run(self) -> None:
+        """Thread entry: run event loop until the server closes."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            logger.error(f'HTTP server failed: {e}', exc_info=True)
+        finally:
+            self._ready.set()
+            self.loop.close()
+
+    async def _serve(self) -> None:
+        """Listen and serve until closed."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self._ready.set()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection (one request, then close)."""
+        try:
+            try:
+                request = await _read_request(reader)
+            except _BadRequest as e:
+                writer.write(_simple_response(e.status, str(e).encode('latin-1')))
+                await writer.drain()
+                return
+            if request is None:
+                return
+
+            match = MJPEG_ROUTE.match(request.path)
+            if match and request.method == 'GET':
+                await self._serve_mjpeg(unquote(match.group(1)), request, reader, writer)
+                return
+
+            peer = writer.get_extra_info('peername') or ('', 0)
+            pool = self.admin_pool if request.path.startswith(ADMIN_PREFIX) else self.wsgi_pool
+            response = await self.loop.run_in_executor(
+                pool, self._call_wsgi, request, peer[0]
+            )
+            writer.write(response)
+            await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except Exception as e:
+            logger.error(f'HTTP request failed: {e}')
+        finally:
+            writer.close()
+
+    async def _serve_mjpeg(
+        self,
+        stream_id: str,
+        request: _Request,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Attach viewer to camera channel until it disconnects."""
+        if stream_id not in streaming.list_streams():
+            writer.write(_simple_response(404, b'Unknown camera'))
+            await writer.drain()
+            return
+
+        try:
+            tier = streaming.parse_tier(dict(parse_qsl(request.query)))
+        except ValueError as e:
+            writer.write(_simple_response(400, str(e).encode()))
+            await writer.drain()
+            return
+
+        writer.write(MJPEG_RESPONSE_HEADERS)
+        await writer.drain()
+
+        key = (stream_id, tier)
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = _MjpegChannel(stream_id, tier, self)
+            self.channels[key] = channel
+
+        channel.add(writer)
+        try:
+            # Viewers never send data; EOF means disconnect
+            while await reader.read(1024):
+                pass
+        finally:
+            channel.remove(writer)
+            if not channel.clients and self.channels.get(key) is channel:
+                del self.channels[key]
+
+    def _call_wsgi(self, request: _Request, remote_addr: str) -> bytes:
+        """Run WSGI app for a request (worker thread), return raw HTTP response."""
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            # PEP 3333: bytes of the decoded path as latin-1 (Werkzeug re-encodes)
+            'PATH_INFO': unquote(request.path, encoding='latin-1'),
+            'QUERY_STRING': request.query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': str(self.port),
+            'SERVER_PROTOCOL': request.version,
+            'REMOTE_ADDR': remote_addr,
+            'CONTENT_TYPE': request.headers.get('content-type', ''),
+            'CONTENT_LENGTH': str(len(request.body)) if request.body else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(request.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers.items():
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                environ[key] = value
+
+        status_headers: List[Any] = []
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            status_headers[:] = [status, headers]
+
+        result = self.app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        status, headers = status_headers
+        head = [f'HTTP/1.1 {status}']
+        head += [
+            f'{name}: {value}' for name, value in headers
+            if name.lower() not in ('content-length', 'connection')
+        ]
+        head += [f'Content-Length: {len(body)}', 'Connection: close']
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[_Request]:
+    """
+    Read and parse request line, headers and body.
+
+    Returns:
+        Parsed request or None on an empty request line
+
+    Raises:
+        _BadRequest: 400 on a malformed request line, header or
+            Content-Length; 413 if Content-Length exceeds MAX_BODY_SIZE
+            (body is not read)
+    """
+    raw = await reader.readuntil(b'\r\n\r\n')
+    lines = raw.decode('latin-1').split('\r\n')
+    if not lines[0]:
+        return None
+    parts = lines[0].split(' ')
+    if len(parts) != 3 or not parts[1].startswith('/') or not parts[2].startswith('HTTP/'):
+        raise _BadRequest(400, 'Malformed request line')
+    method, target, version = parts
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        if ':' not in line:
+            raise _BadRequest(400, 'Malformed header')
+        name, value = line.split(':', 1)
+        headers[name.strip().lower()] = value.strip()
+
+    path, _, query = target.partition('?')
+
+    body = b''
+    length_header = headers.get('content-length', '0') or '0'
+    if not length_header.isdigit():
+        raise _BadRequest(400, 'Invalid Content-Length')
+    length = int(length_header)
+    if length > MAX_BODY_SIZE:
+        raise _BadRequest(413, 'Request body too large')
+    if length > 0:
+        body = await reader.readexactly(length)
+
+    return _Request(method, path, query, version, headers, body)
+
+
+def _simple_response(status: int, body: bytes) -> bytes:
+    """Build minimal plain-text HTTP response."""
+    reason = {400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large'}.get(status, 'Error')
+    return (
+        f'HTTP/1.1 {status} {reason}\r\n'
+        f'Content-Type: text/plain\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode('latin-1') + body
@@ -3,23 +3,111 @@ Video streaming module.
 
 Manages current frame state and MJPEG stream generation for Flask.
 Thread-safe frame access using locks.
+
+Frames are handed off without copying: set_frame marks the array
+read-only and publishes it by swapping a reference, readers share that
+same immutable array. The array is freed once the last reader drops it.
+
+Each published frame gets a version number. Viewers block on a
+condition variable until a new version arrives, and every version is
+JPEG-encoded at most once (lazily, by the first viewer that needs it);
+the encoded bytes are shared by all viewers of the stream.
+
+Overlays (track boxes, labels) travel as a small FrameOverlay snapshot
+next to the raw frame and are drawn at encode time, so streams nobody
+watches cost neither a copy nor any drawing.
+
+Viewers pick a StreamTier (max width, FPS, JPEG quality), either by
+named profile or explicit values. Encoding is cached per (width,
+quality) pair, so every distinct tier is encoded once per frame no
+matter how many viewers share it; FPS is applied per viewer.
 """
 
 import threading
 import time
 from dataclasses import dataclass, field
-from typing import Optional, Generator, Dict
+from typing import Callable, Optional, Generator, Dict, List, Mapping, Tuple
 import numpy as np
 import cv2
+from . import metrics
+from .visualization import FrameOverlay
 
 
 DEFAULT_STREAM_ID = "default"
 
+JPEG_QUALITY = 85
+
+# Max seconds a viewer waits for a new frame before re-checking
+FRAME_WAIT_TIMEOUT = 5.0
+
+# Seconds without updates after which a stream is reported inactive
+STREAM_STALE_SECONDS = 5.0
+
+# Seconds a snapshot request keeps frames published without viewers
+SNAPSHOT_INTEREST_SECONDS = 10.0
+
+# Max seconds a snapshot request waits for the first frame
+SNAPSHOT_WAIT_TIMEOUT = 2.0
+
+# Snapshots younger than this are served from cache even if the frame moved on
+SNAPSHOT_MAX_AGE = 1.0
+
+# Encoded tiers kept per stream (bounds the cache for arbitrary widths)
+MAX_CACHED_TIERS = 8
+
+MULTIPART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+@dataclass(frozen=True)
+class StreamTier:
+    """
+    Output settings of one viewer.
+
+    max_width=0 keeps the native resolution, fps=0 sends every frame.
+    """
+    max_width: int = 0
+    fps: float = 0.0
+    quality: int = JPEG_QUALITY
+
+    @property
+    def encoding(self) -> Tuple[int, int]:
+        """Encode cache key (viewers differing only in FPS share bytes)."""
+        return self.max_width, self.quality
+
+
+FULL_TIER = StreamTier()
+
+# Named profiles for ?profile=...
+STREAM_PROFILES: Dict[str, StreamTier] = {
+    'thumb': StreamTier(max_width=320, fps=2.0, quality=60),
+    'preview': StreamTier(max_width=640, fps=10.0, quality=70),
+    'full': FULL_TIER,
+}
+
+
+@dataclass
+class _Encoded:
+    version: int
+    jpeg: Optional[bytes]
+    part: Optional[bytes]
+    encoded_at: float
+
 
 @dataclass
 class _StreamState:
+    stream_id: str
     frame: Optional[np.ndarray] = None
-    lock: threading.Lock = field(default_factory=threading.Lock)
+    overlay: Optional[FrameOverlay] = None
+    version: int = 0
+    last_update: float = 0.0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+    annotated: Optional[np.ndarray] = None
+    annotated_version: int = -1
+    encoded: Dict[Tuple[int, int], _Encoded] = field(default_factory=dict)
+    encode_lock: threading.Lock = field(default_factory=threading.Lock)
+    subscribers: int = 0
+    snapshot_interest_until: float = 0.0
+    listeners: List[Callable[[], None]] = field(default_factory=list)
 
 
 _streams: Dict[str, _StreamState] = {}
@@ -35,80 +123,385 @@ def _get_stream_state(stream_id: str) -> _StreamState:
         with _streams_lock:
             state = _streams.get(stream_id)
             if state is None:
-                state = _StreamState()
+                state = _StreamState(stream_id)
                 _streams[stream_id] = state
     return state
 
 
-def set_frame(frame: np.ndarray, stream_id: str = DEFAULT_STREAM_ID) -> None:
+def set_frame(
+    frame: np.ndarray,
+    stream_id: str = DEFAULT_STREAM_ID,
+    overlay: Optional[FrameOverlay] = None
+) -> None:
     """
-    Update current frame for a specific stream (thread-safe).
-    
+    Publish a new frame for a specific stream (thread-safe, zero-copy).
+
+    Ownership passes to the stream: the array is made read-only and
+    must not be modified by the caller afterwards. Wakes all viewers
+    waiting for a new frame.
+
     Args:
         frame: New frame to set
         stream_id: Identifier of the stream (camera/service)
+        overlay: Overlay drawn on a copy of the frame at encode time
     """
+    if frame is not None and frame.flags.writeable:
+        frame.setflags(write=False)
+
     state = _get_stream_state(stream_id)
-    with state.lock:
-        state.frame = frame.copy() if frame is not None else None
+    with state.condition:
+        state.frame = frame
+        state.overlay = overlay
+        state.version += 1
+        state.last_update = time.monotonic()
+        state.condition.notify_all()
+        listeners = list(state.listeners)
+
+    for listener in listeners:
+        listener()
+
+
+def touch(stream_id: str = DEFAULT_STREAM_ID) -> None:
+    """
+    Mark stream as alive without publishing a frame.
+
+    Used by the video loop when nobody is watching.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+    """
+    state = _get_stream_state(stream_id)
+    state.last_update = time.monotonic()
+
+
+def has_viewers(stream_id: str = DEFAULT_STREAM_ID) -> bool:
+    """
+    Check if anyone is watching a stream (lock-free, may be momentarily stale).
+
+    Returns:
+        True if an MJPEG subscriber is connected or a snapshot was requested recently
+    """
+    state = _get_stream_state(stream_id)
+    return state.subscribers > 0 or time.monotonic() < state.snapshot_interest_until
+
+
+def get_frame(stream_id: str = DEFAULT_STREAM_ID) -> Optional[np.ndarray]:
+    """
+    Get current frame for specific stream (thread-safe, zero-copy).
+
+    Returns:
+        Read-only current frame or None
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        return state.frame
 
 
 def get_frame_copy(stream_id: str = DEFAULT_STREAM_ID) -> Optional[np.ndarray]:
     """
-    Get a copy of current frame for specific stream (thread-safe).
-    
+    Get a writable copy of current frame for specific stream (thread-safe).
+
+    Prefer get_frame() unless the frame has to be modified.
+
     Returns:
         Copy of current frame or None
     """
-    state = _get_stream_state(stream_id)
-    with state.lock:
-        return state.frame.copy() if state.frame is not None else None
+    frame = get_frame(stream_id)
+    return frame.copy() if frame is not None else None
 
 
 def is_streaming(stream_id: str = DEFAULT_STREAM_ID) -> bool:
     """
     Check if streaming is active for a stream.
-    
+
     Returns:
-        True if current frame exists
+        True if the video loop updated the stream recently
     """
     state = _get_stream_state(stream_id)
-    with state.lock:
-        return state.frame is not None
+    return time.monotonic() - state.last_update < STREAM_STALE_SECONDS
 
 
-def generate_mjpeg_frames(stream_id: str = DEFAULT_STREAM_ID) -> Generator[bytes, None, None]:
+def get_subscriber_count(stream_id: str = DEFAULT_STREAM_ID) -> int:
     """
-    Generate MJPEG frames for a specific stream.
-    
-    Yields:
-        JPEG frame bytes with multipart headers
+    Get number of connected viewers for a stream.
+
+    Returns:
+        Number of active MJPEG subscribers
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        return state.subscribers
+
+
+def list_streams() -> List[str]:
+    """
+    Get identifiers of all known streams.
+
+    Returns:
+        List of stream IDs
+    """
+    with _streams_lock:
+        return list(_streams.keys())
+
+
+def subscribe(stream_id: str = DEFAULT_STREAM_ID) -> None:
+    """
+    Register a viewer for a stream (enables publishing in the video loop).
+
+    Args:
+        stream_id: Identifier of the stream
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        state.subscribers += 1
+        metrics.set_gauge('stream_viewers', stream_id, state.subscribers)
+
+
+def unsubscribe(stream_id: str = DEFAULT_STREAM_ID) -> None:
     """
-    while True:
-        frame = get_frame_copy(stream_id)
-        
-        if frame is None:
-            time.sleep(0.1)
-            continue
-        
-        # Encode frame as JPEG
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        
-        if not ret:
-            time.sleep(0.033)
-            continue
-        
-        # Yield frame with multipart headers
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-        
-        # ~30 FPS
-        time.sleep(0.033)
+    Unregister a viewer; the last one out releases frame and JPEG.
 
+    Args:
+        stream_id: Identifier of the stream
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        state.subscribers -= 1
+        metrics.set_gauge('stream_viewers', stream_id, state.subscribers)
+        if state.subscribers == 0 and time.monotonic() >= state.snapshot_interest_until:
+            _release(state)
+
+
+def _release(state: _StreamState) -> None:
+    """Drop frame and encoded data of an unwatched stream (condition held)."""
+    state.frame = state.overlay = state.annotated = None
+    state.annotated_version = -1
+    state.encoded.clear()
+
+
+def add_listener(stream_id: str, listener: Callable[[], None]) -> None:
+    """
+    Register callback invoked (in the publishing thread) on every new frame.
+
+    Listeners must be cheap and non-blocking, e.g. waking an event loop.
+
+    Args:
+        stream_id: Identifier of the stream
+        listener: Callback without arguments
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        state.listeners.append(listener)
+
+
+def remove_listener(stream_id: str, listener: Callable[[], None]) -> None:
+    """
+    Unregister frame listener.
+
+    Args:
+        stream_id: Identifier of the stream
+        listener: Previously registered callback
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        if listener in state.listeners:
+            state.listeners.remove(listener)
 
 
+def parse_tier(args: Mapping[str, str]) -> StreamTier:
+    """
+    Build viewer tier from query parameters.
+
+    ``profile`` selects a named base tier (default: full); ``width``,
+    ``fps`` and ``quality`` override single values.
+
+    Args:
+        args: Query parameters
+
+    Returns:
+        StreamTier
+
+    Raises:
+        ValueError: On unknown profile or non-numeric values
+    """
+    profile = args.get('profile') or 'full'
+    if profile not in STREAM_PROFILES:
+        raise ValueError(f'Unknown profile {profile!r} (expected one of {", ".join(STREAM_PROFILES)})')
+    tier = STREAM_PROFILES[profile]
+
+    max_width = int(args['width']) if args.get('width') else tier.max_width
+    fps = float(args['fps']) if args.get('fps') else tier.fps
+    quality = int(args['quality']) if args.get('quality') else tier.quality
+
+    return StreamTier(
+        max_width=0 if max_width <= 0 else min(max(max_width, 64), 4096),
+        fps=0.0 if fps <= 0 else min(max(fps, 0.1), 60.0),
+        quality=min(max(quality, 10), 95),
+    )
+
+
+def get_jpeg_part(
+    stream_id: str = DEFAULT_STREAM_ID,
+    tier: StreamTier = FULL_TIER
+) -> tuple[Optional[bytes], int]:
+    """
+    Get current frame as a ready-to-send multipart chunk (encode-once per tier).
+
+    Returns:
+        Tuple of (multipart chunk or None, frame version)
+    """
+    encoded = _encode_current(_get_stream_state(stream_id), tier)
+    return encoded.part, encoded.version
+
+
+def get_jpeg(
+    stream_id: str = DEFAULT_STREAM_ID,
+    tier: StreamTier = FULL_TIER
+) -> tuple[Optional[bytes], int]:
+    """
+    Get current frame as JPEG, encoding it only if not encoded yet for this tier.
 
+    Returns:
+        Tuple of (JPEG bytes or None, frame version)
+    """
+    encoded = _encode_current(_get_stream_state(stream_id), tier)
+    return encoded.jpeg, encoded.version
+
+
+def get_snapshot(stream_id: str, tier: StreamTier = FULL_TIER) -> Optional[bytes]:
+    """
+    Get a cached still image for thumbnail grids.
+
+    Keeps the stream publishing for SNAPSHOT_INTEREST_SECONDS (so
+    polling grids work without an open MJPEG connection), waits briefly
+    for a first frame and serves JPEGs up to SNAPSHOT_MAX_AGE old from
+    cache instead of re-encoding on every poll.
+
+    Args:
+        stream_id: Identifier of the stream
+        tier: Output tier (FPS is ignored)
+
+    Returns:
+        JPEG bytes or None if no frame arrived in time
+    """
+    state = _get_stream_state(stream_id)
+    with state.condition:
+        now = time.monotonic()
+        if state.subscribers == 0 and now >= state.snapshot_interest_until:
+            # Publishing was paused, whatever is held is stale
+            _release(state)
+        state.snapshot_interest_until = now + SNAPSHOT_INTEREST_SECONDS
+        if not state.condition.wait_for(
+            lambda: state.frame is not None,
+            timeout=SNAPSHOT_WAIT_TIMEOUT
+        ):
+            return None
+
+    return _encode_current(state, tier, max_age=SNAPSHOT_MAX_AGE).jpeg
+
+
+def _encode_current(state: _StreamState, tier: StreamTier, max_age: float = 0.0) -> _Encoded:
+    """
+    Encode current frame for a tier unless already encoded.
+
+    Stores both the plain JPEG and the ready-to-send multipart chunk,
+    so viewers don't concatenate per frame. The overlay is drawn once
+    per frame and shared by all tiers.
+
+    Args:
+        state: Stream state
+        tier: Output tier
+        max_age: Accept a cached encoding of an older frame up to this age (seconds)
+
+    Returns:
+        Encoded frame (jpeg/part None if there is no frame)
+    """
+    key = tier.encoding
+    with state.encode_lock:
+        now = time.monotonic()
+        with state.condition:
+            frame, overlay, version = state.frame, state.overlay, state.version
+            cached = state.encoded.get(key)
+            if cached is not None and (
+                cached.version == version or now - cached.encoded_at < max_age
+            ):
+                return cached
+            if frame is None:
+                return cached or _Encoded(version, None, None, now)
+            annotated = state.annotated if state.annotated_version == version else None
+
+        start = time.perf_counter()
+        if annotated is None:
+            annotated = frame
+            if overlay is not None:
+                annotated = frame.copy()
+                overlay.draw(annotated)
+        frame = annotated
+
+        max_width = tier.max_width
+        if max_width and frame.shape[1] > max_width:
+            height = max(1, round(frame.shape[0] * max_width / frame.shape[1]))
+            frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+
+        jpeg = part = None
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, tier.quality])
+        if ret:
+            jpeg = buffer.tobytes()
+            part = MULTIPART_HEADER + jpeg + b'\r\n'
+        encoded = _Encoded(version, jpeg, part, now)
+        metrics.observe_stage(state.stream_id, 'jpeg_encode', time.perf_counter() - start)
+
+        with state.condition:
+            state.annotated, state.annotated_version = annotated, version
+            state.encoded[key] = encoded
+            if len(state.encoded) > MAX_CACHED_TIERS:
+                oldest = min(state.encoded, key=lambda k: state.encoded[k].encoded_at)
+                del state.encoded[oldest]
+        return encoded
+
+
+def generate_mjpeg_frames(
+    stream_id: str = DEFAULT_STREAM_ID,
+    tier: StreamTier = FULL_TIER
+) -> Generator[bytes, None, None]:
+    """
+    Generate MJPEG frames for a specific stream.
+
+    Blocks until a new frame version is published; never re-sends
+    or re-encodes the same frame. Frames arriving faster than
+    tier.fps are skipped.
+
+    Args:
+        stream_id: Identifier of the stream
+        tier: Output tier of this viewer
+
+    Yields:
+        JPEG frame bytes with multipart headers
+    """
+    state = _get_stream_state(stream_id)
+    interval = 1.0 / tier.fps if tier.fps else 0.0
+    last_version = -1
 
+    subscribe(stream_id)
+    try:
+        while True:
+            # Wait for a frame newer than the last one sent
+            with state.condition:
+                if not state.condition.wait_for(
+                    lambda: state.version != last_version and state.frame is not None,
+                    timeout=FRAME_WAIT_TIMEOUT
+                ):
+                    continue
 
+            sent_at = time.monotonic()
+            part, last_version = get_jpeg_part(stream_id, tier)
+            if part is None:
+                continue
 
+            # Frame with multipart headers (shared by all viewers of the tier)
+            yield part
 
+            if interval:
+                time.sleep(max(0.0, sent_at + interval - time.monotonic()))
+    finally:
+        unsubscribe(stream_id)
@@ -0,0 +1,78 @@
+"""
+Frame lifecycle tracing module.
+
+Every captured frame gets a FrameStamp (sequence number + capture time)
+that travels with it through tracking, presence and event sending, so
+the latency from capture to the backend acknowledging an event can be
+measured:
+- span "capture": frame that triggered the event → event delivered
+- span "appearance": first frame of the person's track → IN event delivered
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from . import metrics
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class FrameStamp:
+    """
+    Identity and capture time of one frame.
+
+    captured_at is wall-clock time (for presence state and payloads),
+    captured_mono the monotonic equivalent used for latency math.
+    """
+    seq: int
+    captured_at: float
+    captured_mono: float
+
+    @classmethod
+    def now(cls, seq: int) -> 'FrameStamp':
+        """Stamp a frame that has just been read."""
+        return cls(seq=seq, captured_at=time.time(), captured_mono=time.monotonic())
+
+    def age(self) -> float:
+        """Seconds since capture."""
+        return time.monotonic() - self.captured_mono
+
+    def to_payload(self) -> dict:
+        """Trace fields for the event payload."""
+        return {
+            'frameSeq': self.seq,
+            'capturedAt': datetime.fromtimestamp(self.captured_at, tz=timezone.utc)
+                                  .isoformat(timespec='milliseconds'),
+            'latencyMs': round(self.age() * 1000.0),
+        }
+
+
+def record_event_latency(
+    stream_id: str,
+    event_type: str,
+    stamp: FrameStamp,
+    first_seen: Optional[FrameStamp] = None
+) -> None:
+    """
+    Record end-to-end latency of a delivered event.
+
+    Args:
+        stream_id: Identifier of the stream (camera/service)
+        event_type: 'IN' or 'OUT'
+        stamp: Frame that triggered the event
+        first_seen: First frame of the person's track (IN events)
+    """
+    latency = stamp.age()
+    metrics.observe_latency('event_latency_seconds', stream_id, latency,
+                            type=event_type, span='capture')
+
+    message = f'Event {event_type} latency: frame #{stamp.seq} → backend {latency * 1000:.0f}ms'
+    if first_seen is not None:
+        appearance = first_seen.age()
+        metrics.observe_latency('event_latency_seconds', stream_id, appearance,
+                                type=event_type, span='appearance')
+        message += f', first seen (frame #{first_seen.seq}) {appearance:.2f}s ago'
+    logger.debug(message)
@@ -2,13 +2,26 @@
 Utility modules package.
 """
 
-from .cache import load_cache, save_cache, get_employees_hash
+from .cache import (
+    load_cache,
+    load_cache_entries,
+    read_cache_header,
+    save_cache,
+    get_employees_hash,
+    get_employee_key,
+)
+from .embedding_store import EmbeddingStore, StoredEmbedding
 from .timing import format_uptime
 
 __all__ = [
     'load_cache',
+    'load_cache_entries',
+    'read_cache_header',
     'save_cache',
     'get_employees_hash',
+    'get_employee_key',
+    'EmbeddingStore',
+    'StoredEmbedding',
     'format_uptime',
 ]
 
@@ -2,17 +2,57 @@
 Embeddings cache module.
 
 Caches face embeddings to avoid reprocessing on every restart.
+Rows are content-addressed by photo key (employee ID + photo URL), so
+a gallery change only re-embeds new or changed photos.
+
+File format (little-endian):
+- 8 bytes magic, 4 bytes header length, JSON header (version, count,
+  dimension, dtype, employee list hash, model version, timestamp)
+  padded to 64 bytes
+- Embedding matrix (count x dimension, C order)
+- Employee ID array (int64)
+- Photo key array (32-byte hex digests)
+
+The matrix is opened with np.memmap, so all camera workers (threads
+and processes) share the same page-cache pages instead of holding
+their own unpickled copies. Writes go to a temporary file that is
+renamed over the cache, so readers never see a partial file. Windows
+cannot rename over a file that is still mapped (gallery rows are views
+that keep the mapping open), so there the matrix is read into memory.
+
+Loaders reject caches written by another model (model version or
+embedding dimension differ) so they are rebuilt instead of being
+matched against incompatible embeddings.
 """
 
 import os
-import pickle
+import json
+import struct
 import hashlib
+import tempfile
+import threading
 import time
+import numpy as np
 from typing import List, Tuple, Optional, Dict, Any
 from ..logging_config import get_logger
 
 logger = get_logger(__name__)
 
+CACHE_MAGIC = b'EMBCACHE'
+CACHE_VERSION = 2
+CACHE_DTYPE = np.dtype('<f4')
+ID_DTYPE = np.dtype('<i8')
+KEY_DTYPE = np.dtype('S32')
+_ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sI')
+
+# Memory-map the matrix (off on Windows, see module docstring)
+USE_MMAP = os.name != 'nt'
+
+# Mapped caches shared by the threads of this process: path -> (file identity, matrix, ids, keys, header)
+_mapped: Dict[str, Tuple[Tuple[int, int, int], np.ndarray, List[int], List[str], Dict[str, Any]]] = {}
+_mapped_lock = threading.Lock()
+
 
 def get_employees_hash(employees: List[Dict[str, Any]]) -> str:
     """
@@ -31,75 +71,259 @@ def get_employees_hash(employees: List[Dict[str, Any]]) -> str:
     return hashlib.md5(data.encode()).hexdigest()
 
 
+def get_employee_key(employee: Dict[str, Any]) -> str:
+    """
+    Compute photo key of one employee (changes when the photo URL changes).
+    
+    Args:
+        employee: Employee dict
+    
+    Returns:
+        MD5 hash string
+    """
+    data = f"{employee.get('id', '')}-{employee.get('photoUrl', '')}"
+    return hashlib.md5(data.encode()).hexdigest()
+
+
 def save_cache(
     encodings: List,
     ids: List[int],
     emp_hash: str,
-    cache_file: str
+    cache_file: str,
+    keys: Optional[List[str]] = None,
+    model: str = ''
 ) -> None:
     """
-    Save embeddings cache to file.
+    Save embeddings cache to file (atomic replace).
     
     Args:
         encodings: List of face embeddings
         ids: List of employee IDs
         emp_hash: Hash of employee list
         cache_file: Path to cache file
+        keys: Photo key per embedding (see get_employee_key); rows
+            without keys are never reused by load_cache_entries
+        model: Version of the models that produced the embeddings
     """
+    tmp_path = None
     try:
-        cache_data = {
-            'encodings': encodings,
-            'ids': ids,
+        matrix = np.ascontiguousarray(np.asarray(encodings, dtype=CACHE_DTYPE))
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValueError(f'Expected {len(ids)} embeddings, got shape {matrix.shape}')
+        if keys is None:
+            keys = [''] * len(ids)
+        if len(keys) != len(ids):
+            raise ValueError(f'Expected {len(ids)} photo keys, got {len(keys)}')
+        
+        header = json.dumps({
+            'version': CACHE_VERSION,
+            'count': int(matrix.shape[0]),
+            'dim': int(matrix.shape[1]),
+            'dtype': CACHE_DTYPE.str,
             'hash': emp_hash,
+            'model': model,
             'timestamp': time.time(),
-        }
+        }).encode()
+        # Pad so the matrix starts on an aligned offset
+        padding = -(_PREFIX.size + len(header)) % _ALIGNMENT
+        header += b' ' * padding
         
-        with open(cache_file, 'wb') as f:
-            pickle.dump(cache_data, f)
+        directory = os.path.dirname(os.path.abspath(cache_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.cache-', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREFIX.pack(CACHE_MAGIC, len(header)))
+            f.write(header)
+            f.write(matrix.tobytes())
+            f.write(np.asarray(ids, dtype=ID_DTYPE).tobytes())
+            f.write(np.asarray([key.encode() for key in keys], dtype=KEY_DTYPE).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
         
-        logger.info(f'Cache saved for {len(ids)} employees')
+        # Forget the old mapping so it is released once the gallery drops it
+        with _mapped_lock:
+            _mapped.pop(cache_file, None)
+        os.replace(tmp_path, cache_file)
+        tmp_path = None
         
+        logger.info(f'Cache saved for {len(ids)} employees')
+    
     except Exception as e:
         logger.error(f'Failed to save cache: {e}')
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _map_cache(cache_file: str) -> Tuple[np.ndarray, List[int], List[str], Dict[str, Any]]:
+    """
+    Map cache file (shared by all callers while the file is unchanged).
+    
+    Args:
+        cache_file: Path to cache file
+    
+    Returns:
+        Tuple of (read-only embedding matrix, ids, photo keys, header)
+    
+    Raises:
+        ValueError: On foreign, truncated or unsupported files
+    """
+    stat = os.stat(cache_file)
+    identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    
+    with _mapped_lock:
+        entry = _mapped.get(cache_file)
+        if entry is not None and entry[0] == identity:
+            return entry[1], entry[2], entry[3], entry[4]
+        
+        with open(cache_file, 'rb') as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != CACHE_MAGIC:
+                raise ValueError('not an embeddings cache file')
+            header = json.loads(f.read(header_len))
+        
+        if header.get('version') != CACHE_VERSION:
+            raise ValueError(f"unsupported cache version {header.get('version')}")
+        
+        count, dim = header['count'], header['dim']
+        dtype = np.dtype(header['dtype'])
+        offset = _PREFIX.size + header_len
+        ids_offset = offset + count * dim * dtype.itemsize
+        keys_offset = ids_offset + count * ID_DTYPE.itemsize
+        if stat.st_size != keys_offset + count * KEY_DTYPE.itemsize:
+            raise ValueError('cache file truncated')
+        
+        if count and USE_MMAP:
+            # Plain ndarray view of the mapping (row views stay cheap)
+            matrix = np.asarray(
+                np.memmap(cache_file, dtype=dtype, mode='r', offset=offset, shape=(count, dim))
+            )
+        elif count:
+            matrix = np.fromfile(cache_file, dtype=dtype, count=count * dim, offset=offset).reshape(count, dim)
+            matrix.flags.writeable = False
+        else:
+            matrix = np.empty((0, dim), dtype=dtype)
+        with open(cache_file, 'rb') as f:
+            f.seek(ids_offset)
+            ids = np.frombuffer(f.read(count * ID_DTYPE.itemsize), dtype=ID_DTYPE).tolist()
+            keys = [
+                key.decode() for key in
+                np.frombuffer(f.read(count * KEY_DTYPE.itemsize), dtype=KEY_DTYPE)
+            ]
+        
+        _mapped[cache_file] = (identity, matrix, ids, keys, header)
+        return matrix, ids, keys, header
+
+
+def _check_compatible(header: Dict[str, Any], model: Optional[str], dim: Optional[int]) -> None:
+    """
+    Check that cached embeddings come from the current models.
+    
+    Args:
+        header: Cache header
+        model: Current model version (None = not checked)
+        dim: Current embedding dimension (None = not checked)
+    
+    Raises:
+        ValueError: On model version or dimension mismatch
+    """
+    if model is not None and header.get('model', '') != model:
+        raise ValueError(f"written by model {header.get('model') or 'unknown'!r}, current is {model!r}")
+    if dim is not None and header.get('dim') != dim:
+        raise ValueError(f"embedding dimension {header.get('dim')}, current model produces {dim}")
+
+
+def read_cache_header(cache_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Read cache header (version, count, dim, hash, model, timestamp).
+    
+    Args:
+        cache_file: Path to cache file
+    
+    Returns:
+        Header dict or None if cache is missing or invalid
+    """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        return _map_cache(cache_file)[3]
+    except Exception as e:
+        logger.error(f'Failed to read cache header: {e}')
+        return None
 
 
 def load_cache(
-    cache_file: str
+    cache_file: str,
+    emp_hash: Optional[str] = None,
+    model: Optional[str] = None,
+    dim: Optional[int] = None
 ) -> Tuple[Optional[List], Optional[List[int]], Optional[str]]:
     """
     Load embeddings cache from file.
     
+    Embeddings are read-only views into the memory-mapped matrix
+    (no copy per camera).
+    
     Args:
         cache_file: Path to cache file
+        emp_hash: Hash of the current employee list (None = not checked)
+        model: Current model version (None = not checked)
+        dim: Current embedding dimension (None = not checked)
     
     Returns:
-        Tuple of (encodings, ids, hash) or (None, None, None) if cache invalid
+        Tuple of (encodings, ids, hash) or (None, None, None) if cache
+        is invalid, outdated or from another model
     """
     if not os.path.exists(cache_file):
         logger.debug('Cache file not found')
         return None, None, None
     
     try:
-        with open(cache_file, 'rb') as f:
-            cache_data = pickle.load(f)
+        matrix, ids, _keys, header = _map_cache(cache_file)
+        _check_compatible(header, model, dim)
+        if emp_hash is not None and header.get('hash') != emp_hash:
+            logger.info('Cache outdated (employee list changed), rebuilding')
+            return None, None, None
         
-        age = time.time() - cache_data.get('timestamp', 0)
+        age = time.time() - header.get('timestamp', 0)
         logger.info(f'Cache found (age: {age:.0f} seconds)')
         
-        return (
-            cache_data.get('encodings'),
-            cache_data.get('ids'),
-            cache_data.get('hash')
-        )
-        
+        return list(matrix), list(ids), header.get('hash')
+    
     except Exception as e:
         logger.error(f'Failed to load cache: {e}')
         return None, None, None
 
 
-
-
-
-
-
-
+def load_cache_entries(
+    cache_file: str,
+    model: Optional[str] = None,
+    dim: Optional[int] = None
+) -> Dict[str, Tuple[int, np.ndarray]]:
+    """
+    Load embeddings cache as content-addressed entries.
+    
+    Args:
+        cache_file: Path to cache file
+        model: Current model version (None = not checked)
+        dim: Current embedding dimension (None = not checked)
+    
+    Returns:
+        Dict of photo key to (employee ID, embedding); empty if cache
+        is missing, invalid or from another model (full rebuild)
+    """
+    if not os.path.exists(cache_file):
+        logger.debug('Cache file not found')
+        return {}
+    
+    try:
+        matrix, ids, keys, header = _map_cache(cache_file)
+        _check_compatible(header, model, dim)
+        return {
+            key: (emp_id, embedding)
+            for key, emp_id, embedding in zip(keys, ids, matrix)
+            if key
+        }
+    
+    except Exception as e:
+        logger.warning(f'Cache unusable ({e}), rebuilding')
+        return {}
@@ -0,0 +1,146 @@
+"""
+Content-addressed embedding store.
+
+Maps (photo content hash, model version) to the face embedding and
+quality metrics computed for that image, so identical photo bytes are
+never run through the models twice - across companies, cameras,
+gallery rebuilds and restarts.
+
+Backed by SQLite in WAL mode: safe for concurrent readers and writers
+in several threads and processes. Size is bounded by entry count with
+least-recently-used eviction.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS embeddings (
+    content_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    embedding BLOB,
+    quality TEXT,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, model_version)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+'''
+
+
+@dataclass
+class StoredEmbedding:
+    """
+    Stored result for one image.
+
+    embedding is None if no usable face was found; quality is None if
+    no face was detected at all.
+    """
+    embedding: Optional[np.ndarray]
+    quality: Optional[Dict[str, float]]
+
+
+class EmbeddingStore:
+    """SQLite-backed (content hash, model version) -> embedding store."""
+
+    def __init__(self, path: str, model_version: str, max_entries: int = 100_000):
+        """
+        Initialize store (creates the database if missing).
+
+        Args:
+            path: SQLite database file
+            model_version: Identifies models and preprocessing that
+                produced the embeddings (entries of other versions are ignored)
+            max_entries: Entries kept after evict() (all model versions)
+        """
+        self.path = path
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared)."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, content_hash: str) -> Optional[StoredEmbedding]:
+        """
+        Look up image result (marks entry as recently used).
+
+        Args:
+            content_hash: SHA-256 of the photo bytes
+
+        Returns:
+            StoredEmbedding or None if unknown for this model version
+        """
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT embedding, quality FROM embeddings WHERE content_hash = ? AND model_version = ?',
+            (content_hash, self.model_version)
+        ).fetchone()
+        if row is None:
+            return None
+
+        connection.execute(
+            'UPDATE embeddings SET last_used = ? WHERE content_hash = ? AND model_version = ?',
+            (time.time(), content_hash, self.model_version)
+        )
+        embedding = np.frombuffer(row[0], dtype=np.float32) if row[0] is not None else None
+        quality = json.loads(row[1]) if row[1] is not None else None
+        return StoredEmbedding(embedding=embedding, quality=quality)
+
+    def put(
+        self,
+        content_hash: str,
+        embedding: Optional[np.ndarray],
+        quality: Optional[Dict[str, float]]
+    ) -> None:
+        """
+        Store image result.
+
+        Args:
+            content_hash: SHA-256 of the photo bytes
+            embedding: Normed embedding, or None if no usable face
+            quality: Quality metrics, or None if no face was detected
+        """
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+        self._connection().execute(
+            'INSERT OR REPLACE INTO embeddings '
+            '(content_hash, model_version, embedding, quality, last_used) VALUES (?, ?, ?, ?, ?)',
+            (content_hash, self.model_version, blob,
+             json.dumps(quality) if quality is not None else None, time.time())
+        )
+
+    def evict(self) -> int:
+        """
+        Drop least recently used entries above max_entries.
+
+        Returns:
+            Number of evicted entries
+        """
+        connection = self._connection()
+        count = connection.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+
+        connection.execute(
+            'DELETE FROM embeddings WHERE rowid IN '
+            '(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)',
+            (excess,)
+        )
+        logger.info(f'Embedding store: evicted {excess} least recently used entries')
+        return excess
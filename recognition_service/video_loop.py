@@ -11,40 +11,35 @@ Orchestrates the entire recognition pipeline:
 
 import time
 import threading
-import cv2
-from typing import Any, List
+import numpy as np
+from typing import Any, Optional
 from .config import Config
 from .logging_config import get_logger
 from .camera import connect_camera, reconnect_camera, is_rtsp_stream, minimize_latency_for_rtsp
-from .employees import load_employees_from_backend
+from .employees import GalleryReloader, diff_galleries, sync_employee_gallery
 from .events import send_event
-from .streaming import set_frame
+from .streaming import set_frame, has_viewers, touch
+from .scheduler import FrameScheduler
+from .metrics import publish_stats, inc_counter, set_gauge
+from .tracing import FrameStamp, record_event_latency
+from . import profiling
 from .recognition.tracker import FaceTracker
 from .recognition.presence import PresenceManager
-from .app import create_app
+from .recognition.motion import MotionGate
+from .recognition.detection import FaceDetector
+from .recognition.replay import DetectionRecorder
+from .recognition.handoff import TrackHandoff
+from .visualization import FrameOverlay, build_overlay
 
 logger = get_logger(__name__)
 
 
-def start_flask_server(config: Config) -> None:
-    """
-    Start Flask server in background thread.
-    
-    Args:
-        config: Service configuration
-    """
-    logger.info(f'Starting video stream server on port {config.video_port}...')
-    app = create_app(config)
-    app.run(
-        host='0.0.0.0',
-        port=config.video_port,
-        threaded=True,
-        debug=False,
-        use_reloader=False
-    )
-
-
-def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> None:
+def run(
+    face_app: Any,
+    config: Config,
+    stop_flag: threading.Event = None,
+    handoff: Optional[TrackHandoff] = None
+) -> None:
     """
     Main video processing loop.
     
@@ -52,25 +47,34 @@ def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> Non
         face_app: InsightFace FaceAnalysis instance
         config: Service configuration
         stop_flag: Optional threading.Event to signal graceful shutdown
+        handoff: Optional cross-camera hand-off store shared by the company's cameras
     """
     stream_id = config.camera_id or config.service_name or 'default'
     
     # Load employees
-    known_embeddings, known_ids = load_employees_from_backend(config, face_app)
+    gallery, _ = sync_employee_gallery(config, face_app)
+    known_embeddings, known_ids = gallery.embeddings, gallery.ids
     
     if not known_ids:
         logger.error('No employees with photos found!')
         logger.error('Please add employees via backend API before starting recognition')
         return
     
-    # Initialize managers
-    tracker = FaceTracker(config)
+    # Initialize managers (detector/tracker report stage timings to the scheduler)
+    scheduler = FrameScheduler(config, stream_id=stream_id)
+    tracker = FaceTracker(config, record_stage=scheduler.record, handoff=handoff, camera_id=stream_id)
     presence_manager = PresenceManager(known_ids, config)
+    motion_gate = MotionGate(config)
+    detector = FaceDetector(face_app, config, record_stage=scheduler.record)
     
-    # Start Flask server in background
-    flask_thread = threading.Thread(target=start_flask_server, args=(config,), daemon=True)
-    flask_thread.start()
-    logger.info(f'Video stream: http://localhost:{config.video_port}/video_feed')
+    # Optional detection recording for offline replay
+    recorder = None
+    if config.record_detections:
+        recorder = DetectionRecorder(
+            config.record_detections.format(camera=stream_id),
+            known_embeddings, known_ids, config, keep_existing=True
+        )
+        logger.info(f'Recording detections to {recorder.path}')
     
     # Connect to camera
     video_capture = connect_camera(config)
@@ -79,9 +83,15 @@ def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> Non
     frame_count = 0
     consecutive_failures = 0
     MAX_FAILURES = 10
-    last_reload = time.time()
+    last_stats_publish = 0.0
+    overlay = None
+    
+    # Employee reloads run in the background (picked up per frame)
+    reloader = GalleryReloader(config, face_app, gallery)
+    reloader.start()
     
     logger.info('🎬 Starting main loop...')
+    profiling.register_thread(stream_id)
     
     try:
         while True:
@@ -90,14 +100,19 @@ def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> Non
                 logger.info('Stop signal received, exiting gracefully...')
                 break
             
+            # Start/stop on-demand cProfile session (no-op when none requested)
+            profiling.poll(stream_id)
+            
             # Minimize latency for RTSP
             if is_rtsp_stream(config.camera_source) and frame_count % 2 == 0:
                 minimize_latency_for_rtsp(video_capture)
             
             # Read frame
-            ret, frame = video_capture.read()
+            with scheduler.measure('capture'):
+                ret, frame = video_capture.read()
             
             if not ret or frame is None:
+                inc_counter('capture_failures', stream_id)
                 consecutive_failures += 1
                 logger.warning(f'Failed to read frame ({consecutive_failures}/{MAX_FAILURES})')
                 
@@ -111,35 +126,52 @@ def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> Non
             
             consecutive_failures = 0
             frame_count += 1
+            stamp = FrameStamp.now(frame_count)
+            inc_counter('frames_captured', stream_id)
             
-            # Hot reload employees
-            if time.time() - last_reload > config.reload_employees_interval:
-                logger.info('Reloading employees...')
-                try:
-                    new_embeddings, new_ids = load_employees_from_backend(config, face_app)
-                    if new_ids:
-                        known_embeddings, known_ids = new_embeddings, new_ids
-                        
-                        # Add new employees to presence manager
-                        for emp_id in new_ids:
-                            presence_manager.add_employee(emp_id)
-                        
-                        logger.info(f'Reloaded {len(new_ids)} employees')
-                    last_reload = time.time()
-                except Exception as e:
-                    logger.error(f'Employee reload failed: {e}')
-                    last_reload = time.time()
-            
-            # Process only every N-th frame
-            if frame_count % config.frame_skip != 0:
-                set_frame(frame, stream_id=stream_id)
+            # Pick up gallery published by the reloader
+            if reloader.gallery is not gallery:
+                new_gallery = reloader.gallery
+                delta = diff_galleries(gallery, new_gallery)
+                gallery = new_gallery
+                known_embeddings, known_ids = gallery.embeddings, gallery.ids
+                presence_manager.apply_delta(delta.added, delta.removed)
+                if recorder is not None:
+                    recorder.set_gallery(known_embeddings, known_ids)
+            
+            # Process only when the scheduler says a frame is due
+            started = time.monotonic()
+            if not scheduler.should_process(started):
+                _publish_frame(frame, overlay, stream_id)
                 continue
             
-            # Detect faces
-            faces = face_app.get(frame)
+            # Skip the detector on static scenes without live tracks
+            with scheduler.measure('motion'):
+                run_detection = motion_gate.should_detect(
+                    frame,
+                    has_tracks=bool(tracker.tracks),
+                    detection_cost=(
+                        scheduler.stage_latency.get('detection', 0.0) +
+                        scheduler.stage_latency.get('embedding', 0.0)
+                    )
+                )
+            
+            if run_detection:
+                # Detect faces (records detection/embedding stages)
+                faces = detector.detect(frame)
+                
+                # Update tracks (records tracking/matching stages)
+                recognized_tracks = tracker.update(
+                    faces, frame, known_embeddings, known_ids, stamp=stamp
+                )
+            else:
+                inc_counter('frames_motion_skipped', stream_id)
+                faces = None
+                recognized_tracks = []
             
-            # Update tracks (pass frame for face cropping)
-            recognized_tracks = tracker.update(faces, frame, known_embeddings, known_ids)
+            if recorder is not None:
+                recorder.add(stamp, frame, faces)
+            set_gauge('active_tracks', stream_id, len(tracker.tracks))
             
             # Get recognized employee IDs
             recognized_emp_ids = [
@@ -148,91 +180,90 @@ def run(face_app: Any, config: Config, stop_flag: threading.Event = None) -> Non
                 if t.recognized_employee_id is not None
             ]
             
-            # Update presence and get events
-            events = presence_manager.update(recognized_emp_ids)
+            # Update presence (at capture time of the frame) and get events
+            with scheduler.measure('presence'):
+                events = presence_manager.update(recognized_emp_ids, now=stamp.captured_at)
             
             # Send events to backend
-            for emp_id, event_type in events:
-                send_event(emp_id, event_type, config)
+            with scheduler.measure('events'):
+                for emp_id, event_type in events:
+                    sent = send_event(emp_id, event_type, config, stamp=stamp)
+                    inc_counter('events_sent' if sent else 'events_failed', stream_id)
+                    if sent:
+                        first_seen = _first_seen(recognized_tracks, emp_id) if event_type == 'IN' else None
+                        record_event_latency(stream_id, event_type, stamp, first_seen)
             
-            # Visualize
-            display_frame = _draw_visualization(
-                frame.copy(),
+            # Visualize (overlay is drawn at encode time, only if watched)
+            overlay = build_overlay(
                 tracker,
                 recognized_emp_ids,
-                config
-            )
+                config,
+                frame.shape,
+                detector.roi
+            ) if has_viewers(stream_id) else None
+            _publish_frame(frame, overlay, stream_id)
             
-            # Update streaming frame
-            set_frame(display_frame, stream_id=stream_id)
+            # Schedule next detection (more often while faces are tracked)
+            scheduler.frame_processed(started, active=bool(tracker.tracks))
             
-            # Small delay
-            time.sleep(0.05)
+            # Export per-camera stats (at most once per second)
+            if started - last_stats_publish >= 1.0:
+                publish_stats(stream_id, {
+                    **scheduler.stats(),
+                    **motion_gate.stats(),
+                    **detector.stats(),
+                    **tracker.stats(),
+                })
+                last_stats_publish = started
     
     finally:
+        reloader.stop()
+        if recorder is not None:
+            try:
+                recorder.save()
+            except Exception as e:
+                logger.error(f'Failed to save detection recording: {e}')
+        profiling.unregister_thread(stream_id)
+        detector.close()
         video_capture.release()
         logger.info('Camera released')
 
 
-def _draw_visualization(
-    frame,
-    tracker: FaceTracker,
-    recognized_emp_ids: List[int],
-    config: Config
-):
+def _first_seen(tracks: list, emp_id: int) -> Optional[FrameStamp]:
     """
-    Draw visualization on frame.
+    Get the earliest frame in which an employee's current track was seen.
     
     Args:
-        frame: Frame to draw on
-        tracker: FaceTracker instance
-        recognized_emp_ids: List of recognized employee IDs
-        config: Service configuration
+        tracks: Recognized tracks
+        emp_id: Employee ID
     
     Returns:
-        Frame with visualization
+        FrameStamp or None
     """
-    # Status text
-    preprocessing_status = "CLAHE→Sharp→" if config.enable_preprocessing else ""
-    status_text = (
-        f"{preprocessing_status}InsightFace | "
-        f"Tracks: {len(tracker.tracks)} | "
-        f"Recognized: {len(recognized_emp_ids)}"
-    )
-    
-    # Draw status (with shadow)
-    cv2.putText(frame, status_text, (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3)
-    cv2.putText(frame, status_text, (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-    
-    # Draw recognized faces (green)
-    for track in tracker.tracks:
-        if track.recognized_employee_id and track.last_bbox is not None:
-            x1, y1, x2, y2 = track.last_bbox.astype(int)
-            
-            # Green rectangle
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
-            
-            # Label
-            label = f"ID: {track.recognized_employee_id} ({track.recognition_confidence:.0%})"
-            cv2.rectangle(frame, (x1, y2 - 30), (x2, y2), (0, 255, 0), cv2.FILLED)
-            cv2.putText(frame, label, (x1 + 6, y2 - 8),
-                       cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255), 1)
+    stamps = [
+        t.first_stamp for t in tracks
+        if t.recognized_employee_id == emp_id and t.first_stamp is not None
+    ]
+    return min(stamps, key=lambda stamp: stamp.seq) if stamps else None
+
+
+def _publish_frame(
+    frame: np.ndarray,
+    overlay: Optional[FrameOverlay],
+    stream_id: str
+) -> None:
+    """
+    Publish frame to the stream if anyone is watching.
     
-    # Draw unrecognized faces (red)
-    for track in tracker.tracks:
-        if not track.recognized_employee_id and track.last_bbox is not None:
-            x1, y1, x2, y2 = track.last_bbox.astype(int)
-            
-            # Red rectangle
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            
-            # Label
-            label = f"Track {track.track_id} ({len(track.embeddings)}/{config.min_embeddings_per_track})"
-            cv2.rectangle(frame, (x1, y2 - 30), (x2, y2), (0, 0, 255), cv2.FILLED)
-            cv2.putText(frame, label, (x1 + 6, y2 - 8),
-                       cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255), 1)
+    With no viewers the frame is dropped (no copy, no drawing)
+    and the stream is only marked as alive.
     
-    return frame
-
+    Args:
+        frame: Raw camera frame (ownership passes to the stream)
+        overlay: Latest FrameOverlay snapshot or None
+        stream_id: Identifier of the stream
+    """
+    if has_viewers(stream_id):
+        set_frame(frame, stream_id=stream_id, overlay=overlay)
+    else:
+        touch(stream_id)
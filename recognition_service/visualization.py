@@ -0,0 +1,113 @@
+"""
+Visualization module.
+
+Builds small overlay snapshots (status line, track boxes, detection
+zones) in the processing thread and draws them at JPEG encode time,
+only for streams that have viewers.
+"""
+
+import cv2
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from .config import Config
+from .recognition.roi import DetectionRoi
+from .recognition.tracker import FaceTracker
+
+Color = Tuple[int, int, int]
+
+RECOGNIZED_COLOR: Color = (0, 255, 0)
+UNRECOGNIZED_COLOR: Color = (0, 0, 255)
+ROI_COLOR: Color = (0, 255, 255)
+
+
+@dataclass(frozen=True)
+class OverlayBox:
+    """Labelled box for one track."""
+    bbox: Tuple[int, int, int, int]
+    color: Color
+    label: str
+
+
+@dataclass(frozen=True)
+class FrameOverlay:
+    """
+    Immutable overlay snapshot.
+
+    Cheap to build (no pixel data) and safe to share between the
+    processing thread and stream encoders.
+    """
+    status_text: str
+    boxes: Tuple[OverlayBox, ...] = ()
+    zones: Tuple[np.ndarray, ...] = field(default=())
+
+    def draw(self, frame: np.ndarray) -> None:
+        """
+        Draw overlay on frame (in place).
+
+        Args:
+            frame: Writable BGR frame
+        """
+        # Detection zones (yellow outline)
+        if self.zones:
+            cv2.polylines(frame, list(self.zones), True, ROI_COLOR, 1)
+
+        # Status (with shadow)
+        cv2.putText(frame, self.status_text, (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3)
+        cv2.putText(frame, self.status_text, (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+        for box in self.boxes:
+            x1, y1, x2, y2 = box.bbox
+            cv2.rectangle(frame, (x1, y1), (x2, y2), box.color, 3)
+            cv2.rectangle(frame, (x1, y2 - 30), (x2, y2), box.color, cv2.FILLED)
+            cv2.putText(frame, box.label, (x1 + 6, y2 - 8),
+                        cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255), 1)
+
+
+def build_overlay(
+    tracker: FaceTracker,
+    recognized_emp_ids: List[int],
+    config: Config,
+    frame_shape: Tuple[int, ...],
+    roi: Optional[DetectionRoi] = None
+) -> FrameOverlay:
+    """
+    Snapshot track state for drawing.
+
+    Args:
+        tracker: FaceTracker instance
+        recognized_emp_ids: List of recognized employee IDs
+        config: Service configuration
+        frame_shape: Shape of the frame the overlay belongs to
+        roi: Detection zones to outline (None = full frame)
+
+    Returns:
+        FrameOverlay snapshot
+    """
+    preprocessing_status = "CLAHE→Sharp→" if config.enable_preprocessing else ""
+    status_text = (
+        f"{preprocessing_status}InsightFace | "
+        f"Tracks: {len(tracker.tracks)} | "
+        f"Recognized: {len(recognized_emp_ids)}"
+    )
+
+    boxes = []
+    for track in tracker.tracks:
+        if track.last_bbox is None:
+            continue
+        bbox = tuple(int(v) for v in track.last_bbox)
+
+        if track.recognized_employee_id:
+            label = f"ID: {track.recognized_employee_id} ({track.recognition_confidence:.0%})"
+            boxes.append(OverlayBox(bbox, RECOGNIZED_COLOR, label))
+        else:
+            label = f"Track {track.track_id} ({len(track.embeddings)}/{config.min_embeddings_per_track})"
+            boxes.append(OverlayBox(bbox, UNRECOGNIZED_COLOR, label))
+
+    zones: Tuple[np.ndarray, ...] = ()
+    if roi is not None:
+        zones = tuple(zone.astype(np.int32) for zone in roi.resolve(frame_shape))
+
+    return FrameOverlay(status_text=status_text, boxes=tuple(boxes), zones=zones)